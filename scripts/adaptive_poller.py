@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+adaptive_poller.py – Decide how often each news source should be polled.
+
+Every source (Bloomberg, NewsAPI, CNBC, …, finanzen.net) only exposes a short
+window of recent items. If it is polled less often than that window turns
+over, stories scroll off the feed unseen; if it is polled more often, most
+requests return nothing new.
+
+The poller keeps, per source, an estimate of
+    • window_items  – how many items one poll returns
+    • rate_per_hour – how many new items appear per hour
+and schedules a poll every  SAFETY × window_items / rate_per_hour  hours
+(clamped to 1–24 h), scaled down to fit DAILY_POLL_BUDGET.
+
+Estimates are seeded from the history in data/ (published_at spread of the
+items in each daily news_*.json / hourly finanzen shard) and refined after
+every live poll via `record()`. Coverage and wasted-poll metrics are kept
+in data/poller_state.json.
+
+Usage
+    python scripts/adaptive_poller.py            # show schedule + metrics
+    python scripts/adaptive_poller.py --learn    # re-seed from data/ history
+"""
+from __future__ import annotations
+
+import json
+import re
+import statistics
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import json_codec
+from article import parse_timestamp
+from durable_io import atomic_write_json
+
+# ───────────────────────── paths & tuning ────────────────
+REPO_ROOT  = Path(__file__).resolve().parent.parent
+DATA_DIR   = REPO_ROOT / "data"
+STATE_FILE = DATA_DIR / "poller_state.json"
+
+DAILY_POLL_BUDGET = 60      # total polls per day across all sources
+SAFETY            = 0.5     # poll twice per window turnover
+MIN_INTERVAL_H    = 1.0     # cron granularity
+MAX_INTERVAL_H    = 24.0
+EWMA_ALPHA        = 0.3     # weight of the newest observation
+DUE_SLACK_S       = 600     # cron jitter tolerance
+
+# `source` label fragment → poll unit (first match wins, API tags first)
+SOURCE_UNITS = [
+    ("[NewsAPI]",     "newsapi"),
+    ("[GNews]",       "gnews"),
+    ("Bloomberg",     "bloomberg"),
+    ("Investing.com", "investing"),
+    ("SEC Press",     "sec"),
+    ("Crunchbase",    "crunchbase"),
+    ("CNBC",          "cnbc"),
+    ("Sifted",        "sifted"),
+    ("finanzen.net",  "finanzen"),
+    ("Top Stories",   "yahoo"),
+    ("News Index",    "yahoo"),
+    ("All Finance",   "yahoo"),
+]
+
+# daily fetch snapshots and hourly finanzen shards – not combined/quarterly files
+SNAPSHOT_RX = re.compile(r"^(news_\d{4}-\d{2}-\d{2}|finanzen_\d{4}-\d{2}-\d{2}_\d{4})\.json$")
+
+
+# ───────────────────────── helpers ───────────────────────
+def feed_for_source(source: str) -> tuple[str | None, str]:
+    """
+    (unit, feed) for a `source` label. API results carry the publisher in the
+    label, so all items of one API tag are treated as a single feed.
+    """
+    for fragment, unit in SOURCE_UNITS:
+        if fragment in source:
+            return unit, (fragment if fragment.startswith("[") else source)
+    return None, source
+
+
+# ───────────────────────── poller ────────────────────────
+class AdaptivePoller:
+    def __init__(self, state: dict, path: Path = STATE_FILE, budget: int = DAILY_POLL_BUDGET):
+        self.state  = state
+        self.path   = path
+        self.budget = budget
+        self.state.setdefault("units", {})
+
+    @classmethod
+    def load(cls, path: Path = STATE_FILE, budget: int = DAILY_POLL_BUDGET) -> "AdaptivePoller":
+        try:
+            state = json.loads(path.read_text("utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            state = {}
+        poller = cls(state, path, budget)
+        if not poller.state["units"]:
+            poller.learn_from_history()
+        return poller
+
+    def save(self) -> None:
+        atomic_write_json(self.path, self.state, indent=2, ensure_ascii=False)
+
+    def _unit(self, unit: str) -> dict:
+        return self.state["units"].setdefault(unit, {
+            "window_items": 0.0, "rate_per_hour": 0.0, "last_poll": 0,
+            "polls": 0, "wasted_polls": 0, "overflow_polls": 0,
+            "new_items": 0, "est_missed_items": 0.0,
+        })
+
+    # ── learning ──────────────────────────────────────────
+    def learn_from_history(self, data_dir: Path = DATA_DIR) -> None:
+        """
+        Seed window size and rate from past snapshots. For every feed label the
+        spread of published_at within one snapshot approximates how long the
+        feed window lasts; a source's turnover is that of its fastest label.
+        """
+        windows: dict[str, dict[str, list[int]]]   = defaultdict(lambda: defaultdict(list))
+        spans:   dict[str, dict[str, list[float]]] = defaultdict(lambda: defaultdict(list))
+
+        for fp in sorted(data_dir.glob("*.json")):
+            if not SNAPSHOT_RX.match(fp.name):
+                continue
+            try:
+                items = json_codec.load_file(fp)
+            except json.JSONDecodeError:
+                continue
+            per_label: dict[tuple, list[float]] = defaultdict(list)
+            for item in items if isinstance(items, list) else []:
+                ts = parse_timestamp(item.get("published_at", ""))
+                if ts is not None:
+                    per_label[feed_for_source(item.get("source", ""))].append(ts)
+            for (unit, label), stamps in per_label.items():
+                if unit is None or len(stamps) < 2:
+                    continue
+                windows[unit][label].append(len(stamps))
+                spans[unit][label].append(max((max(stamps) - min(stamps)) / 3600, 0.25))
+
+        for unit, labels in windows.items():
+            window   = sum(statistics.median(n) for n in labels.values())
+            turnover = min(statistics.median(s) for s in spans[unit].values())
+            u = self._unit(unit)
+            u["window_items"]  = round(window, 2)
+            u["rate_per_hour"] = round(window / turnover, 4)
+
+    def record(self, unit: str, new_items: int, total_items: int, now: float | None = None) -> None:
+        """Update estimates and metrics after one poll of *unit*."""
+        now = now or time.time()
+        u   = self._unit(unit)
+
+        if u["last_poll"] and total_items:
+            elapsed_h = max((now - u["last_poll"]) / 3600, 1 / 60)
+            observed  = new_items / elapsed_h
+            u["rate_per_hour"] = round(EWMA_ALPHA * observed + (1 - EWMA_ALPHA) * u["rate_per_hour"], 4)
+            # nothing overlapped the previous poll → the window rolled over, items were probably lost
+            if new_items >= total_items:
+                u["overflow_polls"]   += 1
+                u["est_missed_items"] += max(0.0, u["rate_per_hour"] * elapsed_h - total_items)
+        if total_items:
+            w = u["window_items"]
+            u["window_items"] = round(total_items if not w else EWMA_ALPHA * total_items + (1 - EWMA_ALPHA) * w, 2)
+
+        u["polls"]     += 1
+        u["new_items"] += new_items
+        if new_items == 0:
+            u["wasted_polls"] += 1
+        u["last_poll"] = int(now)
+
+    # ── scheduling ────────────────────────────────────────
+    def desired_interval(self, unit: str) -> float:
+        u = self._unit(unit)
+        if u["rate_per_hour"] <= 0 or u["window_items"] <= 0:
+            return MAX_INTERVAL_H
+        turnover = u["window_items"] / u["rate_per_hour"]
+        return min(max(SAFETY * turnover, MIN_INTERVAL_H), MAX_INTERVAL_H)
+
+    def plan(self) -> dict[str, float]:
+        """unit → poll interval in hours, scaled to the global daily budget."""
+        per_day = {unit: 24 / self.desired_interval(unit) for unit in self.state["units"]}
+        total   = sum(per_day.values())
+        if total > self.budget:
+            scale   = self.budget / total
+            per_day = {unit: max(1.0, p * scale) for unit, p in per_day.items()}
+        return {unit: round(24 / p, 2) for unit, p in per_day.items()}
+
+    def is_due(self, unit: str, now: float | None = None) -> bool:
+        now  = now or time.time()
+        last = self._unit(unit)["last_poll"]
+        return not last or now - last >= self.plan()[unit] * 3600 - DUE_SLACK_S
+
+    def due(self, units, now: float | None = None) -> list[str]:
+        return [u for u in units if self.is_due(u, now)]
+
+    # ── metrics ───────────────────────────────────────────
+    def metrics(self) -> dict[str, dict]:
+        plan = self.plan()
+        out  = {}
+        for unit, u in sorted(self.state["units"].items()):
+            polls    = u["polls"]
+            captured = u["new_items"]
+            out[unit] = {
+                "interval_h":   plan[unit],
+                "polls":        polls,
+                "wasted_ratio": round(u["wasted_polls"] / polls, 3) if polls else None,
+                "coverage":     round(captured / (captured + u["est_missed_items"]), 3) if captured else None,
+                "overflow_polls": u["overflow_polls"],
+            }
+        return out
+
+
+def main() -> None:
+    poller = AdaptivePoller.load()
+    if "--learn" in sys.argv[1:]:
+        poller.learn_from_history()
+        poller.save()
+        print(f"✅ Re-seeded estimates from history → {STATE_FILE.relative_to(REPO_ROOT)}")
+
+    metrics = poller.metrics()
+    print(f"{'source':<12}{'every':>8}{'polls':>7}{'wasted':>8}{'coverage':>10}{'overflow':>10}")
+    for unit, m in metrics.items():
+        wasted   = "–" if m["wasted_ratio"] is None else f"{m['wasted_ratio']:.0%}"
+        coverage = "–" if m["coverage"] is None else f"{m['coverage']:.0%}"
+        print(f"{unit:<12}{m['interval_h']:>7}h{m['polls']:>7}{wasted:>8}{coverage:>10}{m['overflow_polls']:>10}")
+    print(f"\n≈ {sum(24 / m['interval_h'] for m in metrics.values()):.0f} polls/day (budget {poller.budget})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+alerts.py – Entity alerts as soon as an article is fetched.
+
+news_filtered_for_companies_of_interest.json only appears after the fetch,
+tagging (next night) and digest workflows, so a mention of a tracked
+platform could take a day to surface. The fetchers now hand every source's
+new articles to an `AlertStream` right after the HTTP fetch:
+
+    • articles are tagged with the Master Entities matcher on the spot
+      (platforms_mentioned is filled before the day file is written)
+    • every article with a mention becomes one alert – unless its url or its
+      story (normalised title) already alerted within DEDUPE_HOURS, so a
+      story syndicated by several feeds alerts once
+    • alerts are appended to data/alerts.jsonl (append-only, fsync'ed) and
+      passed to the sinks in ALERT_SINKS, a comma-separated list of
+          file:<path>      – another JSON-lines file (e.g. an outbox)
+          webhook:<url>    – POST {"alerts": [...]} as JSON
+    • each alert records fetch → alert and publish → alert latency
+
+Dedupe state (key → first alert time) is kept in data/alert_state.json and
+committed with the fetched data, so CI runs do not re-alert. Several fetchers
+write it, so it is not trusted alone: the keys of the alerts logged within
+the window are added back on load, a process picks up what others appended
+to the log (under its lock) before deciding, and save() merges with the
+state on disk instead of overwriting it.
+
+    python scripts/alerts.py report                 # latency / volume summary
+    python scripts/alerts.py serve --port 8765      # local webhook stub
+    ALERT_SINKS=webhook:http://127.0.0.1:8765/ python scripts/fetch_news.py
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import statistics
+import sys
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from typing import Iterable, Iterator
+
+import json_codec
+from article import Article
+from durable_io import atomic_write_json, file_lock
+from entities import load_resolver
+
+# ───────────────────────── paths & tuning ────────────────
+REPO_ROOT  = Path(__file__).resolve().parent.parent
+DATA_DIR   = REPO_ROOT / "data"
+LOG_FILE   = DATA_DIR / "alerts.jsonl"
+STATE_FILE = DATA_DIR / "alert_state.json"
+
+DEDUPE_HOURS    = 72            # a url / story alerts at most once in this window
+WEBHOOK_TIMEOUT = 5             # seconds per POST
+
+_WORD_RX = re.compile(r"\w+")
+
+
+def story_key(title: str) -> str:
+    """Source-independent key of a headline (case, punctuation and spacing ignored)."""
+    words = _WORD_RX.findall((title or "").lower())
+    return hashlib.sha1(" ".join(words).encode("utf-8")).hexdigest()[:16]
+
+
+def dedupe_keys(url: str | None, title: str | None) -> list[str]:
+    return [k for k in (url and f"url:{url}", title and f"story:{story_key(title)}") if k]
+
+
+# ───────────────────────── sinks ─────────────────────────
+class FileSink:
+    """Appends alerts as JSON lines to *path*."""
+
+    def __init__(self, path: str | os.PathLike):
+        self.path = Path(path)
+
+    def send(self, alerts: list[dict]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("ab") as f:
+            for alert in alerts:
+                f.write(json_codec.dumps(alert, indent=None, ensure_ascii=False) + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class WebhookSink:
+    """POSTs {"alerts": [...]} to *url*; a failing endpoint is reported, never fatal."""
+
+    def __init__(self, url: str):
+        self.url = url
+
+    def send(self, alerts: list[dict]) -> None:
+        body = json_codec.dumps({"alerts": alerts}, indent=None, ensure_ascii=False)
+        req  = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(req, timeout=WEBHOOK_TIMEOUT):
+                pass
+        except OSError as exc:
+            print(f"⚠️  Alert webhook {self.url} failed: {exc}", file=sys.stderr)
+
+
+def sinks_from_env(spec: str | None = None) -> list:
+    """Sinks listed in ALERT_SINKS ("file:<path>,webhook:<url>")."""
+    spec = os.environ.get("ALERT_SINKS", "") if spec is None else spec
+    sinks = []
+    for entry in filter(None, (s.strip() for s in spec.split(","))):
+        kind, _, target = entry.partition(":")
+        if kind == "file":
+            sinks.append(FileSink(target))
+        elif kind == "webhook":
+            sinks.append(WebhookSink(target))
+        else:
+            raise ValueError(f"unknown alert sink {entry!r} (file:<path>, webhook:<url>)")
+    return sinks
+
+
+# ───────────────────────── stream ────────────────────────
+class AlertStream:
+    """
+    Tags freshly fetched articles and emits one alert per new story that
+    mentions a master-table entity (see module docstring).
+
+        alerts = AlertStream()
+        alerts.process(articles, fetched_at=time.time())
+        alerts.save()
+    """
+
+    def __init__(self, log_file: Path = LOG_FILE, state_file: Path = STATE_FILE,
+                 sinks: list | None = None, window_hours: int = DEDUPE_HOURS):
+        self.log      = FileSink(log_file)
+        self.sinks    = sinks_from_env() if sinks is None else sinks
+        self.path     = state_file
+        self.window   = window_hours * 3600
+        self.resolver = load_resolver()
+        try:
+            self.seen: dict[str, int] = json_codec.load_file(state_file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.seen = {}
+        self.emitted: list[dict] = []
+        with file_lock(self.log.path):
+            self._log_pos = self.log.path.stat().st_size if self.log.path.exists() else 0
+            self._remember(self._logged_since(int(time.time()) - self.window))
+
+    def _logged_since(self, cutoff: int) -> Iterator[dict]:
+        """Alerts in the log from *cutoff* on, newest first (the log is read backwards)."""
+        if not self._log_pos:
+            return
+        with self.log.path.open("rb") as f:
+            pos, rest = self._log_pos, b""
+            while pos:
+                step = min(pos, 1 << 16)
+                pos -= step
+                f.seek(pos)
+                lines = (f.read(step) + rest).split(b"\n")
+                rest  = lines.pop(0) if pos else b""
+                for line in reversed(lines):
+                    if not line.strip():
+                        continue
+                    alert = json_codec.loads(line)
+                    if alert["alerted_at"] < cutoff:
+                        return
+                    yield alert
+
+    def _catch_up(self) -> None:
+        """Take in the alerts other processes appended to the log since we last looked."""
+        size = self.log.path.stat().st_size if self.log.path.exists() else 0
+        if size > self._log_pos:
+            with self.log.path.open("rb") as f:
+                f.seek(self._log_pos)
+                self._remember(json_codec.loads(line) for line in f if line.strip())
+        self._log_pos = size
+
+    def _remember(self, alerts: Iterable[dict]) -> None:
+        for alert in alerts:
+            for k in dedupe_keys(alert["url"], alert["title"]):
+                self.seen.setdefault(k, int(alert["alerted_at"]))
+
+    def process(self, articles: Iterable[Article], fetched_at: float) -> list[dict]:
+        """Tag *articles* (in place) and emit alerts for new mentions; returns the alerts."""
+        articles = list(articles)
+        for art in articles:
+            art.platforms_mentioned = tuple(self.resolver.mentions(art.text))
+        with file_lock(self.log.path):
+            alerts = self._new_alerts(articles, fetched_at)
+            if alerts:
+                self.log.send(alerts)               # the log first: it is the record of truth
+            self._log_pos = self.log.path.stat().st_size if self.log.path.exists() else 0
+        if alerts:
+            for sink in self.sinks:
+                sink.send(alerts)
+            self.emitted += alerts
+        return alerts
+
+    def _new_alerts(self, articles: list[Article], fetched_at: float) -> list[dict]:
+        self._catch_up()
+        alerts = []
+        for art in articles:
+            if not art.platforms_mentioned:
+                continue
+            keys = dedupe_keys(art.url, art.title)
+            if any(k in self.seen for k in keys):
+                continue
+            now = time.time()
+            for k in keys:
+                self.seen[k] = int(now)
+            alerts.append({
+                "entities":     list(art.platforms_mentioned),
+                "title":        art.title,
+                "url":          art.url,
+                "source":       art.source,
+                "published_at": art.published_at,
+                "fetched_at":   round(fetched_at, 3),
+                "alerted_at":   round(now, 3),
+                "fetch_to_alert_s":   round(now - fetched_at, 3),
+                "publish_to_alert_s": round(now - art.published_ts) if art.published_ts else None,
+            })
+        return alerts
+
+    def save(self) -> None:
+        self.log.path.touch()                       # the log exists even before the first alert
+        cutoff = int(time.time()) - self.window
+        with file_lock(self.path):
+            try:
+                on_disk: dict[str, int] = json_codec.load_file(self.path)
+            except (FileNotFoundError, json.JSONDecodeError):
+                on_disk = {}
+            for k, t in on_disk.items():            # another fetcher's keys since we loaded
+                self.seen[k] = min(t, self.seen.get(k, t))
+            self.seen = {k: t for k, t in self.seen.items() if t >= cutoff}
+            atomic_write_json(self.path, self.seen, indent=None, ensure_ascii=False)
+
+    def summary(self) -> str:
+        if not self.emitted:
+            return "No entity alerts."
+        lat = [a["fetch_to_alert_s"] for a in self.emitted]
+        return (f"🔔 {len(self.emitted)} entity alert(s); fetch → alert "
+                f"median {statistics.median(lat) * 1e3:.0f} ms, max {max(lat) * 1e3:.0f} ms.")
+
+
+# ───────────────────────── report / webhook stub ─────────
+def _pct(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def report(log_file: Path = LOG_FILE) -> None:
+    """Alert volume and latency percentiles from the alert log."""
+    try:
+        alerts = [json_codec.loads(line) for line in log_file.open("rb") if line.strip()]
+    except FileNotFoundError:
+        sys.exit(f"No alert log at {log_file}.")
+    if not alerts:
+        sys.exit("The alert log is empty.")
+    print(f"{len(alerts)} alert(s), {len({e for a in alerts for e in a['entities']})} entities, "
+          f"{len({a['source'] for a in alerts})} source(s)")
+    for field, label in (("fetch_to_alert_s", "fetch → alert"), ("publish_to_alert_s", "publish → alert")):
+        values = [a[field] for a in alerts if a.get(field) is not None]
+        if values:
+            print(f"{label:<16} p50 {_pct(values, .5):10.3f}s   p95 {_pct(values, .95):10.3f}s   "
+                  f"max {max(values):10.3f}s")
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    def do_POST(self) -> None:
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        for alert in payload.get("alerts", []):
+            print(f"🔔 {', '.join(alert['entities'])}: {alert['title']}  ({alert['source']})", flush=True)
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def main() -> None:
+    ap  = argparse.ArgumentParser(description="Entity alert log tools.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("report", help="alert volume and latency from data/alerts.jsonl")
+    serve = sub.add_parser("serve", help="local webhook stub that prints received alerts")
+    serve.add_argument("--port", type=int, default=8765)
+    args = ap.parse_args()
+
+    if args.cmd == "report":
+        report()
+    else:
+        print(f"Listening on http://127.0.0.1:{args.port}/ – Ctrl-C to stop.")
+        HTTPServer(("127.0.0.1", args.port), _StubHandler).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,17 @@
+import argparse
 import json
-import csv
-from textblob import TextBlob
-
-# Lists of entities for detection (lowercase)
-origination_platforms = [
-    "acredius", "anodu", "biz2credit", "bondora", "bondster", "cashenable", "cg24",
-    "colectual", "conda", "crowd4cash", "crx", "evenfi", "fellow finance", "finbee",
-    "finomark", "flex funding", "fulfin", "funding partner", "geldvoorelkaar", "get income",
-    "goparity", "hive finance", "itf group", "klear lending", "kom group", "lend",
-    "lendahand", "lending club", "max crowdfund", "mozzeno", "raize", "savy", "spraypay",
-    "stately credit", "steward", "stockcrowd in", "tapline", "untapped global",
-    "vauraus", "winwinner", "wiseed"
-]
+from itertools import islice
 
-competitors = ["dv01", "cardoai", "lendity", "i2invest", "crosslend", "alterest"]
+from archive_reader import ArchiveReader
+from durable_io import file_lock
+from entities import load_resolver
+from export_sinks import CsvSink, JsonArraySink, JsonLinesSink, ParquetSink, open_sinks
+from language import LanguageCache
+from sentiment import SentimentService
 
-fintech_funds = [
-    "avellinia", "awi kmu darlehen", "castlelake", "channel capital", "fasanara",
-    "nordix", "scayl", "smart lenders", "tavis capital", "viola credit", "winyield",
-    "accial capital", "lendable inc.", "goldfinch", "northern arc capital",
-    "pollen street capital", "victory park capital", "ranger capital", "gli finance",
-    "prime meridian", "stone ridge"
-]
+# Platforms, competitors, funds and own-company mentions come from the
+# Master Entities CSV via the shared matcher (see entities.py)
+resolver = load_resolver()
 
 # Keywords for classification
 regulation_keywords = ['regulation', 'gesetz', 'bafin', 'aufsicht', 'gesetzgebung', 'compliance']
@@ -30,32 +20,15 @@ funding_keywords = ['funding', 'investment', 'capital', 'fund']
 partnership_keywords = ['partnership', 'collaboration', 'alliance', 'cooperation']
 insolvency_keywords = ['insolvency', 'restructuring', 'default', 'bankruptcy', 'liquidation', 'debt']
 
-exaloan_keywords = ['exaloan', 'creditshelf', 'scorechain']
-
-competitor_keywords = competitors  # can expand if needed
-
-# Normalize all entity lists for matching
-all_names = {
-    "platforms": origination_platforms,
-    "competitors": competitors,
-    "funds": fintech_funds,
-}
-
 def detect_entities(text):
+    found = resolver.resolve(text)
+    return found["platforms"], found["competitors"], found["funds"], found["companies"]
+
+def classify_article(text, competitors_mentioned=(), companies_mentioned=()):
     text_lower = text.lower()
-    platforms_mentioned = [name for name in all_names["platforms"] if name in text_lower]
-    competitors_mentioned = [name for name in all_names["competitors"] if name in text_lower]
-    funds_mentioned = [name for name in all_names["funds"] if name in text_lower]
-    companies_mentioned = []
-    if any(word in text_lower for word in exaloan_keywords):
-        companies_mentioned.append("exaloan")
-    return platforms_mentioned, competitors_mentioned, funds_mentioned, companies_mentioned
-
-def classify_article(text):
-    text_lower = text.lower()
-    if any(word in text_lower for word in exaloan_keywords):
+    if companies_mentioned:
         return 'exaloan_reputation'
-    elif any(word in text_lower for word in competitor_keywords):
+    elif competitors_mentioned:
         return 'competitor'
     elif any(word in text_lower for word in regulation_keywords):
         return 'regulation'
@@ -70,81 +43,115 @@ def classify_article(text):
     else:
         return 'unknown'
 
-def get_sentiment(text):
-    blob = TextBlob(text)
-    polarity = blob.sentiment.polarity
-    if polarity > 0.1:
-        label = 'positive'
-    elif polarity < -0.1:
-        label = 'negative'
-    else:
-        label = 'neutral'
-    return label, polarity
-
 def extract_keywords(text):
     # Simple keyword extraction by splitting commas and spaces, filter out short words
     raw_keywords = [kw.strip() for kw in text.lower().replace(',', ' ').split() if len(kw) > 3]
     # Remove duplicates
     return list(set(raw_keywords))
 
-# Load scraped news
-with open('data/all_news.json', 'r', encoding='utf-8') as f:
-    news_data = json.load(f)
-
-enriched_data = []
-
-for article in news_data:
-    content = article.get('content', '')
-    # Fix date: try published_at or fallback to published, else empty string
-    date_raw = article.get('published_at') or article.get('published') or ''
-    date = date_raw[:10] if len(date_raw) >= 10 else ''
-    title = article.get('title', '')
-    
-    platforms, competitors_mentioned, funds_mentioned, companies_mentioned = detect_entities(content + " " + title)
-    category = classify_article(content + " " + title)
-    sentiment_label, sentiment_score = get_sentiment(content)
-    keywords = extract_keywords(content + " " + title)
-    
-    insolvency_flag = any(word in content.lower() for word in insolvency_keywords)
-    
-    enriched_data.append({
-        "date": date,
-        "source": article.get('source', ''),
-        "title": title,
-        "url": article.get('url', ''),
-        "category": category,
-        "sentiment_label": sentiment_label,
-        "sentiment_score": sentiment_score,
-        "platforms_mentioned": platforms,
-        "competitors_mentioned": competitors_mentioned,
-        "funds_mentioned": funds_mentioned,
-        "companies_mentioned": companies_mentioned,
-        "keywords": keywords,
-        "insolvency_risk": insolvency_flag
-    })
-
-# Save enriched JSON
-with open('data/enriched_news.json', 'w', encoding='utf-8') as f:
-    json.dump(enriched_data, f, indent=2, ensure_ascii=False)
-
-# Optionally save to CSV (flattening lists as comma-separated strings)
+def row_key(row):
+    # Like merge_news' dedupe key: the url, else the record itself – here the
+    # CSV columns that come straight from the article (the id is not exported)
+    return row["url"] or json.dumps([row["date"], row["source"], row["title"]], ensure_ascii=False)
+
+# ── Output sinks ─────────────────────────────────────────────
+# Rows are streamed to every sink as they are produced (see export_sinks.py).
+#   --append   only enrich articles not in enriched_news.csv yet (see row_key) and
+#              add their rows at the end of the files – a full run writes newest
+#              first, so after appends the rows are no longer in one date order;
+#              each file is still copied once so the append stays atomic
+#   --gzip     also write enriched_news.csv.gz / enriched_news.jsonl.gz
+#   --parquet  also write the data/enriched_news.parquet/ dataset (pyarrow)
+ap = argparse.ArgumentParser(description="Enrich data/all_news.json")
+ap.add_argument("--append", action="store_true", help="add only new rows, at the end of the existing outputs "
+                     "(not in the newest-first order of a full run)")
+ap.add_argument("--gzip", action="store_true", help="also write gzip-compressed CSV / JSONL")
+ap.add_argument("--parquet", action="store_true", help="also write a Parquet dataset (needs pyarrow)")
+ap.add_argument("--keywords", choices=("split", "tfidf"), default="split",
+                help="keyword column: every word > 3 chars (split) or the batch's top TF-IDF terms (needs numpy)")
+args = ap.parse_args()
+
 csv_columns = [
     "date", "source", "title", "url", "category", "sentiment_label", "sentiment_score",
     "platforms_mentioned", "competitors_mentioned", "funds_mentioned", "companies_mentioned",
     "keywords", "insolvency_risk"
 ]
 
-with open('data/enriched_news.csv', 'w', newline='', encoding='utf-8') as f:
-    writer = csv.DictWriter(f, fieldnames=csv_columns)
-    writer.writeheader()
-    for row in enriched_data:
-        row_csv = row.copy()
-        # Join lists into strings for CSV
-        row_csv["platforms_mentioned"] = ", ".join(row["platforms_mentioned"])
-        row_csv["competitors_mentioned"] = ", ".join(row["competitors_mentioned"])
-        row_csv["funds_mentioned"] = ", ".join(row["funds_mentioned"])
-        row_csv["companies_mentioned"] = ", ".join(row["companies_mentioned"])
-        row_csv["keywords"] = ", ".join(row["keywords"])
-        writer.writerow(row_csv)
-
-print("✅ Enrichment complete: 'enriched_news.json' and 'enriched_news.csv' created.")
+csv_sink = CsvSink('data/enriched_news.csv', csv_columns)
+sinks = [
+    JsonArraySink('data/enriched_news.json'),
+    JsonLinesSink('data/enriched_news.jsonl'),
+    csv_sink,
+]
+if args.gzip:
+    sinks += [CsvSink('data/enriched_news.csv.gz', csv_columns), JsonLinesSink('data/enriched_news.jsonl.gz')]
+if args.parquet:
+    sinks.append(ParquetSink('data/enriched_news.parquet'))
+
+already_enriched = csv_sink.existing_keys(row_key) if args.append else set()
+
+# Sentiment is cached by text hash and cache misses are scored in parallel
+# (see sentiment.py), so articles are enriched in batches of this size
+SENTIMENT_BATCH = 2_000
+sentiment = SentimentService()
+# records stored before language tagging are detected here, once (see language.py)
+languages = LanguageCache()
+
+# --keywords tfidf: scored per batch against the rolling document frequencies of
+# the fetchers (see keyword_engine.py); re-scoring the archive does not update them
+tfidf = None
+if args.keywords == "tfidf":
+    from keyword_engine import TfidfKeywords
+    tfidf = TfidfKeywords()
+
+# ── Enrich, batch by batch ───────────────────────────────────
+# all_news.json is memory-mapped and decoded lazily (see archive_reader.py); the
+# mapping keeps the version read under the lock even if merge_news replaces the file
+with file_lock('data/all_news.json', shared=True):
+    news_data = ArchiveReader('data/all_news.json')
+with news_data, open_sinks(sinks, append=args.append) as out:
+    pending = (a for a in news_data
+               if row_key({"url": a.url, "date": a.day or '', "source": a.source or '', "title": a.title or ''})
+               not in already_enriched)
+    while batch := list(islice(pending, SENTIMENT_BATCH)):
+        # language is normally set at ingest; older records are detected here
+        languages.tag(batch)
+        scores = sentiment.score_many([(a.content, a.lang) for a in batch])
+        batch_keywords = (tfidf.extract_many([a.content + " " + a.title for a in batch],
+                                             [a.lang for a in batch], learn=False)
+                          if tfidf else [None] * len(batch))
+
+        for article, (sentiment_label, sentiment_score), tfidf_keywords in zip(batch, scores, batch_keywords):
+            content = article.content
+            # Day parsed once from published_at (RFC 2822 or ISO), else empty string
+            date = article.day or ''
+            title = article.title
+
+            platforms, competitors_mentioned, funds_mentioned, companies_mentioned = detect_entities(content + " " + title)
+            category = classify_article(content + " " + title, competitors_mentioned, companies_mentioned)
+            keywords = tfidf_keywords if tfidf else extract_keywords(content + " " + title)
+
+            insolvency_flag = any(word in content.lower() for word in insolvency_keywords)
+
+            out.write({
+                "date": date,
+                "source": article.source,
+                "title": title,
+                "url": article.url,
+                "category": category,
+                "sentiment_label": sentiment_label,
+                "sentiment_score": sentiment_score,
+                "platforms_mentioned": platforms,
+                "competitors_mentioned": competitors_mentioned,
+                "funds_mentioned": funds_mentioned,
+                "companies_mentioned": companies_mentioned,
+                "keywords": keywords,
+                "insolvency_risk": insolvency_flag
+            })
+sentiment.save()
+languages.save()
+
+mode = "appended to" if args.append else "written to"
+print(f"✅ Enrichment complete: {csv_sink.rows} row(s) {mode} "
+      + ", ".join(f"'{s.path.name}'" for s in sinks) + ".")
+print(f"   Sentiment cache hit rate {sentiment.hit_rate:.0%} ({sentiment.misses} text(s) scored).")
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+api_client.py – Quota-aware, paginated access to NewsAPI and GNews.
+
+fetch_news.py used to make a single request per API (100 results) and drop
+everything past the first page; a 429 simply lost the day. `ApiClient`
+    • keeps a per-key request ledger in data/api_quota.json (requests used
+      today, throttled-until time) and refuses to exceed DAILY_LIMIT
+    • honours 429 / Retry-After with bounded back-off
+    • pages through results (newest first) until a page reaches URLs that
+      are already stored, the result set ends, or the budget runs out
+
+`backfill()` walks a date range day by day with a small thread pool and
+merges the results into data/news_<day>.json; the CLI then runs merge_news.py
+for the days that gained articles, so they reach all_news.json and the
+quarter files as well.
+
+    python scripts/api_client.py backfill newsapi 2025-06-01 2025-06-07 --workers 3
+    python scripts/api_client.py backfill gnews 2025-06-01 2025-06-07 --no-merge
+    python scripts/api_client.py quota
+
+check_api_client.py exercises the client against a local mock API.
+
+Keys are read from NEWSAPI_KEY / GNEWS_KEY (or --key).
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable
+
+import requests
+
+import json_codec
+import raw_archive
+from article import Article, read_articles, write_articles
+from durable_io import atomic_write_json, file_lock
+
+# ───────────────────────── paths & tuning ────────────────
+REPO_ROOT  = Path(__file__).resolve().parent.parent
+DATA_DIR   = REPO_ROOT / "data"
+QUOTA_FILE = DATA_DIR / "api_quota.json"
+
+MAX_RETRIES    = 3      # 429 / 5xx retries per request
+MAX_BACKOFF_S  = 60     # longest single wait; longer Retry-After ⇒ give up for now
+REQUEST_TIMEOUT = 30
+
+
+# ───────────────────────── API definitions ───────────────
+@dataclass(frozen=True)
+class ApiSpec:
+    name:        str
+    url:         str
+    key_param:   str
+    page_size_param: str
+    page_size:   int
+    total_field: str
+    daily_limit: int                        # free-tier requests per key and day
+    key_env:     str
+    to_article:  Callable[[dict], Article]
+
+
+def _newsapi_article(a: dict) -> Article:
+    return Article(
+        source       = f"{a['source']['name']} [NewsAPI]",
+        url          = a["url"],
+        title        = a["title"],
+        published_at = a["publishedAt"],
+        content      = a.get("content") or a.get("description", ""),
+    )
+
+
+def _gnews_article(a: dict) -> Article:
+    return Article(
+        source       = f"{a.get('source', {}).get('name', 'N/A')} [GNews]",
+        url          = a.get("url", ""),
+        title        = a.get("title", ""),
+        published_at = a.get("publishedAt", ""),
+        content      = a.get("description", ""),
+    )
+
+
+NEWSAPI = ApiSpec("newsapi", "https://newsapi.org/v2/everything", "apiKey",
+                  "pageSize", 100, "totalResults", 100, "NEWSAPI_KEY", _newsapi_article)
+GNEWS   = ApiSpec("gnews", "https://gnews.io/api/v4/search", "token",
+                  "max", 100, "totalArticles", 100, "GNEWS_KEY", _gnews_article)
+APIS    = {spec.name: spec for spec in (NEWSAPI, GNEWS)}
+
+
+# ───────────────────────── quota ledger ──────────────────
+class QuotaLedger:
+    """Requests used per API key and UTC day, persisted across runs."""
+
+    def __init__(self, path: Path = QUOTA_FILE):
+        self.path  = path
+        self._lock = threading.Lock()
+        try:
+            self.state: dict[str, dict] = json_codec.load_file(path)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.state = {}
+
+    @staticmethod
+    def key_id(spec: ApiSpec, key: str) -> str:
+        # never store the key itself
+        return f"{spec.name}:{hashlib.sha1(key.encode()).hexdigest()[:8]}"
+
+    def _entry(self, key_id: str) -> dict:
+        today = datetime.now(timezone.utc).date().isoformat()
+        e = self.state.setdefault(key_id, {"day": today, "used": 0, "throttled": 0, "blocked_until": 0})
+        if e["day"] != today:
+            e.update(day=today, used=0, throttled=0)
+        return e
+
+    def reserve(self, key_id: str, limit: int) -> bool:
+        """Claim one request; False if the day's budget is spent or the key is blocked."""
+        with self._lock:
+            e = self._entry(key_id)
+            if e["used"] >= limit or e["blocked_until"] > time.time():
+                return False
+            e["used"] += 1
+            return True
+
+    def throttled(self, key_id: str, until: float) -> None:
+        with self._lock:
+            e = self._entry(key_id)
+            e["throttled"] += 1
+            e["blocked_until"] = max(e["blocked_until"], int(until))
+
+    def remaining(self, key_id: str, limit: int) -> int:
+        with self._lock:
+            return max(0, limit - self._entry(key_id)["used"])
+
+    def save(self) -> None:
+        with self._lock:
+            atomic_write_json(self.path, self.state, indent=2, ensure_ascii=False)
+
+
+# ───────────────────────── client ────────────────────────
+class QuotaExhausted(Exception):
+    pass
+
+
+class ApiClient:
+    """
+    Client for one API key. Safe to share between threads: each thread gets
+    its own requests.Session unless *session* is given.
+    """
+
+    def __init__(self, spec: ApiSpec, key: str, ledger: QuotaLedger | None = None,
+                 session: requests.Session | None = None, url: str | None = None):
+        self.spec    = spec
+        self.key     = key
+        self.ledger  = ledger or QuotaLedger()
+        self.key_id  = QuotaLedger.key_id(spec, key)
+        self.url     = url or spec.url
+        self._session = session
+        self._local   = threading.local()
+
+    @property
+    def session(self) -> requests.Session:
+        if self._session is not None:
+            return self._session
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def get(self, params: dict) -> dict:
+        """One API call with quota accounting and 429 / 5xx back-off."""
+        params = {**params, self.spec.key_param: self.key}
+        offline = raw_archive.replaying()          # answered from the raw archive – no quota used
+        for attempt in range(MAX_RETRIES + 1):
+            if not offline and not self.ledger.reserve(self.key_id, self.spec.daily_limit):
+                raise QuotaExhausted(f"{self.spec.name}: daily budget spent or key throttled")
+            resp = raw_archive.http_get(self.url, params=params, session=self.session,
+                                        timeout=REQUEST_TIMEOUT)
+
+            if resp.status_code == 200:
+                return resp.json()
+            if resp.status_code == 429 or 500 <= resp.status_code < 599:   # 599 = not in raw archive
+                wait = _retry_after(resp, attempt)
+                if resp.status_code == 429 and (wait > MAX_BACKOFF_S or attempt == MAX_RETRIES):
+                    if not offline:
+                        self.ledger.throttled(self.key_id, time.time() + wait)
+                    raise QuotaExhausted(f"{self.spec.name}: rate-limited for {wait:.0f}s")
+                if attempt < MAX_RETRIES:
+                    if not offline:
+                        time.sleep(min(wait, MAX_BACKOFF_S))
+                    continue
+            raise requests.HTTPError(f"{self.spec.name} error: {resp.status_code} – {resp.text[:200]}")
+        raise AssertionError("unreachable")
+
+    def fetch_new(self, params: dict, known_urls: set[str] = frozenset(),
+                  max_pages: int = 10) -> list[dict]:
+        """
+        Page through results (sorted newest first) and return the raw items
+        that are not in *known_urls*. Stops at the first page that overlaps
+        stored articles, at the end of the result set, or when the quota or
+        *max_pages* is reached.
+        """
+        size  = self.spec.page_size
+        found: list[dict] = []
+        for page in range(1, max_pages + 1):
+            try:
+                body = self.get({**params, self.spec.page_size_param: size, "page": page})
+            except QuotaExhausted as exc:
+                print(f"⚠️  {exc} – stopping after {page - 1} page(s).")
+                break
+            except requests.HTTPError as exc:
+                # e.g. NewsAPI's 426 "maximumResultsReached" on free keys
+                if page == 1:
+                    print(exc)
+                break
+
+            items = body.get("articles", [])
+            fresh = [a for a in items if a.get("url") not in known_urls]
+            found += fresh
+            total = body.get(self.spec.total_field) or 0
+            if len(fresh) < len(items) or len(items) < size or page * size >= total:
+                break
+        if not raw_archive.replaying():
+            self.ledger.save()
+        return found
+
+
+def _retry_after(resp: requests.Response, attempt: int) -> float:
+    try:
+        return float(resp.headers.get("Retry-After", ""))
+    except ValueError:
+        return 2.0 ** attempt
+
+
+# ───────────────────────── backfill ──────────────────────
+def _day_params(spec: ApiSpec, query: str, day: date) -> dict:
+    start = f"{day.isoformat()}T00:00:00Z"
+    end   = f"{day.isoformat()}T23:59:59Z"
+    if spec is NEWSAPI:
+        return {"q": query, "language": "en", "sortBy": "publishedAt", "from": start, "to": end}
+    return {"q": query, "in": "title,description", "lang": "en", "sortby": "publishedAt",
+            "from": start, "to": end}
+
+
+def backfill(client: ApiClient, query: str, first: date, last: date,
+             workers: int = 3, data_dir: Path = DATA_DIR) -> dict[str, int]:
+    """Fetch every day in [first, last] and merge it into data/news_<day>.json."""
+    days = [first + timedelta(d) for d in range((last - first).days + 1)]
+    added: dict[str, int] = {}
+
+    def run(day: date) -> None:
+        path = data_dir / f"news_{day.isoformat()}.json"
+        try:
+            stored = read_articles(path)
+        except (FileNotFoundError, json.JSONDecodeError):
+            stored = []
+        known = {a.url for a in stored}
+        raw   = client.fetch_new(_day_params(client.spec, query, day), known)
+        new   = [client.spec.to_article(a) for a in raw]
+        # re-read under the file's lock: fetch_news / tag_platforms may have written meanwhile
+        with file_lock(path):
+            try:
+                stored = read_articles(path)
+            except FileNotFoundError:
+                stored = []
+            except json.JSONDecodeError as exc:     # never overwrite a file we cannot read
+                print(f"  {day}: ✋ cannot decode '{path.name}' ({exc}) – not written")
+                added[day.isoformat()] = 0
+                return
+            known = {a.url for a in stored}
+            new   = [a for a in new if a.url not in known]
+            if new:
+                write_articles(path, stored + new, indent=2, ensure_ascii=True)
+            added[day.isoformat()] = len(new)
+        print(f"  {day}: +{len(new)}")
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        list(pool.map(run, days))
+    client.ledger.save()
+    return added
+
+
+def merge_days(days: list[str]) -> int:
+    """Run merge_news.py for *days*, as the daily pipeline does for yesterday and today."""
+    return subprocess.run([sys.executable, "scripts/merge_news.py", *days], cwd=REPO_ROOT).returncode
+
+
+# ───────────────────────── CLI ───────────────────────────
+def main() -> None:
+    ap  = argparse.ArgumentParser(description="NewsAPI / GNews quota & backfill tool")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    bf = sub.add_parser("backfill", help="fetch a past date range into data/news_<day>.json")
+    bf.add_argument("api", choices=sorted(APIS))
+    bf.add_argument("first", type=date.fromisoformat)
+    bf.add_argument("last", type=date.fromisoformat)
+    bf.add_argument("--query", default="lending OR credit")
+    bf.add_argument("--workers", type=int, default=3)
+    bf.add_argument("--key", help="API key (default: $NEWSAPI_KEY / $GNEWS_KEY)")
+    bf.add_argument("--url", help="override the endpoint (e.g. a local mock server)")
+    bf.add_argument("--no-merge", action="store_true",
+                    help="only write data/news_<day>.json; do not merge into all_news.json / the quarter files")
+
+    sub.add_parser("quota", help="show requests used per key today")
+    args = ap.parse_args()
+
+    ledger = QuotaLedger()
+    if args.cmd == "quota":
+        for key_id, e in sorted(ledger.state.items()):
+            spec = APIS[key_id.split(":")[0]]
+            print(f"{key_id:<20}{e['day']:>12}{e['used']:>5}/{spec.daily_limit}"
+                  f"{e['throttled']:>4} throttled")
+        return
+
+    spec = APIS[args.api]
+    key  = args.key or os.environ.get(spec.key_env)
+    if not key:
+        sys.exit(f"✋  No API key – pass --key or set {spec.key_env}.")
+    client = ApiClient(spec, key, ledger, url=args.url)
+    added  = backfill(client, args.query, args.first, args.last, args.workers)
+    print(f"✅ Backfill {spec.name}: {sum(added.values())} new article(s) over {len(added)} day(s); "
+          f"{ledger.remaining(client.key_id, spec.daily_limit)} request(s) left today.")
+    merge = sorted(day for day, n in added.items() if n)
+    if merge and not args.no_merge:
+        print(f"Merging {len(merge)} backfilled day(s) …")
+        if merge_days(merge):
+            sys.exit("✋  merge_news.py failed – re-run it for the backfilled days.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+archive_order.py – Keep the newest-first archives ordered without re-sorting.
+
+merge_news.py used to load all of all_news.json (and the quarter file), append
+the day's batch and sort the whole list again. Archives are now kept sorted
+by `published_ts` (newest first, unknown dates last) as an invariant:
+
+    splice()        – the archive is known to be sorted: the new items are
+                      merged in while the archive is streamed from disk.
+                      Only records that end up ahead of or between new items
+                      are decoded; once the batch is placed, the rest of
+                      the archive is copied as raw bytes.
+    sorted_runs()   – order unknown (first run, file changed elsewhere):
+    + merge_runs()    external merge sort. Records are sorted in runs of at
+                      most MEMORY_BUDGET articles, full runs are spilled to
+                      disk as JSON lines, and the runs plus the new batch
+                      are merged k-way into the output stream.
+
+Both write exactly what write_articles(indent=2, ensure_ascii=False) would,
+and ties keep their previous order (a stable sort of archive + batch).
+
+Whether an archive is sorted is recorded in data/.cache/order/<name>.json,
+stamped with the file's content (durable_io.content_stamp), together with
+its article count.
+"""
+from __future__ import annotations
+
+import heapq
+import json
+import mmap
+import os
+import tempfile
+from datetime import date
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator
+
+import json_codec
+from archive_reader import iter_offsets
+from article import Article
+from durable_io import atomic_open, atomic_write_json, content_stamp
+
+# ───────────────────────── paths & tuning ────────────────
+REPO_ROOT = Path(__file__).resolve().parent.parent
+ORDER_DIR = REPO_ROOT / "data" / ".cache" / "order"
+
+MEMORY_BUDGET = 200_000         # articles sorted in memory before a run is spilled
+COPY_BLOCK    = 1 << 20         # bytes per write when copying the untouched archive tail
+
+
+def sort_key(item: Article) -> int:
+    """Publish time as a UNIX timestamp (0 if unknown); archives are sorted descending."""
+    return item.published_ts or 0
+
+
+def get_quarter_str(dt: date) -> str:
+    """
+    Given a datetime (or date) object, return a string like '2025_Q2'.
+    Q1: Jan–Mar, Q2: Apr–Jun, Q3: Jul–Sep, Q4: Oct–Dec.
+    """
+    quarter_num = (dt.month - 1) // 3 + 1
+    return f"{dt.year}_Q{quarter_num}"
+
+
+def _encode(item: Article) -> bytes:
+    # one array element, laid out as json.dump(indent=2) would inside the list
+    return json_codec.dumps(item.to_dict(), indent=2, ensure_ascii=False).replace(b"\n", b"\n  ")
+
+
+# ───────────────────────── order state ───────────────────
+def _state_path(path: str | os.PathLike) -> Path:
+    return ORDER_DIR / f"{Path(path).name}.json"
+
+
+def sorted_count(path: str | os.PathLike) -> int | None:
+    """Number of articles if *path* is known to be sorted (and unchanged), else None."""
+    try:
+        state = json_codec.load_file(_state_path(path))
+        return state["count"] if state["stamp"] == content_stamp(path) else None
+    except (FileNotFoundError, KeyError, json.JSONDecodeError):
+        return None
+
+
+def mark_sorted(path: str | os.PathLike, count: int) -> None:
+    """Record that *path*, as it is on disk now, holds *count* sorted articles."""
+    atomic_write_json(_state_path(path), {"stamp": content_stamp(path), "count": count}, indent=None)
+
+
+# ───────────────────────── reading ───────────────────────
+@contextmanager
+def _mapped(path: str | os.PathLike) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield mm
+
+
+def is_array(path: str | os.PathLike) -> bool:
+    """Cheap framing check: the file is one JSON array ('[' … ']')."""
+    with open(path, "rb") as f:
+        head = f.read(64).lstrip()
+        f.seek(max(0, os.fstat(f.fileno()).st_size - 64))
+        tail = f.read().rstrip()
+    return head.startswith(b"[") and tail.endswith(b"]")
+
+
+def iter_archive(path: str | os.PathLike) -> Iterator[Article]:
+    """
+    Decode the objects of a JSON-array archive one at a time (non-objects are
+    skipped). Raises json.JSONDecodeError on a corrupt record.
+    """
+    with _mapped(path) as buf:
+        for s, e in iter_offsets(buf):
+            yield Article.from_dict(json_codec.loads(buf[s:e]))
+
+
+# ───────────────────────── fast path ─────────────────────
+def splice(path: str | os.PathLike, fresh: list[Article], count: int) -> int:
+    """
+    Merge *fresh* (sorted newest first) into the sorted archive at *path*,
+    which holds *count* articles. Returns the new article count.
+    """
+    written = consumed = 0
+    with atomic_open(path, "wb") as out:
+        out.write(b"[")
+
+        def emit(raw: bytes) -> None:
+            out.write(b",\n  " if written else b"\n  ")
+            out.write(raw)
+
+        with _mapped(path) as buf:
+            tail_end = buf.rfind(b"]")                         # end of the last record
+            while tail_end > 0 and buf[tail_end - 1:tail_end].isspace():
+                tail_end -= 1
+            i = 0
+            for s, e in iter_offsets(buf):
+                if i == len(fresh):
+                    emit(b"")                                  # everything older, byte for byte
+                    for pos in range(s, tail_end, COPY_BLOCK):
+                        out.write(buf[pos:min(pos + COPY_BLOCK, tail_end)])
+                    written += count - consumed
+                    consumed = count
+                    break
+                ts = sort_key(Article.from_dict(json_codec.loads(buf[s:e])))
+                while i < len(fresh) and sort_key(fresh[i]) > ts:     # ties: archive first
+                    emit(_encode(fresh[i]))
+                    written += 1
+                    i += 1
+                emit(buf[s:e])
+                written  += 1
+                consumed += 1
+            for item in fresh[i:]:
+                emit(_encode(item))
+                written += 1
+        out.write(b"\n]" if written else b"]")
+    return written
+
+
+# ───────────────────────── external sort ─────────────────
+def _spilled(path: Path) -> Iterator[Article]:
+    with path.open("rb") as f:
+        for line in f:
+            yield Article.from_dict(json_codec.loads(line))
+
+
+def sorted_runs(items: Iterable[Article], spill_dir: Path,
+                budget: int | None = None) -> tuple[list[Iterable[Article]], int]:
+    """
+    Cut *items* into sorted runs (newest first, stable) of at most *budget*
+    articles. All but the last run are written to *spill_dir*. Returns the
+    runs (in input order) and the number of items read.
+    """
+    budget = budget or MEMORY_BUDGET
+    runs: list[Iterable[Article]] = []
+    chunk: list[Article] = []
+    total = 0
+    for item in items:
+        chunk.append(item)
+        total += 1
+        if len(chunk) >= budget:
+            chunk.sort(key=sort_key, reverse=True)
+            run = spill_dir / f"run-{len(runs):05d}.jsonl"
+            with run.open("wb") as f:
+                for a in chunk:
+                    f.write(json_codec.dumps(a.to_dict(), indent=None, ensure_ascii=False))
+                    f.write(b"\n")
+            runs.append(_spilled(run))
+            chunk = []
+    chunk.sort(key=sort_key, reverse=True)
+    runs.append(chunk)
+    return runs, total
+
+
+def merge_runs(runs: list[Iterable[Article]]) -> Iterator[Article]:
+    """k-way merge of sorted runs; on equal timestamps earlier runs come first."""
+    return heapq.merge(*runs, key=sort_key, reverse=True)
+
+
+def write_stream(path: str | os.PathLike, items: Iterable[Article]) -> int:
+    """Atomically write *items* as write_articles(indent=2, ensure_ascii=False) would."""
+    written = 0
+    with atomic_open(path, "wb") as out:
+        out.write(b"[")
+        for item in items:
+            out.write(b",\n  " if written else b"\n  ")
+            out.write(_encode(item))
+            written += 1
+        out.write(b"\n]" if written else b"]")
+    return written
+
+
+@contextmanager
+def spill_dir() -> Iterator[Path]:
+    """Temporary directory for spilled runs (next to the archives' caches)."""
+    ORDER_DIR.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix="spill-", dir=ORDER_DIR) as tmp:
+        yield Path(tmp)
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+archive_reader.py – Random access into large JSON-array archives.
+
+all_news.json and the quarterly news_YYYY_Qn.json files are one big JSON
+array of article objects. Loading them with json.load() materialises every
+article as a dict. `ArchiveReader` instead memory-maps the file and keeps a
+sidecar offset index (record → byte range, url → record, day → records) in
+data/.cache/, so a caller can pull one article or one day's articles and
+only those records are decoded (as `Article` records). The sidecar is named
+after the archive and a hash of its resolved path, so two archives with the
+same file name (e.g. a copy in a temp dir) keep separate indexes.
+
+The index is rebuilt automatically whenever the archive's content changes
+(size + sha1, durable_io.content_stamp – a fresh checkout does not count) (i.e. after merge_news / tag_platforms rewrote it).
+
+    with ArchiveReader("data/all_news.json") as archive:
+        archive.day("2025-06-21")            # list of Article records
+        archive.get("https://…")             # one article by url
+        for art in archive: …                # lazy full scan
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import os
+import re
+from pathlib import Path
+from typing import Iterator
+
+import json_codec
+from article import Article
+from durable_io import atomic_write_json, content_stamp
+
+# ───────────────────────── paths ─────────────────────────
+REPO_ROOT = Path(__file__).resolve().parent.parent
+INDEX_DIR = REPO_ROOT / "data" / ".cache"
+
+INDEX_VERSION = 1
+
+# complete JSON strings (so braces inside text are skipped) and braces
+_STRUCT_RX = re.compile(rb'"(?:[^"\\]|\\.)*"|[{}]', re.S)
+
+
+def iter_offsets(buf) -> Iterator[tuple[int, int]]:
+    """Byte ranges of the top-level objects of a JSON array, scanned lazily."""
+    depth, start = 0, 0
+    for m in _STRUCT_RX.finditer(buf):
+        tok = m.group()
+        if tok == b"{":
+            if depth == 0:
+                start = m.start()
+            depth += 1
+        elif tok == b"}":
+            depth -= 1
+            if depth == 0:
+                yield start, m.end()
+
+
+def scan_offsets(buf) -> list[tuple[int, int]]:
+    """Byte ranges of the top-level objects of a JSON array."""
+    return list(iter_offsets(buf))
+
+
+class ArchiveReader:
+    def __init__(self, path: str | os.PathLike, index_dir: Path = INDEX_DIR):
+        self.path       = Path(path)
+        where = hashlib.sha1(str(self.path.resolve()).encode("utf-8")).hexdigest()[:12]
+        self.index_path = Path(index_dir) / f"{self.path.name}.{where}.idx.json"
+        self._file = self.path.open("rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._mm   = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self._load_index()
+
+    # ── index ─────────────────────────────────────────────
+    def _stamp(self) -> dict:
+        return {"version": INDEX_VERSION, **content_stamp(self.path)}
+
+    def _load_index(self) -> None:
+        stamp = self._stamp()
+        try:
+            idx = json_codec.load_file(self.index_path)
+        except (FileNotFoundError, json.JSONDecodeError):
+            idx = {}
+        if idx.get("stamp") != stamp:
+            idx = self._build_index(stamp)
+        self._starts: list[int] = idx["starts"]
+        self._ends:   list[int] = idx["ends"]
+        self._keys:   dict[str, int]       = {k: i for i, k in enumerate(idx["keys"]) if k is not None}
+        self._days:   dict[str, list[int]] = idx["days"]
+
+    def _build_index(self, stamp: dict) -> dict:
+        starts, ends, keys, days = [], [], [], {}
+        for i, (s, e) in enumerate(scan_offsets(self._mm)):
+            art = Article.from_dict(json_codec.loads(self._mm[s:e]))
+            starts.append(s)
+            ends.append(e)
+            keys.append(art.url or art.title or None)
+            day = art.day
+            if day:
+                days.setdefault(day, []).append(i)
+        idx = {"stamp": stamp, "starts": starts, "ends": ends, "keys": keys, "days": days}
+        try:
+            atomic_write_json(self.index_path, idx, indent=None)
+        except OSError:
+            pass  # read-only checkout – keep the in-memory index
+        return idx
+
+    # ── access ────────────────────────────────────────────
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def __getitem__(self, i: int) -> Article:
+        return Article.from_dict(json_codec.loads(self._mm[self._starts[i]:self._ends[i]]))
+
+    def __iter__(self) -> Iterator[Article]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def get(self, key: str) -> Article | None:
+        i = self._keys.get(key)
+        return None if i is None else self[i]
+
+    def days(self) -> list[str]:
+        return sorted(self._days)
+
+    def day(self, day: str) -> list[Article]:
+        return [self[i] for i in self._days.get(day, [])]
+
+    def day_range(self, first: str, last: str) -> Iterator[Article]:
+        """Articles published between *first* and *last* (inclusive, YYYY-MM-DD)."""
+        for d in self.days():
+            if first <= d <= last:
+                yield from self.day(d)
+
+    # ── lifecycle ─────────────────────────────────────────
+    def close(self) -> None:
+        if isinstance(self._mm, mmap.mmap):
+            self._mm.close()
+        self._file.close()
+
+    def __enter__(self) -> "ArchiveReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+article.py – The one record type every pipeline stage passes around.
+
+Fetchers used to build ad-hoc dicts and every later stage re-probed them
+with .get() and fallbacks (headline/text/published). `Article` is a slotted
+dataclass with
+    • interned `source` strings (a few dozen distinct values per day)
+    • `published_ts` – published_at parsed once into a UNIX timestamp int
+    • tuple-valued entity / keyword lists
+    • `lang` – detected once at ingest (see language.py)
+plus codecs to and from the on-disk JSON layout, which is unchanged:
+unknown keys are carried in `extra` and written back as they were.
+
+    python scripts/article.py --bench data/news_*.json
+"""
+from __future__ import annotations
+
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, Iterable
+
+import json_codec
+from durable_io import atomic_write_json
+
+# keys with a dedicated slot; everything else goes to `extra`
+_FIELDS = ("source", "url", "title", "published_at", "content", "platforms_mentioned", "keywords", "lang")
+
+
+def parse_timestamp(value: str) -> int | None:
+    """UNIX time of an RFC 2822 or ISO-8601 timestamp (naive ⇒ UTC)."""
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        if value[:1].isdigit():                      # ISO is the common, cheap case
+            dt = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+        else:
+            dt = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+
+@dataclass(slots=True)
+class Article:
+    source:       str
+    url:          str
+    title:        str
+    published_at: str = ""
+    content:      str = ""
+    platforms_mentioned: tuple[str, ...] = ()
+    keywords:     tuple[str, ...] | None = None      # None ⇒ not extracted yet
+    lang:         str | None = None                  # None ⇒ not detected yet
+    published_ts: int | None = None
+    extra:        dict[str, Any] | None = None
+
+    def __post_init__(self):
+        self.source = sys.intern(self.source or "")
+        self.platforms_mentioned = tuple(self.platforms_mentioned or ())
+        if self.keywords is not None:
+            self.keywords = tuple(self.keywords)
+        if self.published_ts is None:
+            self.published_ts = parse_timestamp(self.published_at)
+
+    @property
+    def day(self) -> str | None:
+        """UTC publish day as YYYY-MM-DD."""
+        if self.published_ts is None:
+            return None
+        return datetime.fromtimestamp(self.published_ts, tz=timezone.utc).date().isoformat()
+
+    @property
+    def text(self) -> str:
+        return f"{self.title} {self.content}"
+
+    # ── codecs ────────────────────────────────────────────
+    @classmethod
+    def from_dict(cls, d: dict[str, Any]) -> "Article":
+        extra = {k: v for k, v in d.items() if k not in _FIELDS}
+        return cls(
+            source       = d.get("source") or "",
+            url          = d.get("url") or d.get("link") or "",
+            title        = (d.get("title") or d.get("headline") or "").strip(),
+            published_at = d.get("published_at") or d.get("published") or "",
+            content      = (d.get("content") or d.get("text") or "").strip(),
+            platforms_mentioned = d.get("platforms_mentioned") or (),
+            keywords     = d.get("keywords"),
+            lang         = d.get("lang"),
+            extra        = extra or None,
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        d = {
+            "source":       self.source,
+            "url":          self.url,
+            "title":        self.title,
+            "published_at": self.published_at,
+            "content":      self.content,
+            "platforms_mentioned": list(self.platforms_mentioned),
+        }
+        if self.keywords is not None:
+            d["keywords"] = list(self.keywords)
+        if self.lang is not None:
+            d["lang"] = self.lang
+        if self.extra:
+            d.update(self.extra)
+        return d
+
+
+def read_articles(path: str | Path) -> list[Article]:
+    """Load a JSON array of article objects (non-objects are skipped)."""
+    raw = json_codec.load_file(path)
+    return [Article.from_dict(d) for d in raw if isinstance(d, dict)]
+
+
+def write_articles(path: str | Path, articles: Iterable[Article],
+                   indent: int | None = 2, ensure_ascii: bool = False) -> None:
+    """Atomically write *articles* in the standard JSON layout."""
+    atomic_write_json(path, [a.to_dict() for a in articles], indent=indent, ensure_ascii=ensure_ascii)
+
+
+# ───────────────────────── benchmark ─────────────────────
+def _held(build) -> tuple[Any, int]:
+    """*build()* and the bytes it still holds once it has returned."""
+    tracemalloc.start()
+    obj = build()
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return obj, held
+
+
+def _rate(fn, n: int, repeat: int = 3) -> float:
+    t0 = time.process_time()
+    for _ in range(repeat):
+        fn()
+    return n * repeat / (time.process_time() - t0)
+
+
+def bench(paths: list[str]) -> None:
+    """Memory held and throughput of the raw dicts vs. Article records."""
+    def load() -> list[dict]:
+        return [d for p in paths for d in json_codec.load_file(p) if isinstance(d, dict)]
+
+    raw, raw_bytes = _held(load)
+    if not raw:
+        sys.exit("no article records to benchmark")
+    articles, art_bytes = _held(lambda: [Article.from_dict(d) for d in load()])
+    n = len(raw)
+
+    def dict_ts(d: dict) -> int:
+        return parse_timestamp(d.get("published_at") or d.get("published") or "") or 0
+
+    print(f"{n} records from {len(paths)} file(s)")
+    print(f"{'':<10}{'held KiB':>10}{'B/record':>10}{'sort by time/s':>16}")
+    print(f"{'dict':<10}{raw_bytes / 1024:10.0f}{raw_bytes / n:10.0f}"
+          f"{_rate(lambda: sorted(raw, key=dict_ts), n):16.0f}")
+    print(f"{'Article':<10}{art_bytes / 1024:10.0f}{art_bytes / n:10.0f}"
+          f"{_rate(lambda: sorted(articles, key=lambda a: a.published_ts or 0), n):16.0f}")
+    same = sum(a.to_dict() == d for a, d in zip(articles, raw))
+    print(f"from_dict {_rate(lambda: [Article.from_dict(d) for d in raw], n):10.0f} records/s")
+    print(f"to_dict   {_rate(lambda: [a.to_dict() for a in articles], n):10.0f} records/s"
+          f"  ({same}/{n} written back unchanged)")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args[:1] != ["--bench"] or len(args) < 2:
+        sys.exit("usage: python scripts/article.py --bench FILE.json [FILE.json …]")
+    bench(args[1:])
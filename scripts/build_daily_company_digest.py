@@ -9,6 +9,11 @@ Changes vs. the original version
 ▸ Derives each article’s day from its `published_at` timestamp instead of
   the file name.
 ▸ Everything else (filtering logic, output format) is unchanged.
+▸ Served from the mention index (mention_index.py) instead of rescanning
+  every archive on each run.
+▸ Articles whose `published_at` has no YYYY-MM-DD (RFC 2822 dates such as
+  "Sat, 21 Jun 2025 10:00:00 +0000") are no longer dropped: their day is
+  taken from the parsed timestamp (UTC).
 
 Output example for a day with hits
 {
@@ -25,61 +30,29 @@ and for a day without hits
 """
 
 from pathlib import Path
-import json
-import re
-from collections import defaultdict
-from datetime import date, datetime
+
+from durable_io import atomic_write_json
+from mention_index import load_index, quarterly_files
 
 # ───────────────────────── paths ─────────────────────────
 REPO_ROOT = Path(__file__).resolve().parent.parent
 DATA_DIR  = REPO_ROOT / "data"
 
 # take only quarterly files, e.g.  news_2025_Q2.json
-NEWS_FILES = sorted(DATA_DIR.glob("news_*_Q*.json"))
+NEWS_FILES = quarterly_files(DATA_DIR)
 
 OUTFILE = DATA_DIR / "news_filtered_for_companies_of_interest.json"
 
-# recognise YYYY-MM-DD inside published_at
-DATE_RX = re.compile(r"\d{4}-\d{2}-\d{2}")
-
-# ───────────────────────── helpers ───────────────────────
-def extract_day(ts: str) -> str | None:
-    """
-    Return YYYY-MM-DD from a timestamp string.
-    Accepts variants like '2025-04-28 16:55:44' or '2025-04-28'.
-    """
-    if not ts:
-        return None
-    m = DATE_RX.search(ts)
-    if m:
-        return m.group(0)
-    # fall back to dateutil parsing (isoformat, etc.)
-    try:
-        return str(datetime.fromisoformat(ts).date())
-    except Exception:
-        return None
-
 # ───────────────────────── pass 1: gather dates & matches ────────────
-all_days: set[str]          = set()
-hits:     dict[str, list]   = defaultdict(list)   # day → list[article]
+# served from the mention index (see mention_index.py); only archives that
+# changed since the last run are rescanned
+index = load_index(NEWS_FILES)
 
-for jf in NEWS_FILES:
-    with jf.open(encoding="utf-8") as f:
-        articles = json.load(f)
-
-    for art in articles:
-        day = extract_day(art.get("published_at", ""))
-        if not day:
-            continue
-        all_days.add(day)
-
-        plats = art.get("platforms_mentioned", [])
-        if plats:                                   # keep only relevant stories
-            hits[day].append({
-                "title": art.get("title", "").strip(),
-                "url":   art.get("url"),            # may be None / missing
-                "platforms_mentioned": plats
-            })
+all_days: list[str]         = index.days()
+hits:     dict[str, list]   = {
+    day: [{"title": d["title"], "url": d["url"], "platforms_mentioned": d["platforms_mentioned"]} for d in docs]
+    for day, docs in index.hits_by_day().items()
+}
 
 # ───────────────────────── build digest object ───────────────────────
 digest: dict[str, dict] = {}
@@ -91,8 +64,7 @@ for day in sorted(all_days):
     )
 
 # ───────────────────────── write file ────────────────────────────────
-with OUTFILE.open("w", encoding="utf-8") as f:
-    json.dump(digest, f, ensure_ascii=False, indent=2)
+atomic_write_json(OUTFILE, digest, indent=2, ensure_ascii=False)
 
 print(
     f"✅ Digest created from {len(NEWS_FILES)} quarterly file(s) "
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+check_api_client.py – api_client.ApiClient against a local mock API.
+
+A NewsAPI-shaped endpoint (http.server, random port) serves a fixed list of
+articles page by page and can be told to answer the next requests with
+429 / 5xx first. The checks cover
+
+    • pagination ending – short last page, or page × size reaching the total
+    • the early stop at the first page that overlaps already stored URLs
+    • 429 / 5xx retries, waiting Retry-After or 2^attempt seconds, and a
+      long Retry-After blocking the key
+    • the quota ledger refusing calls once the daily budget is used up
+
+No network access and no API key are needed; the ledger lives in a temp dir.
+
+    python scripts/check_api_client.py
+"""
+from __future__ import annotations
+
+import json
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+import api_client
+from api_client import NEWSAPI, ApiClient, QuotaExhausted, QuotaLedger
+
+SPEC = replace(NEWSAPI, page_size=3, daily_limit=50)     # small pages, so a few items span several
+
+
+def _items(n: int) -> list[dict]:
+    """*n* NewsAPI articles, newest first."""
+    return [{"source": {"name": "Mock"}, "url": f"https://mock.test/{i}", "title": f"Article {i}",
+             "publishedAt": f"2025-06-21T{23 - i % 24:02d}:00:00Z", "content": f"Body {i}"}
+            for i in range(n)]
+
+
+# ───────────────────────── mock server ───────────────────
+class MockApi:
+    """
+    Serves *items* in pages of ?pageSize; each entry of *failures*
+    (status, Retry-After or None) answers one request before that.
+    """
+
+    def __init__(self, items: list[dict], failures: list[tuple[int, str | None]] = ()):
+        self.items    = items
+        self.failures = list(failures)
+        self.requests: list[dict] = []
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                params = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+                mock.requests.append(params)
+                if mock.failures:
+                    status, retry_after = mock.failures.pop(0)
+                    self.send_response(status)
+                    if retry_after is not None:
+                        self.send_header("Retry-After", retry_after)
+                    body = b'{"status": "error"}'
+                else:
+                    size, page = int(params["pageSize"]), int(params["page"])
+                    self.send_response(200)
+                    body = json.dumps({"status": "ok", "totalResults": len(mock.items),
+                                       "articles": mock.items[(page - 1) * size:page * size]}).encode()
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url    = f"http://127.0.0.1:{self.server.server_port}/v2/everything"
+
+    def __enter__(self) -> MockApi:
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _client(mock: MockApi, tmp: Path, spec=SPEC) -> ApiClient:
+    return ApiClient(spec, "test-key", QuotaLedger(tmp / "api_quota.json"), url=mock.url)
+
+
+# ───────────────────────── checks ────────────────────────
+def check_pagination(tmp: Path) -> None:
+    with MockApi(_items(7)) as mock:                 # 3 + 3 + 1: the short page ends it
+        found = [a["url"] for a in _client(mock, tmp).fetch_new({"q": "x"})]
+        assert found == [a["url"] for a in mock.items], found
+        assert [r["page"] for r in mock.requests] == ["1", "2", "3"], mock.requests
+        assert all(r["apiKey"] == "test-key" and r["pageSize"] == "3" for r in mock.requests)
+
+    with MockApi(_items(6)) as mock:                 # 3 + 3: page × size reaches the total
+        assert len(_client(mock, tmp).fetch_new({"q": "x"})) == 6
+        assert len(mock.requests) == 2, mock.requests
+
+
+def check_overlap(tmp: Path) -> None:
+    with MockApi(_items(12)) as mock:                # article 4 (page 2) is stored already
+        found = [a["url"] for a in _client(mock, tmp).fetch_new({"q": "x"}, known_urls={"https://mock.test/4"})]
+        assert found == [f"https://mock.test/{i}" for i in (0, 1, 2, 3, 5)], found
+        assert len(mock.requests) == 2, mock.requests
+
+
+def check_retry(tmp: Path) -> None:
+    waits: list[float] = []
+    api_client.time = SimpleNamespace(time=time.time, sleep=waits.append)
+    try:
+        # 429 with Retry-After, then a 503 without: waits 1 s, then 2^1 s
+        with MockApi(_items(2), failures=[(429, "1"), (503, None)]) as mock:
+            client = _client(mock, tmp)
+            assert len(client.get({"q": "x", "pageSize": 3, "page": 1})["articles"]) == 2
+            assert waits == [1.0, 2.0], waits
+            assert len(mock.requests) == 3
+            assert client.ledger.remaining(client.key_id, SPEC.daily_limit) == SPEC.daily_limit - 3
+
+        # a 5xx that persists gives up after MAX_RETRIES retries
+        waits.clear()
+        with MockApi(_items(2), failures=[(500, None)] * 10) as mock:
+            try:
+                _client(mock, tmp).get({"q": "x", "pageSize": 3, "page": 1})
+                raise AssertionError("persistent 500 did not raise")
+            except requests.HTTPError:
+                pass
+            assert len(mock.requests) == api_client.MAX_RETRIES + 1, mock.requests
+            assert waits == [2.0 ** a for a in range(api_client.MAX_RETRIES)], waits
+
+        # a Retry-After longer than MAX_BACKOFF_S blocks the key instead of waiting
+        waits.clear()
+        with MockApi(_items(2), failures=[(429, "3600")]) as mock:
+            client = _client(mock, tmp)
+            assert client.fetch_new({"q": "x"}) == []
+            assert waits == [] and len(mock.requests) == 1
+            assert QuotaLedger(tmp / "api_quota.json").state[client.key_id]["blocked_until"] > time.time() + 3000
+            try:
+                client.get({"q": "x", "pageSize": 3, "page": 1})
+                raise AssertionError("blocked key was not refused")
+            except QuotaExhausted:
+                pass
+            assert len(mock.requests) == 1              # refused without a request
+    finally:
+        api_client.time = time
+
+
+def check_quota(tmp: Path) -> None:
+    spec = replace(SPEC, daily_limit=2)
+    with MockApi(_items(12)) as mock:
+        client = _client(mock, tmp, spec)
+        found  = client.fetch_new({"q": "x"})
+        assert len(found) == 6 and len(mock.requests) == 2, (len(found), mock.requests)
+        assert client.ledger.remaining(client.key_id, spec.daily_limit) == 0
+
+        # the spent budget is persisted: a new run with the same ledger file is refused too
+        assert _client(mock, tmp, spec).fetch_new({"q": "x"}) == []
+        assert len(mock.requests) == 2, mock.requests
+
+
+CHECKS = [check_pagination, check_overlap, check_retry, check_quota]
+
+
+def main() -> None:
+    failed = 0
+    for check in CHECKS:
+        with tempfile.TemporaryDirectory() as tmp:
+            try:
+                check(Path(tmp))
+            except AssertionError as exc:
+                failed += 1
+                print(f"✋  {check.__name__}: {exc!r}")
+            else:
+                print(f"✅  {check.__name__}")
+    if failed:
+        sys.exit(f"{failed} of {len(CHECKS)} check(s) failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+check_html_extract.py – html_extract against the BeautifulSoup code it replaced.
+
+Every page in scripts/fixtures/crunchbase/ is run through the lxml extractor
+and the previous BeautifulSoup version (html_extract._soup_*), and the
+results must be equal:
+
+    section_*.html   section_teasers()    vs. h2 / find_next_sibling("p")
+    article_*.html   find_news_article()  vs. find_all("script", type=ld+json)
+
+The fixtures are trimmed copies of the Crunchbase News markup (WordPress
+theme) with the awkward cases added on purpose: <h2>s without a link or
+without a following <p>, two teasers sharing one <p>, nested markup and
+entities, JSON-LD as a list, invalid JSON-LD, a NewsArticle past the first
+parse chunk, and a page without one. EXPECTED pins what each page must give,
+so a fixture both parsers misread cannot pass either.
+
+    python scripts/check_html_extract.py
+"""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+from html_extract import _soup_news_article, _soup_teasers, find_news_article, section_teasers
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures" / "crunchbase"
+
+# section page → number of teasers; article page → NewsArticle headline (None: no NewsArticle)
+EXPECTED: dict[str, int | str | None] = {
+    "section_fintech-ecommerce.html": 6,
+    "section_seed.html":              3,
+    "article_newsarticle.html":       "Embedded Lending Startup Raises $40M Series B",
+    "article_ld_list.html":           "P2P Platforms Brace For New EU Crowdfunding Rules",
+    "article_late_ld.html":           "BNPL Funding Slows In Q2",
+    "article_no_newsarticle.html":    None,
+}
+
+
+def check(path: Path) -> str | None:
+    """None if *path* extracts as before and as expected, else what differs."""
+    html = path.read_text("utf-8")
+    if path.name.startswith("section_"):
+        new, old = section_teasers(html), _soup_teasers(html)
+        got = len(new)
+    else:
+        new, old = find_news_article(html), _soup_news_article(html)
+        got = new and new.get("headline")
+    if new != old:
+        return f"lxml {new!r}\n   bs4  {old!r}"
+    if got != EXPECTED[path.name]:
+        return f"expected {EXPECTED[path.name]!r}, got {got!r}"
+    return None
+
+
+def main() -> None:
+    pages = sorted(FIXTURES.glob("*.html"))
+    missing = set(EXPECTED) - {p.name for p in pages}
+    unlisted = {p.name for p in pages} - set(EXPECTED)
+    if missing or unlisted:
+        sys.exit(f"✋  fixtures out of sync with EXPECTED: missing {sorted(missing)}, unlisted {sorted(unlisted)}")
+
+    failed = 0
+    for path in pages:
+        problem = check(path)
+        if problem:
+            failed += 1
+            print(f"✋  {path.name}: {problem}")
+        else:
+            print(f"✅  {path.name}")
+    if failed:
+        sys.exit(f"{failed} of {len(pages)} page(s) differ")
+
+
+if __name__ == "__main__":
+    main()
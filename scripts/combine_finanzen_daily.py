@@ -9,12 +9,16 @@ longer empty.
 from __future__ import annotations
 
 import json
+import sys
 from datetime import date, timedelta
 from pathlib import Path
-from typing import Any, Iterable
+from typing import Iterable
 
+from article import Article, read_articles, write_articles
+from durable_io import file_lock
 
-def unique_key(item: dict[str, Any]) -> str | None:
+
+def unique_key(item: Article) -> str | None:
     """Return a stable key to identify one news item.
 
     Priority order:
@@ -23,50 +27,58 @@ def unique_key(item: dict[str, Any]) -> str | None:
     3. ``title`` – best‑effort fallback (rarely duplicates exactly).
     """
 
-    return item.get("id") or item.get("url") or item.get("title")
+    return (item.extra or {}).get("id") or item.url or item.title or None
 
 
-def iter_items(files: Iterable[Path]) -> list[dict[str, Any]]:
-    """Yield all JSON objects from *files*, skipping invalid JSON gracefully."""
+def iter_items(files: Iterable[Path]) -> list[Article]:
+    """Return all articles from *files*, skipping invalid JSON gracefully."""
 
-    aggregated: list[dict[str, Any]] = []
+    aggregated: list[Article] = []
     for fp in files:
         try:
-            aggregated.extend(json.loads(fp.read_text("utf-8")))
+            aggregated.extend(read_articles(fp))
         except json.JSONDecodeError as exc:
             print(f"⚠️  Skipping {fp.name} – invalid JSON: {exc}")
     return aggregated
 
 
-def main() -> None:
-    # ── CONFIG ────────────────────────────────────────────────────────────
-    data_dir = Path(__file__).resolve().parents[1] / "data"
-    data_dir.mkdir(exist_ok=True)
-    # combine *yesterday's* hourly files so today's crawler can keep running
-    yesterday = (date.today() - timedelta(days=1)).isoformat()  # e.g. "2025-06-17"
-    # ───────────────────────────────────────────────────────────────────────
+def combine_day(data_dir: Path, day: str) -> tuple[list[Path], int]:
+    """Fold the hourly finanzen_<day>_HHMM.json parts into finanzen_<day>.json.
+
+    Entries already in the daily file are kept ahead of the parts, so folding
+    late parts into an existing daily file never drops anything; a daily file
+    that cannot be decoded aborts the run instead of being replaced by the
+    parts alone. The parts are deleted afterwards. Returns the parts folded
+    and the entries written.
+    """
 
-    parts = sorted(data_dir.glob(f"finanzen_{yesterday}_*.json"))
+    parts = sorted(data_dir.glob(f"finanzen_{day}_*.json"))
     if not parts:
-        print(f"No finanzen parts found for {yesterday} – nothing to combine.")
-        return
-
-    # 1) read and de‑duplicate
-    seen: set[str] = set()
-    unique_items: list[dict[str, Any]] = []
-
-    for item in iter_items(parts):
-        key = unique_key(item)
-        if key is None:  # keep, but cannot dedupe reliably
-            unique_items.append(item)
-            continue
-        if key not in seen:
-            seen.add(key)
-            unique_items.append(item)
-
-    # 2) write out the daily aggregate
-    outfile = data_dir / f"finanzen_{yesterday}.json"
-    outfile.write_text(json.dumps(unique_items, ensure_ascii=False, indent=2), "utf-8")
+        return [], 0
+
+    outfile = data_dir / f"finanzen_{day}.json"
+    with file_lock(outfile):
+        try:
+            existing = read_articles(outfile) if outfile.exists() else []
+        except json.JSONDecodeError as exc:
+            sys.exit(f"Error: '{outfile}' exists but could not be decoded ({exc}); "
+                     f"refusing to overwrite it – the hourly parts are kept.")
+
+        # 1) read and de‑duplicate
+        seen: set[str] = set()
+        unique_items: list[Article] = []
+
+        for item in existing + iter_items(parts):
+            key = unique_key(item)
+            if key is None:  # keep, but cannot dedupe reliably
+                unique_items.append(item)
+                continue
+            if key not in seen:
+                seen.add(key)
+                unique_items.append(item)
+
+        # 2) write out the daily aggregate
+        write_articles(outfile, unique_items, indent=2, ensure_ascii=False)
     print(f"✅ Saved {len(unique_items)} unique entries to {outfile.name}")
 
     # 3) delete the individual hourly parts
@@ -76,6 +88,20 @@ def main() -> None:
             print(f"🗑️  Deleted {fp.name}")
         except Exception as exc:
             print(f"⚠️  Failed to delete {fp.name}: {exc}")
+    return parts, len(unique_items)
+
+
+def main() -> None:
+    # ── CONFIG ────────────────────────────────────────────────────────────
+    data_dir = Path(__file__).resolve().parents[1] / "data"
+    data_dir.mkdir(exist_ok=True)
+    # combine *yesterday's* hourly files so today's crawler can keep running
+    yesterday = (date.today() - timedelta(days=1)).isoformat()  # e.g. "2025-06-17"
+    # ───────────────────────────────────────────────────────────────────────
+
+    parts, _ = combine_day(data_dir, yesterday)
+    if not parts:
+        print(f"No finanzen parts found for {yesterday} – nothing to combine.")
 
 
 if __name__ == "__main__":
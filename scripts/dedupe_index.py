@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+dedupe_index.py – Persistent, memory-compact "have we stored this key?" index.
+
+merge_news.py used to rebuild a Python set of every url in all_news.json (and
+again for the quarter file) on each run – hundreds of MB of strings once the
+history reaches millions of articles. A `DedupeIndex` per archive keeps
+
+    • a scalable Bloom filter   data/.cache/dedupe/<archive>.bloom
+      (2–4 bytes per key at ≤ 0.1 % false positives; slices double in size
+      as the archive grows, so no capacity has to be guessed up front)
+    • an exact on-disk index    data/.cache/dedupe/<archive>.sqlite
+      (16-byte blake2b digest per key, B-tree lookups)
+
+A key the filter has never seen is definitely new and costs no disk access;
+only probable hits are confirmed against the exact index.
+
+Both files are stamped with the archive's content (size + sha1, see
+durable_io.content_stamp) when saved. If the
+archive changed behind the index's back (cleanup, replay, a fresh checkout),
+`current` is False and the caller rebuilds it from the archive. A rewrite
+that keeps every key (tag_platforms only fills in platforms_mentioned)
+carries a current index over with `restamp()`.
+
+    with DedupeIndex("data/all_news.json") as index:
+        if not index.current:
+            index.reset()
+            ...                                     # re-add the archive's keys
+        is_new = index.add_many(keys)               # one bool per key
+        ...                                         # write the archive
+        index.save()
+
+    python scripts/dedupe_index.py --bench 10000000
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Iterable
+
+from durable_io import atomic_open, content_stamp
+
+# ───────────────────────── paths & tuning ────────────────
+REPO_ROOT = Path(__file__).resolve().parent.parent
+INDEX_DIR = REPO_ROOT / "data" / ".cache" / "dedupe"
+
+INITIAL_CAPACITY = 1 << 20      # keys in the first filter slice
+ERROR_RATE       = 0.001        # false-positive rate of the whole filter
+GROWTH           = 2            # each new slice holds GROWTH × more keys …
+TIGHTENING       = 0.5          # … at TIGHTENING × the previous error rate
+
+SQL_CHUNK = 500                 # digests per "IN (…)" lookup
+
+_MAGIC = b"BLOOM1\n"
+
+
+def digest(key: str) -> bytes:
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+
+
+# ───────────────────────── Bloom filter ──────────────────
+class _Slice:
+    __slots__ = ("capacity", "count", "k", "m", "bits")
+
+    def __init__(self, capacity: int, error: float, count: int = 0, bits: bytearray | None = None):
+        self.capacity = capacity
+        self.count    = count
+        self.m        = math.ceil(-capacity * math.log(error) / math.log(2) ** 2)
+        self.k        = max(1, math.ceil(-math.log2(error)))
+        self.bits     = bits if bits is not None else bytearray((self.m + 7) // 8)
+
+    def _positions(self, d: bytes):
+        # double hashing: h1 + i·h2 over the two halves of the 128-bit digest
+        h1 = int.from_bytes(d[:8], "little")
+        h2 = int.from_bytes(d[8:], "little") | 1
+        m  = self.m
+        return [(h1 + i * h2) % m for i in range(self.k)]
+
+    def __contains__(self, d: bytes) -> bool:
+        bits = self.bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(d))
+
+    def add(self, d: bytes) -> None:
+        bits = self.bits
+        for p in self._positions(d):
+            bits[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+
+class ScalableBloom:
+    """Bloom filter that adds a larger, stricter slice whenever the last one is full."""
+
+    def __init__(self, capacity: int = INITIAL_CAPACITY, error: float = ERROR_RATE):
+        self.capacity = capacity
+        self.error    = error
+        self.slices: list[_Slice] = []
+
+    def _slice_error(self, i: int) -> float:
+        # geometric series: Σ error·(1 - r)·rⁱ ≤ error
+        return self.error * (1 - TIGHTENING) * TIGHTENING ** i
+
+    def __contains__(self, d: bytes) -> bool:
+        return any(d in s for s in reversed(self.slices))
+
+    def add(self, d: bytes) -> None:
+        if not self.slices or self.slices[-1].count >= self.slices[-1].capacity:
+            i = len(self.slices)
+            self.slices.append(_Slice(self.capacity * GROWTH ** i, self._slice_error(i)))
+        self.slices[-1].add(d)
+
+    def __len__(self) -> int:
+        return sum(s.count for s in self.slices)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(len(s.bits) for s in self.slices)
+
+    # ── persistence: magic, one JSON header line, raw slice bits ──
+    def dump(self, path: Path, stamp: dict) -> None:
+        header = {"capacity": self.capacity, "error": self.error, "stamp": stamp,
+                  "slices": [s.count for s in self.slices]}
+        with atomic_open(path, "wb") as f:
+            f.write(_MAGIC)
+            f.write(json.dumps(header).encode("utf-8") + b"\n")
+            for s in self.slices:
+                f.write(s.bits)
+
+    @classmethod
+    def load(cls, path: Path) -> tuple[ScalableBloom, dict]:
+        """Return (filter, stamp); raises ValueError on a foreign or truncated file."""
+        with open(path, "rb") as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(f"{path} is not a Bloom filter file")
+            header = json.loads(f.readline())
+            bloom  = cls(header["capacity"], header["error"])
+            for i, count in enumerate(header["slices"]):
+                s = _Slice(bloom.capacity * GROWTH ** i, bloom._slice_error(i), count)
+                s.bits = bytearray(f.read(len(s.bits)))
+                if len(s.bits) != (s.m + 7) // 8:
+                    raise ValueError(f"{path} is truncated")
+                bloom.slices.append(s)
+        return bloom, header["stamp"]
+
+
+# ───────────────────────── index ─────────────────────────
+class DedupeIndex:
+    """Bloom filter in front of an exact SQLite key index for one archive file."""
+
+    def __init__(self, archive: str | os.PathLike, index_dir: Path = INDEX_DIR):
+        self.archive    = Path(archive)
+        index_dir.mkdir(parents=True, exist_ok=True)
+        self.bloom_path = index_dir / f"{self.archive.stem}.bloom"
+        self.db         = sqlite3.connect(index_dir / f"{self.archive.stem}.sqlite")
+        self.db.execute("CREATE TABLE IF NOT EXISTS keys (digest BLOB PRIMARY KEY) WITHOUT ROWID")
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (k TEXT PRIMARY KEY, v TEXT)")
+        self.probable_hits = self.false_positives = 0
+
+        row = self.db.execute("SELECT v FROM meta WHERE k = 'stamp'").fetchone()
+        try:
+            self.bloom, bloom_stamp = ScalableBloom.load(self.bloom_path)
+        except (FileNotFoundError, ValueError, KeyError, json.JSONDecodeError):
+            self.bloom, bloom_stamp = ScalableBloom(), None
+        stamp = content_stamp(self.archive)
+        self.current = row is not None and json.loads(row[0]) == stamp == bloom_stamp
+
+    def reset(self) -> None:
+        """Forget every key (before re-adding an archive that changed)."""
+        self.db.execute("DELETE FROM keys")
+        self.bloom   = ScalableBloom()
+        self.current = True
+
+    def _stored(self, digests: list[bytes]) -> set[bytes]:
+        found: set[bytes] = set()
+        for i in range(0, len(digests), SQL_CHUNK):
+            chunk = digests[i:i + SQL_CHUNK]
+            found.update(d for (d,) in self.db.execute(
+                f"SELECT digest FROM keys WHERE digest IN ({','.join('?' * len(chunk))})", chunk))
+        return found
+
+    def add_many(self, keys: Iterable[str]) -> list[bool]:
+        """
+        Add *keys* in order; True for each key that was not stored before (a
+        key repeated within *keys* is new only the first time).
+        """
+        digests  = [digest(k) for k in keys]
+        probable = [d for d in digests if d in self.bloom]
+        stored   = self._stored(probable) if probable else set()
+        self.probable_hits   += len(probable)
+        self.false_positives += len(probable) - sum(d in stored for d in probable)
+
+        is_new: list[bool] = []
+        added:  list[bytes] = []
+        for d in digests:
+            if d in stored:
+                is_new.append(False)
+                continue
+            stored.add(d)                          # later repeats in this batch are duplicates
+            self.bloom.add(d)
+            added.append(d)
+            is_new.append(True)
+        self.db.executemany("INSERT OR IGNORE INTO keys VALUES (?)", ((d,) for d in added))
+        return is_new
+
+    def __contains__(self, key: str) -> bool:
+        d = digest(key)
+        if d not in self.bloom:
+            return False
+        self.probable_hits += 1
+        found = bool(self._stored([d]))
+        self.false_positives += not found
+        return found
+
+    def save(self) -> None:
+        """Commit the keys and stamp them with the archive as it is now on disk."""
+        stamp = content_stamp(self.archive)
+        self.db.execute("INSERT OR REPLACE INTO meta VALUES ('stamp', ?)", (json.dumps(stamp),))
+        self.db.commit()
+        self.bloom.dump(self.bloom_path, stamp)
+        self.current = True
+
+    def close(self) -> None:
+        self.db.close()                             # uncommitted keys are rolled back
+
+    def __enter__(self) -> DedupeIndex:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def is_current(archive: str | os.PathLike, index_dir: Path = INDEX_DIR) -> bool:
+    """Whether *archive* has a saved index that matches it as it is on disk."""
+    if not (index_dir / f"{Path(archive).stem}.sqlite").exists():
+        return False
+    with DedupeIndex(archive, index_dir) as index:
+        return index.current
+
+
+def restamp(archive: str | os.PathLike, index_dir: Path = INDEX_DIR) -> None:
+    """Stamp *archive*'s index with its new content after a rewrite that kept every key."""
+    with DedupeIndex(archive, index_dir) as index:
+        index.save()
+
+
+# ───────────────────────── benchmark ─────────────────────
+def bench(n: int) -> None:
+    """Memory and lookup latency for *n* url-like keys vs. an exact Python set."""
+    def url(i: int) -> str:
+        return f"https://www.example-news.com/2025/06/21/article-{i:09d}-lending-market-update"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = Path(tmp) / "bench.json"
+        archive.write_text("[]")
+        with DedupeIndex(archive, Path(tmp)) as index:
+            t0 = time.perf_counter()
+            batch = 100_000
+            for start in range(0, n, batch):
+                index.add_many(url(i) for i in range(start, min(n, start + batch)))
+            index.save()
+            t_build = time.perf_counter() - t0
+            db_size = (Path(tmp) / "bench.sqlite").stat().st_size
+
+        with DedupeIndex(archive, Path(tmp)) as index:   # reopened: loaded from disk
+            probe = 20_000
+            t0 = time.perf_counter()
+            assert not any(url(i) in index for i in range(n, n + probe))
+            t_absent = (time.perf_counter() - t0) / probe
+            false_pos = index.false_positives
+            t0 = time.perf_counter()
+            present = sum(url(i) in index for i in range(0, n, max(1, n // probe)))
+            t_present = (time.perf_counter() - t0) / min(probe, n)
+            bloom_bytes = index.bloom.nbytes
+
+    # an exact set of the same urls, extrapolated from a sample
+    sample = [url(i) for i in range(10_000)]
+    per_key = sum(sys.getsizeof(u) for u in sample) / len(sample) + sys.getsizeof(set(sample)) / len(sample)
+
+    mb = 1 << 20
+    print(f"{n:,} keys built in {t_build:.1f}s")
+    print(f"python set  ≈ {per_key * n / mb:9.1f} MB in memory")
+    print(f"bloom       {bloom_bytes / mb:11.1f} MB in memory  ({bloom_bytes / n:.2f} B/key)")
+    print(f"sqlite      {db_size / mb:11.1f} MB on disk")
+    print(f"lookup new  {t_absent * 1e6:9.1f} µs  ({false_pos} false positive(s) in {probe:,})")
+    print(f"lookup old  {t_present * 1e6:9.1f} µs  ({present:,} found, bloom + sqlite)")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Bloom-filtered dedupe index")
+    ap.add_argument("--bench", type=int, metavar="N", required=True, help="benchmark with N keys")
+    bench(ap.parse_args().bench)
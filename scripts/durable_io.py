@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+durable_io.py – Crash-safe writes for everything the pipeline stores in data/.
+
+Every output is written to a temporary file in the same directory, flushed,
+fsync'ed and then atomically renamed over the target. A job that is killed
+mid-write therefore leaves either the old file or the new one on disk – never
+a truncated JSON document.
+
+`StageJournal` is a tiny write-ahead journal for multi-step stages
+(merge_news, tag_platforms, …). Each completed unit of work is recorded
+durably; when the same stage is re-run with the same inputs, finished units
+are skipped and only the interrupted part is redone.
+
+`file_lock` is an advisory lock around a read-modify-write of one file, so
+two stages running at once (see pipeline.py) never both rewrite it from the
+same old content.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import stat
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+import json_codec
+
+try:
+    import fcntl
+except ImportError:                     # Windows: locks are no-ops
+    fcntl = None
+
+# ───────────────────────── paths ─────────────────────────
+REPO_ROOT   = Path(__file__).resolve().parent.parent
+DATA_DIR    = REPO_ROOT / "data"
+JOURNAL_DIR = DATA_DIR / ".journal"
+LOCK_DIR    = DATA_DIR / ".locks"
+
+LOCK_TIMEOUT = float(os.environ.get("DATA_LOCK_TIMEOUT", 1800))    # seconds to wait for a lock
+
+# the process umask (only readable by setting it), for the mode of new files
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+# ───────────────────────── atomic writes ─────────────────
+def _fsync_dir(dirname: Path) -> None:
+    """Persist the directory entry after a rename (no-op where unsupported)."""
+    try:
+        fd = os.open(dirname, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def atomic_open(path: str | os.PathLike, mode: str = "w",
+                encoding: str | None = "utf-8", newline: str | None = None) -> Iterator[Any]:
+    """
+    Open a temporary sibling of *path* for writing and rename it over *path*
+    once the block exits cleanly. On error the temporary file is removed and
+    the original file is left untouched. In an appending or updating mode
+    ("a", "r+") the temporary file starts as a copy of *path*. The result
+    keeps *path*'s permissions (a new file gets 0666 minus the umask, as with
+    open()) rather than mkstemp's 0600.
+    """
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    if "b" in mode:
+        encoding = None
+
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{target.name}.", suffix=".tmp", dir=target.parent)
+    try:
+        if ("a" in mode or "+" in mode) and target.exists():
+            shutil.copyfile(target, tmp_name)
+        with os.fdopen(fd, mode, encoding=encoding, newline=newline) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            mode_bits = stat.S_IMODE(os.stat(target).st_mode)
+        except FileNotFoundError:
+            mode_bits = 0o666 & ~_UMASK
+        os.chmod(tmp_name, mode_bits)
+        os.replace(tmp_name, target)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except FileNotFoundError:
+            pass
+        raise
+    _fsync_dir(target.parent)
+
+
+def atomic_write_text(path: str | os.PathLike, text: str, encoding: str = "utf-8") -> None:
+    """Atomically replace *path* with *text*."""
+    with atomic_open(path, "w", encoding=encoding) as f:
+        f.write(text)
+
+
+def atomic_write_json(path: str | os.PathLike, data: Any,
+                      indent: int | None = 2, ensure_ascii: bool = False) -> None:
+    """Atomically replace *path* with `data` serialised as JSON (see json_codec.py)."""
+    payload = json_codec.dumps(data, indent=indent, ensure_ascii=ensure_ascii)
+    with atomic_open(path, "wb") as f:
+        f.write(payload)
+
+
+# ───────────────────────── fingerprints ──────────────────
+def fingerprint(paths: Iterable[str | os.PathLike]) -> str:
+    """
+    Return a short content hash over *paths* (name + bytes). Missing files
+    contribute only their name, so a file appearing later changes the hash.
+    """
+    h = hashlib.sha1()
+    for p in sorted(Path(p) for p in paths):
+        h.update(p.name.encode("utf-8") + b"\0")
+        try:
+            with p.open("rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    h.update(block)
+        except FileNotFoundError:
+            h.update(b"<missing>")
+        h.update(b"\0")
+    return h.hexdigest()[:16]
+
+
+# content stamps: path → [size, mtime_ns, inode, sha1] of the last hash, so a
+# file is only re-read once it (or its checkout) changed
+STAMP_MEMO = DATA_DIR / ".cache" / "content_stamps.json"
+_memo: dict[str, list] | None = None
+
+
+def content_stamp(path: str | os.PathLike) -> dict:
+    """
+    Identity of *path*'s content for the caches in data/.cache: size + sha1
+    ({"size": -1} if missing). Unlike size + mtime it survives a fresh
+    checkout, which resets every mtime. The hash is only recomputed when
+    size, mtime or inode differ from the last time it was taken.
+    """
+    global _memo
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return {"size": -1, "sha1": None}
+    if _memo is None:
+        try:
+            _memo = json_codec.load_file(STAMP_MEMO)
+        except (FileNotFoundError, json.JSONDecodeError):
+            _memo = {}
+    key  = str(Path(path).resolve())
+    seen = _memo.get(key)
+    if seen and seen[:3] == [st.st_size, st.st_mtime_ns, st.st_ino]:
+        return {"size": st.st_size, "sha1": seen[3]}
+
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    _memo[key] = [st.st_size, st.st_mtime_ns, st.st_ino, h.hexdigest()]
+    try:
+        atomic_write_json(STAMP_MEMO, _memo, indent=None)
+    except OSError:
+        pass  # read-only checkout – the memo is only an optimisation
+    return {"size": st.st_size, "sha1": h.hexdigest()}
+
+
+# ───────────────────────── locks ─────────────────────────
+_held: dict[str, bool] = {}             # lock name → exclusive, for the locks this process holds
+
+
+@contextmanager
+def file_lock(path: str | os.PathLike, shared: bool = False,
+              timeout: float | None = None, lock_dir: Path = LOCK_DIR) -> Iterator[None]:
+    """
+    Hold an advisory lock on *path* (a sidecar data/.locks/<name>.lock, so
+    atomic renames of *path* itself do not drop it). Readers may share it;
+    a writer waits for everyone else. Nested calls for the same file in one
+    process are re-entrant. Raises TimeoutError after *timeout* seconds
+    (LOCK_TIMEOUT / DATA_LOCK_TIMEOUT by default).
+    """
+    name = Path(path).name
+    if name in _held:
+        if not shared and not _held[name]:
+            raise RuntimeError(f"{name}: cannot upgrade a shared lock to an exclusive one")
+        yield
+        return
+
+    lock_dir.mkdir(parents=True, exist_ok=True)
+    fd = os.open(lock_dir / f"{name}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            op = (fcntl.LOCK_SH if shared else fcntl.LOCK_EX) | fcntl.LOCK_NB
+            deadline = time.monotonic() + (LOCK_TIMEOUT if timeout is None else timeout)
+            while True:
+                try:
+                    fcntl.flock(fd, op)
+                    break
+                except BlockingIOError:
+                    if time.monotonic() >= deadline:
+                        raise TimeoutError(f"{name} is locked by another job") from None
+                    time.sleep(0.1)
+        _held[name] = not shared
+        try:
+            yield
+        finally:
+            del _held[name]
+    finally:
+        os.close(fd)                    # closing the descriptor releases the lock
+
+
+# ───────────────────────── journal ───────────────────────
+class StageJournal:
+    """
+    Records which units of one stage run have completed.
+
+    The journal is keyed by `run_key` (typically a fingerprint of the stage's
+    inputs). A journal left behind by an interrupted run with the same key is
+    resumed; one with a different key is discarded. Call `complete()` once the
+    whole stage has succeeded to remove the journal file.
+    """
+
+    def __init__(self, stage: str, run_key: str, journal_dir: Path = JOURNAL_DIR):
+        self.stage   = stage
+        self.run_key = run_key
+        self.path    = Path(journal_dir) / f"{stage}.json"
+        self._done: list[str] = []
+
+        try:
+            state = json.loads(self.path.read_text("utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            state = {}
+        if state.get("run_key") == run_key:
+            self._done = list(state.get("done", []))
+
+    @property
+    def resumed(self) -> bool:
+        """True if an earlier interrupted run already completed some units."""
+        return bool(self._done)
+
+    def is_done(self, unit: str) -> bool:
+        return unit in self._done
+
+    def mark_done(self, unit: str) -> None:
+        """Durably record that *unit* has finished."""
+        if unit in self._done:
+            return
+        self._done.append(unit)
+        atomic_write_json(self.path, {"stage": self.stage, "run_key": self.run_key, "done": self._done})
+
+    def complete(self) -> None:
+        """Forget the journal – the stage finished successfully."""
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+entities.py – One entity matcher for the whole pipeline.
+
+Loads the Master Entities CSV (entity_name, category, `;`-separated aliases)
+and compiles every alias into a token trie. A single left-to-right pass over
+an article's tokens returns every platform, competitor, fund and company it
+mentions – whole-word only, so "lend" no longer matches inside "lending".
+
+The compiled trie is pickled to data/.cache/ and only rebuilt when the CSV
+(or the matcher version) changes.
+
+    from entities import load_resolver
+    resolver = load_resolver()
+    resolver.resolve("Bondora and Mintos raise…")
+    # {'platforms': ['Bondora'], 'competitors': ['Mintos'], 'funds': [], 'companies': []}
+"""
+from __future__ import annotations
+
+import csv
+import hashlib
+import pickle
+import re
+from pathlib import Path
+
+from durable_io import atomic_open
+
+# ───────────────────────── paths ─────────────────────────
+REPO_ROOT  = Path(__file__).resolve().parent.parent
+DATA_DIR   = REPO_ROOT / "data"
+MASTER_CSV = DATA_DIR / "Master_Entities_Table - Originator_Platforms_Funds_and_Competitors.csv"
+CACHE_FILE = DATA_DIR / ".cache" / "entity_trie.pkl"
+
+# bump whenever the trie layout or tokenisation changes
+MATCHER_VERSION = 1
+
+# CSV `category` → result group
+GROUPS = {
+    "platform":   "platforms",
+    "competitor": "competitors",
+    "fund":       "funds",
+    "company":    "companies",
+}
+
+# own-company mentions; not part of the master table
+EXTRA_ENTITIES = [
+    ("Exaloan", "Company", ["exaloan", "creditshelf", "scorechain"]),
+]
+
+# words and single punctuation marks – aliases and text are split identically
+TOKEN_RX = re.compile(r"\w+|[^\w\s]")
+
+_END = ""   # trie key holding the (name, group) pairs that end at a node
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_RX.findall(text.lower())
+
+
+def read_entities(csv_path: Path = MASTER_CSV) -> list[tuple[str, str, list[str]]]:
+    """Return (entity_name, category, aliases) rows, aliases split on ';'."""
+    rows = []
+    with Path(csv_path).open(encoding="utf-8", newline="") as f:
+        for rec in csv.DictReader(f):
+            name = (rec.get("entity_name") or "").strip()
+            if not name:
+                continue
+            aliases = [a.strip() for a in (rec.get("aliases") or "").split(";") if a.strip()]
+            rows.append((name, (rec.get("category") or "").strip(), [name, *aliases]))
+    return rows + EXTRA_ENTITIES
+
+
+class EntityResolver:
+    """Token-trie matcher over all entity aliases."""
+
+    def __init__(self, trie: dict):
+        self._trie = trie
+
+    @classmethod
+    def build(cls, entities: list[tuple[str, str, list[str]]]) -> "EntityResolver":
+        trie: dict = {}
+        for name, category, aliases in entities:
+            group = GROUPS.get(category.lower())
+            if group is None:
+                continue
+            for alias in aliases:
+                tokens = tokenize(alias)
+                if not tokens:
+                    continue
+                node = trie
+                for tok in tokens:
+                    node = node.setdefault(tok, {})
+                node.setdefault(_END, set()).add((name, group))
+        return cls(trie)
+
+    def resolve(self, text: str) -> dict[str, list[str]]:
+        """Return {'platforms': [...], 'competitors': [...], 'funds': [...], 'companies': [...]}."""
+        found: dict[str, set[str]] = {g: set() for g in GROUPS.values()}
+        if not text:
+            return {g: [] for g in found}
+
+        tokens = tokenize(text)
+        trie   = self._trie
+        n      = len(tokens)
+        for i in range(n):
+            node = trie.get(tokens[i])
+            j = i + 1
+            while node is not None:
+                for name, group in node.get(_END, ()):
+                    found[group].add(name)
+                if j == n:
+                    break
+                node = node.get(tokens[j])
+                j += 1
+        return {g: sorted(names) for g, names in found.items()}
+
+    def mentions(self, text: str) -> list[str]:
+        """All master-table entities mentioned in *text* (every CSV category)."""
+        res = self.resolve(text)
+        return sorted({n for g, names in res.items() if g != "companies" for n in names})
+
+
+def load_resolver(csv_path: Path = MASTER_CSV, cache_file: Path = CACHE_FILE) -> EntityResolver:
+    """Load the compiled trie from cache, rebuilding it if the CSV changed."""
+    key = f"{MATCHER_VERSION}:{hashlib.sha1(Path(csv_path).read_bytes()).hexdigest()}"
+    try:
+        with cache_file.open("rb") as f:
+            cached = pickle.load(f)
+        if cached.get("key") == key:
+            return EntityResolver(cached["trie"])
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError, AttributeError, KeyError):
+        pass
+
+    resolver = EntityResolver.build(read_entities(csv_path))
+    try:
+        with atomic_open(cache_file, "wb") as f:
+            pickle.dump({"key": key, "trie": resolver._trie}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError:
+        pass  # read-only checkout – just use the in-memory trie
+    return resolver
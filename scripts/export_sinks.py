@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+export_sinks.py – Row-at-a-time writers for tabular exports.
+
+A sink receives one flat dict per `write()` and streams it straight to disk,
+so an export never holds more than one row (Parquet: one row group) in
+memory. Every sink supports two modes:
+
+    full    – the file is written to a temporary sibling and atomically
+              renamed once the export finishes (see durable_io.atomic_open)
+    append  – rows are added after the existing ones (sinks never reorder),
+              in a temporary copy of the file that replaces it once the
+              export finishes – so an append still copies the file once; a
+              missing file is created as in full mode
+
+Sinks
+    JsonArraySink  – pretty JSON array, byte-identical to json.dump(indent=2)
+    JsonLinesSink  – one JSON object per line   (.gz suffix ⇒ gzip)
+    CsvSink        – DictWriter, list columns joined with ", "  (.gz ⇒ gzip)
+    ParquetSink    – directory of part files (needs pyarrow)
+
+    with open_sinks([CsvSink(p, columns), JsonLinesSink(q)], append=True) as out:
+        for row in rows:
+            out.write(row)
+"""
+from __future__ import annotations
+
+import csv
+import gzip
+import io
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator
+
+from durable_io import atomic_open
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:          # optional – only needed for ParquetSink
+    pa = pq = None
+
+
+def _exists(path: Path) -> bool:
+    return path.exists() and path.stat().st_size > 0
+
+
+@contextmanager
+def _open_text(path: Path, append: bool, newline: str | None = None) -> Iterator[Any]:
+    """Text handle on *path*: atomic rewrite, or append to an atomic copy; gzip by suffix."""
+    if path.suffix == ".gz":
+        # gzip files may hold several members – appending one is valid
+        with atomic_open(path, "ab" if append else "wb") as raw, \
+             gzip.open(raw, "wt", encoding="utf-8", newline=newline) as f:
+            yield f
+    else:
+        with atomic_open(path, "a" if append else "w", newline=newline) as f:
+            yield f
+
+
+class Sink(ABC):
+    def __init__(self, path: str | os.PathLike):
+        self.path = Path(path)
+        self.rows = 0
+
+    @abstractmethod
+    def open(self, append: bool, stack: ExitStack) -> None:
+        """Open the output; everything to undo or commit goes on *stack*."""
+
+    @abstractmethod
+    def write(self, row: dict) -> None:
+        """Write one row."""
+
+
+class JsonLinesSink(Sink):
+    def open(self, append, stack):
+        self._f = stack.enter_context(_open_text(self.path, append and _exists(self.path)))
+
+    def write(self, row):
+        self._f.write(json.dumps(row, ensure_ascii=False))
+        self._f.write("\n")
+        self.rows += 1
+
+
+class CsvSink(Sink):
+    """CSV with a fixed column order; list values are joined with ', '."""
+
+    def __init__(self, path, columns: list[str]):
+        super().__init__(path)
+        self.columns = columns
+
+    def open(self, append, stack):
+        append = append and _exists(self.path)
+        f = stack.enter_context(_open_text(self.path, append, newline=""))
+        self._writer = csv.DictWriter(f, fieldnames=self.columns)
+        if not append:
+            self._writer.writeheader()
+
+    def write(self, row):
+        self._writer.writerow({k: ", ".join(v) if isinstance(v, list) else v for k, v in row.items()})
+        self.rows += 1
+
+    def existing_keys(self, key: Callable[[dict], str]) -> set[str]:
+        """*key* of every row already in the file (for append de-duplication)."""
+        if not _exists(self.path):
+            return set()
+        opener = gzip.open if self.path.suffix == ".gz" else open
+        with opener(self.path, "rt", encoding="utf-8", newline="") as f:
+            return {key(rec) for rec in csv.DictReader(f)}
+
+
+class JsonArraySink(Sink):
+    """
+    JSON array written element by element. Output matches
+    json.dump(rows, f, indent=2, ensure_ascii=False) byte for byte; appending
+    splices new elements in before the closing bracket (of a copy, see
+    _open_text).
+    """
+
+    def open(self, append, stack):
+        if append and _exists(self.path):
+            f = stack.enter_context(atomic_open(self.path, "r+b"))
+            f.seek(max(0, f.seek(0, io.SEEK_END) - 64))
+            tail = f.read()
+            end  = tail.rstrip()
+            if not end.endswith(b"]"):
+                raise ValueError(f"{self.path} is not a JSON array – re-run without append")
+            body = end[:-1].rstrip()
+            f.seek(f.tell() - len(tail) + len(body))
+            f.truncate()
+            self._f = io.TextIOWrapper(f, encoding="utf-8", write_through=True)
+            self._first = body.endswith(b"[")
+        else:
+            self._f = stack.enter_context(atomic_open(self.path, "w"))
+            self._f.write("[")
+            self._first = True
+        stack.callback(self._finish)
+
+    def write(self, row):
+        self._f.write("\n  " if self._first else ",\n  ")
+        self._f.write(json.dumps(row, indent=2, ensure_ascii=False).replace("\n", "\n  "))
+        self._first = False
+        self.rows += 1
+
+    def _finish(self):
+        self._f.write("]" if self._first else "\n]")
+        self._f.flush()
+
+
+class ParquetSink(Sink):
+    """
+    Parquet dataset directory (one part file per run). Full mode replaces all
+    parts; append mode adds a new part next to the existing ones.
+    """
+
+    BATCH_ROWS = 5_000
+
+    def open(self, append, stack):
+        if pq is None:
+            raise RuntimeError("ParquetSink needs pyarrow (pip install pyarrow)")
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._old   = [] if append else sorted(self.path.glob("part-*.parquet"))
+        self._part  = self.path / f"part-{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}.parquet"
+        self._batch: list[dict] = []
+        self._writer = None
+        stack.push(self._committed)                 # runs after the part is renamed into place
+        self._raw   = stack.enter_context(atomic_open(self._part, "wb"))
+        stack.callback(self._finish)
+
+    def write(self, row):
+        self._batch.append(row)
+        self.rows += 1
+        if len(self._batch) >= self.BATCH_ROWS:
+            self._flush()
+
+    def _flush(self):
+        if not self._batch:
+            return
+        table = pa.Table.from_pylist(self._batch)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self._raw, table.schema)
+        self._writer.write_table(table.cast(self._writer.schema))
+        self._batch = []
+
+    def _finish(self):
+        self._flush()
+        if self._writer is not None:
+            self._writer.close()
+
+    def _committed(self, exc_type, exc, tb) -> bool:
+        if exc_type is None:
+            if self._writer is None:                # no rows – don't leave an empty part
+                self._part.unlink(missing_ok=True)
+            for old in self._old:
+                if old != self._part:
+                    old.unlink(missing_ok=True)
+        return False
+
+
+class _Fanout:
+    def __init__(self, sinks: list[Sink]):
+        self.sinks = sinks
+
+    def write(self, row: dict) -> None:
+        for s in self.sinks:
+            s.write(row)
+
+
+@contextmanager
+def open_sinks(sinks: Iterable[Sink], append: bool = False) -> Iterator[_Fanout]:
+    """Open every sink; rows written to the result go to all of them."""
+    sinks = list(sinks)
+    with ExitStack() as stack:
+        for s in sinks:
+            s.open(append, stack)
+        yield _Fanout(sinks)
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+fast_feed.py – Streaming fast path for the plain RSS 2.0 feeds we poll.
+
+feedparser sanitises HTML, resolves relative URIs, sniffs encodings and
+builds a large FeedParserDict for every element of every entry, yet the
+fetchers only read link, title, published (+ published_parsed) and summary.
+`parse()` reads the feed incrementally with expat and keeps just those four
+fields, returning the same FeedParserDict shape (`feed.entries`, `bozo`), so
+callers cannot tell which parser ran.
+
+It declines – and raw_archive.parse_feed() falls back to feedparser – for
+anything whose feedparser result it cannot reproduce exactly:
+    • malformed XML, non-RSS-2.0 roots (Atom, RDF), anything but UTF-8, and
+      Content-Types feedparser flags as bozo (text/xml without a charset,
+      text/html, …) – CNBC / Yahoo skip bozo feeds, so that must not change
+    • an item without an absolute <link>, with an unparsable <pubDate>, or
+      with a date / body only in other elements (dc:date, content:encoded)
+    • markup or entity-like text in a title or description, or "&" in a
+      description (feedparser would sanitise, re-type or escape it)
+
+Set NEWS_FEED_PARSER=feedparser to bypass the fast path.
+
+    python scripts/fast_feed.py --bench data/raw/manifests/2025-06-21/*.json
+"""
+from __future__ import annotations
+
+import os
+import re
+import sys
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from collections import defaultdict
+from email.utils import mktime_tz, parsedate_tz
+from pathlib import Path
+
+import feedparser
+
+ENABLED = os.environ.get("NEWS_FEED_PARSER", "fast") != "feedparser"
+
+CHUNK_BYTES = 65_536
+
+# text feedparser would treat as HTML (and sanitise) or as an entity reference
+_NOT_PLAIN = re.compile(r"[<>]|&#?\w+;")
+_CHARSET   = re.compile(r"charset=[\"']?([\w-]+)", re.I)
+_XML_DECL  = re.compile(rb"^<\?xml[^>]*encoding=[\"']([\w-]+)", re.I)
+_UTF8      = {"utf-8", "utf8"}
+_ZONE      = re.compile(r"\s(?:[+-]\d{4}|GMT|UTC?|Z|[ECMP][SD]T)$")
+# Content-Types feedparser accepts without setting bozo (text/xml only with a charset)
+_XML_TYPES = {"application/rss+xml", "application/xml"}
+
+# item children that carry a date or body feedparser would pick up instead
+_DC_DATE = "{http://purl.org/dc/elements/1.1/}date"
+_CONTENT = "{http://purl.org/rss/1.0/modules/content/}encoded"
+
+
+class _Unsupported(Exception):
+    pass
+
+
+def _plain(text: str | None, html: bool = False) -> str:
+    text = (text or "").strip()
+    # a description is HTML to feedparser, so a bare "&" would come back as "&amp;"
+    if _NOT_PLAIN.search(text) or html and "&" in text:
+        raise _Unsupported("markup")
+    return text
+
+
+def _entry(item: ET.Element) -> feedparser.FeedParserDict:
+    link = (item.findtext("link") or "").strip()
+    if not link.startswith(("http://", "https://")):
+        raise _Unsupported("link")
+
+    e = feedparser.FeedParserDict(link=link)
+    title = item.find("title")
+    if title is not None:
+        e["title"] = _plain(title.text)
+
+    description = item.find("description")
+    if description is not None:
+        e["summary"] = _plain(description.text, html=True)
+    elif item.find(_CONTENT) is not None:
+        raise _Unsupported("content:encoded")
+
+    pub_date = item.findtext("pubDate")
+    if pub_date is not None:
+        # feedparser leaves zone-less dates unparsed; parsedate_tz reads them as UTC
+        parsed = parsedate_tz(pub_date.strip()) if _ZONE.search(pub_date.strip()) else None
+        if parsed is None:
+            raise _Unsupported("date")
+        e["published"]        = pub_date.strip()
+        e["published_parsed"] = time.gmtime(mktime_tz(parsed))
+    elif item.find(_DC_DATE) is not None:
+        raise _Unsupported("dc:date")
+    return e
+
+
+def parse(content: bytes, content_type: str = "") -> feedparser.FeedParserDict | None:
+    """Entries of a plain RSS 2.0 feed, or None if feedparser has to handle it."""
+    if not ENABLED:
+        return None
+    base    = content_type.split(";")[0].strip().lower()
+    charset = _CHARSET.search(content_type)
+    if base not in _XML_TYPES and not (base == "text/xml" and charset):
+        return None
+    if charset and charset.group(1).lower() not in _UTF8:
+        return None
+    declared = _XML_DECL.match(content[:200])
+    if declared and declared.group(1).decode().lower() not in _UTF8:
+        return None
+
+    parser  = ET.XMLPullParser(events=("start", "end"))
+    entries = []
+    depth   = 0
+    try:
+        for start in range(0, len(content), CHUNK_BYTES):
+            parser.feed(content[start:start + CHUNK_BYTES])
+            for event, el in parser.read_events():
+                if event == "start":
+                    if depth == 0 and (el.tag != "rss" or not el.get("version", "").startswith("2.")):
+                        return None
+                    depth += 1
+                    continue
+                depth -= 1
+                if el.tag == "item" and depth == 2:        # rss > channel > item
+                    entries.append(_entry(el))
+                    el.clear()                             # keep memory flat on long feeds
+        parser.close()
+    except (ET.ParseError, _Unsupported):
+        return None
+    if depth != 0 or not entries and b"<item" in content:
+        return None
+    return feedparser.FeedParserDict(bozo=False, entries=entries, feed=feedparser.FeedParserDict())
+
+
+# ───────────────────────── benchmark ─────────────────────
+_FIELDS = ("link", "title", "published", "published_parsed", "summary")
+
+
+def _fields(feed) -> list[dict]:
+    return [{k: e[k] for k in _FIELDS if k in e} for e in feed.entries]
+
+
+def _measure(fn, repeat: int = 5) -> tuple[float, int]:
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    t0 = time.process_time()
+    for _ in range(repeat):
+        fn()
+    return (time.process_time() - t0) / repeat, peak
+
+
+def bench(paths: list[str]) -> None:
+    """CPU time and peak allocations per source: feedparser vs. fast path."""
+    import json_codec
+    import raw_archive
+
+    # (source, body, content type) from raw-archive manifests or plain feed files
+    bodies: list[tuple[str, bytes, str]] = []
+    for path in paths:
+        if path.endswith(".json"):
+            for e in json_codec.load_file(path)["entries"]:
+                if "xml" in e["content_type"] or "rss" in e["content_type"]:
+                    bodies.append((e["fetcher"] or Path(path).stem, raw_archive.get_blob(e["sha256"]),
+                                   e["content_type"]))
+        else:
+            bodies.append((Path(path).stem, Path(path).read_bytes(), "application/rss+xml"))
+    if not bodies:
+        sys.exit("no feeds to benchmark")
+
+    rows: dict[str, list] = defaultdict(lambda: [0, 0, 0.0, 0.0, 0, 0, 0, True])
+    for source, body, ctype in bodies:
+        slow = feedparser.parse(body, response_headers={"content-type": ctype})
+        fast = parse(body, ctype)
+        r = rows[source]
+        r[0] += 1
+        r[1] += len(slow.entries)
+        t_slow, m_slow = _measure(lambda: feedparser.parse(body, response_headers={"content-type": ctype}))
+        t_fast, m_fast = _measure(lambda: parse(body, ctype)
+                                  or feedparser.parse(body, response_headers={"content-type": ctype}))
+        r[2] += t_slow
+        r[3] += t_fast
+        r[4]  = max(r[4], m_slow)
+        r[5]  = max(r[5], m_fast)
+        r[6] += fast is not None
+        r[7] &= fast is None or (not slow.bozo and _fields(fast) == _fields(slow))
+
+    print(f"{'source':<14}{'feeds':>6}{'items':>7}{'fp ms':>9}{'fast ms':>9}{'fp KiB':>9}{'fast KiB':>9}"
+          f"{'fast path':>11}  same")
+    for source, (n, items, t_slow, t_fast, m_slow, m_fast, hits, same) in sorted(rows.items()):
+        print(f"{source[:13]:<14}{n:>6}{items:>7}{t_slow * 1e3:9.2f}{t_fast * 1e3:9.2f}"
+              f"{m_slow / 1024:9.0f}{m_fast / 1024:9.0f}{f'{hits}/{n}':>11}  {'yes' if same else 'NO'}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args[:1] != ["--bench"] or len(args) < 2:
+        sys.exit("usage: python scripts/fast_feed.py --bench MANIFEST.json|FEED.xml …")
+    bench(args[1:])
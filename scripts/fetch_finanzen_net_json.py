@@ -2,14 +2,26 @@
 """
 Grab the current Finanzen.net RSS feed and save it as a time-stamped JSON
 inside data/, enriched with extracted (ASCII-only) keywords.
+
+Only items not seen in the last RECENT_WINDOW_HOURS are written: a rolling
+url → first-seen map is kept in data/finanzen_recent_urls.json, checked before
+any keyword extraction, so each hourly shard is a delta of genuinely new items.
 """
 from pathlib import Path
-import feedparser, json, datetime as dt
-from langdetect import detect
-import yake
+import json, os, datetime as dt, time
+
+from adaptive_poller import AdaptivePoller
+from alerts import AlertStream
+from article import Article, write_articles
+from durable_io import atomic_write_json
+from language import PerLanguage, detect_language, group_by_language, yake_extractor
+import raw_archive
 
 FEED_URL = "https://www.finanzen.net/rss/news"
 
+# how long a URL stays in the dedupe window (the feed only shows ~50 items)
+RECENT_WINDOW_HOURS = 48
+
 # ── transliteration map for German Umlauts & ß ────────────────────────────
 GERMAN_CHAR_MAP = {
     ord("Ä"): "Ae", ord("ä"): "ae",
@@ -26,25 +38,85 @@ def transliterate_de(text: str) -> str:
         return text
     return text.translate(GERMAN_CHAR_MAP)
 
-def extract_keywords(text: str, n: int = 1, top_k: int = 10) -> list[str]:
+# one YAKE extractor per language, reused across items (see language.py)
+kw_extractors = PerLanguage(yake_extractor)
+
+# FINANZEN_KEYWORDS=tfidf scores all new titles at once instead (see keyword_engine.py)
+KEYWORD_ENGINE = os.environ.get("FINANZEN_KEYWORDS", "yake")
+
+def extract_keywords(text: str, language: str | None = None) -> list[str]:
     """
-    Detect language, run YAKE, return top_k keywords (after transliteration).
+    Run YAKE with the extractor for *language* (detected if not given) and
+    return the top keywords (after transliteration).
     """
     # first transliterate so detector & extractor see only ASCII
     text_ascii = transliterate_de(text)
     if not text_ascii:
         return []
 
-    try:
-        language = detect(text_ascii)
-    except Exception:
-        language = "en"  # fallback
-
-    kw_extractor = yake.KeywordExtractor(lan=language, n=n, top=top_k)
-    keywords = kw_extractor.extract_keywords(text_ascii)
+    language = language or detect_language(text_ascii)
+    keywords = kw_extractors[language].extract_keywords(text_ascii)
     # each kw is a tuple (keyword, score)
     return [kw for kw, _ in keywords]
 
+class RecentUrls:
+    """
+    Rolling window of recently captured URLs (url → first-seen UNIX time).
+    Membership checks are plain dict lookups; entries older than the window
+    are dropped on save so the state file stays small.
+    """
+
+    def __init__(self, path: Path, window_hours: int = RECENT_WINDOW_HOURS):
+        self.path   = path
+        self.window = window_hours * 3600
+        try:
+            self.seen: dict[str, int] = json.loads(path.read_text("utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.seen = {}
+
+    def __contains__(self, url: str) -> bool:
+        return url in self.seen
+
+    def add(self, url: str, now: int) -> None:
+        self.seen.setdefault(url, now)
+
+    def save(self, now: int) -> None:
+        cutoff = now - self.window
+        self.seen = {u: t for u, t in self.seen.items() if t >= cutoff}
+        atomic_write_json(self.path, self.seen, indent=None, ensure_ascii=False)
+
+
+def feed_to_articles(entries) -> list[Article]:
+    """Feed entries → Articles with transliterated titles and keyword content."""
+    items = []
+    for e in entries:
+        # transliterate title for storage & keyword extraction
+        title_clean = transliterate_de(e.title)
+
+        items.append(Article(
+            source = "finanzen.net",
+            url    = e.link,
+            title  = title_clean,
+            published_at = dt.datetime(*e.published_parsed[:6]).isoformat(),
+            lang   = detect_language(title_clean),
+        ))
+
+    if KEYWORD_ENGINE == "tfidf" and items:
+        from keyword_engine import TfidfKeywords
+        engine = TfidfKeywords()
+        for art, keywords in zip(items, engine.extract_many([a.title for a in items], [a.lang for a in items])):
+            art.content = ", ".join(keywords)
+        engine.save()
+        return items
+
+    # keywords per language group, one extractor each
+    for language, group in group_by_language(items).items():
+        for art in group:
+            # join your ASCII-only keywords for the "content" field
+            art.content = ", ".join(extract_keywords(art.title, language))
+    return items
+
+
 def main() -> None:
     data_dir = Path(__file__).resolve().parents[1] / "data"
     data_dir.mkdir(exist_ok=True)
@@ -52,28 +124,52 @@ def main() -> None:
     ts = dt.datetime.utcnow().strftime("%Y-%m-%d_%H%M")
     outfile = data_dir / f"finanzen_{ts}.json"
 
-    feed = feedparser.parse(FEED_URL)
-    items = []
+    now    = int(time.time())
+    poller = AdaptivePoller.load()
+    if not poller.is_due("finanzen", now):
+        print(f"finanzen.net not due yet (every {poller.plan()['finanzen']} h) – skipping.")
+        return
 
-    for e in feed.entries:
-        # transliterate title for storage & keyword extraction
-        title_clean = transliterate_de(e.title)
-        keywords     = extract_keywords(title_clean)
+    recent = RecentUrls(data_dir / "finanzen_recent_urls.json")
 
-        items.append({
-            "source": "finanzen.net",
-            "url":    e.link,
-            "title":  title_clean,
-            "published_at": dt.datetime(*e.published_parsed[:6]).isoformat(),
-            # join your ASCII-only keywords for the "content" field
-            "content": ", ".join(keywords),
-            "platforms_mentioned": []
-        })
+    # the raw feed is archived for offline replay (see raw_archive.py)
+    recorder = raw_archive.start("fetch_finanzen_net_json")
+    try:
+        with recorder.source("finanzen"):
+            feed = raw_archive.parse_feed(FEED_URL)
+        fetched_at = time.time()
+
+        new_entries = []
+        skipped = 0
+        for e in feed.entries:
+            # already captured by an earlier hourly run → no keywords, no write
+            if e.link in recent:
+                skipped += 1
+                continue
+            recent.add(e.link, now)
+            new_entries.append(e)
+
+        items = feed_to_articles(new_entries)
+
+        # entity tags + alerts before the shard is written (see alerts.py)
+        alerts = AlertStream()
+        alerts.process(items, fetched_at)
 
-    with outfile.open("w", encoding="utf-8") as f:
-        json.dump(items, f, ensure_ascii=False, indent=2)
+        if items:
+            write_articles(outfile, items, indent=2, ensure_ascii=False)
+            print(f"Wrote {outfile.relative_to(Path.cwd())} ({len(items)} new items, {skipped} already seen)")
+        else:
+            print(f"No new items ({skipped} already seen) – no shard written.")
 
-    print(f"Wrote {outfile.relative_to(Path.cwd())} ({len(items)} items)")
+        # persist the window only after the shard is safely on disk
+        recent.save(now)
+        alerts.save()
+        print(alerts.summary())
+        poller.record("finanzen", len(items), len(feed.entries), now)
+        poller.save()
+    finally:
+        # archive what was fetched even if the run fails
+        recorder.save()
 
 if __name__ == "__main__":
     main()
@@ -2,19 +2,32 @@
 # coding: utf-8
 
 import os
+import sys
 import json
+import time
 import requests
-import feedparser
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
 
-import yake
-kw_extractor = yake.KeywordExtractor(lan="en", n=1, top=10)
+from adaptive_poller import AdaptivePoller
+from alerts import AlertStream
+from api_client import GNEWS, NEWSAPI, ApiClient
+from article import Article, read_articles, write_articles
+from durable_io import file_lock
+from language import PerLanguage, group_by_language, tag_languages, yake_extractor
+from raw_archive import http_get, parse_feed
+import raw_archive
 
-def extract_keywords(text):
+# one YAKE extractor per detected language, built on first use (see language.py)
+kw_extractors = PerLanguage(yake_extractor)
+
+# NEWS_KEYWORDS=tfidf scores the whole batch at once instead (see keyword_engine.py)
+KEYWORD_ENGINE = os.environ.get("NEWS_KEYWORDS", "yake")
+
+def extract_keywords(text, lang="en"):
     if not text:
         return []
-    keywords = kw_extractor.extract_keywords(text)
+    keywords = kw_extractors[lang].extract_keywords(text)
     return [kw for kw, score in keywords]
 
 
@@ -31,7 +44,8 @@ def matches_query(text, query):
 
 
 # ========== CONFIG ==========
-NEWSAPI_KEY = "186dd4ccd2234f6a89f850bf16effb06"
+NEWSAPI_KEY = os.environ.get("NEWSAPI_KEY", "186dd4ccd2234f6a89f850bf16effb06")
+GNEWS_KEY   = os.environ.get("GNEWS_KEY", "c4f8fe7bbdaea71cd2ec22279906c40f")
 
 QUERY = (
     "credit OR loan OR Exaloan OR lending OR fintech startup OR digital lending OR credit platform OR loan service"
@@ -44,14 +58,13 @@ QUERY_short = (
 )
 
 LANGUAGE = "en"
-PAGE_SIZE = 100
 
 # Switch to enable/disable article filtering
 ENABLE_FILTERING = False  # Set to False to bypass QUERY-based filtering
 
 def apply_query_filter(articles):
     """
-    Filters a list of article dicts based on the global QUERY if ENABLE_FILTERING is True.
+    Filters a list of Article records based on the global QUERY if ENABLE_FILTERING is True.
     """
     # if the switch is off, skip all filtering
     if not ENABLE_FILTERING:
@@ -60,10 +73,7 @@ def apply_query_filter(articles):
     # otherwise, only keep articles whose title+content match at least one OR-term
     filtered = [
         a for a in articles
-        if matches_query(
-            a.get("title", "") + " " + a.get("content", ""),
-            QUERY
-        )
+        if matches_query(a.text, QUERY)
     ]
     print(f"→ {len(filtered)} articles after filtering.")
     return filtered
@@ -90,17 +100,16 @@ def fetch_bloomberg_rss():
     print("Fetching Bloomberg RSS feeds...")
     all_articles = []
     for name, feed_url in RSS_FEEDS.items():
-        feed = feedparser.parse(feed_url)
+        feed = parse_feed(feed_url)
         for entry in feed.entries:
             content = getattr(entry, 'summary', entry.get('description', ''))
-            all_articles.append({
-                "source":         f"Bloomberg – {name} [RSS]",
-                "url":            entry.link,
-                "title":          entry.title,
-                "published_at":   entry.published if "published" in entry else "",
-                "content":        content,
-                "platforms_mentioned": [],
-            })
+            all_articles.append(Article(
+                source       = f"Bloomberg – {name} [RSS]",
+                url          = entry.link,
+                title        = entry.title,
+                published_at = entry.published if "published" in entry else "",
+                content      = content,
+            ))
     print(f"→ Bloomberg RSS: {len(all_articles)} articles fetched.")
 
     # ——— apply QUERY-based filtering if ENABLE_FILTERING is True ———
@@ -113,35 +122,20 @@ def fetch_bloomberg_rss():
 # ========== NEWSAPI FETCH ==========
 def fetch_newsapi():
     print("Fetching from NewsAPI...")
-    url = "https://newsapi.org/v2/everything"
     params = {
         "q":        "lending OR credit",
         "language": LANGUAGE,
-        "pageSize": PAGE_SIZE,
         "sortBy":   "publishedAt",
-        "apiKey":   NEWSAPI_KEY,
     }
 
-    response = requests.get(url, params=params)
-    if response.status_code != 200:
-        print(f"NewsAPI error: {response.status_code} – {response.text}")
-        return []
-
-    raw = response.json().get("articles", [])
-    print(f"→ NewsAPI: {len(raw)} articles fetched.")
+    # pages until the results reach articles we already stored (see api_client.py)
+    client = ApiClient(NEWSAPI, NEWSAPI_KEY)
+    raw = client.fetch_new(params, known_urls=stored_urls())
+    print(f"→ NewsAPI: {len(raw)} new articles fetched "
+          f"({client.ledger.remaining(client.key_id, NEWSAPI.daily_limit)} requests left today).")
 
-    # build our uniform article dicts
-    all_articles = [
-        {
-            "source":            f"{a['source']['name']} [NewsAPI]",
-            "url":               a["url"],
-            "title":             a["title"],
-            "published_at":      a["publishedAt"],
-            "content":           a.get("content") or a.get("description", ""),
-            "platforms_mentioned": [],
-        }
-        for a in raw
-    ]
+    # build our uniform article records
+    all_articles = [NEWSAPI.to_article(a) for a in raw]
 
     # apply QUERY-based filtering if ENABLE_FILTERING is True
     return apply_query_filter(all_articles)
@@ -153,18 +147,17 @@ def fetch_newsapi():
 # ========== SEC FETCH ==========
 def fetch_sec_press_releases():
     RSS_URL = "https://www.sec.gov/news/pressreleases.rss"
-    feed = feedparser.parse(RSS_URL)
+    feed = parse_feed(RSS_URL)
 
     entries = []
     for e in feed.entries:
-        entries.append({
-            "source":            "SEC Press Releases [RSS]",
-            "url":               e.link,
-            "title":             e.title,
-            "published_at":      getattr(e, "published", ""),
-            "content":           e.get("summary", ""),
-            "platforms_mentioned": [],
-        })
+        entries.append(Article(
+            source       = "SEC Press Releases [RSS]",
+            url          = e.link,
+            title        = e.title,
+            published_at = getattr(e, "published", ""),
+            content      = e.get("summary", ""),
+        ))
 
     print(f"→ SEC Press Releases: {len(entries)} fetched.")
     # apply QUERY-based filtering if ENABLE_FILTERING is True
@@ -178,37 +171,20 @@ def fetch_sec_press_releases():
 def fetch_gnews_financial_times():
     # show the actual short query you’re using
     print(f"Fetching from GNews (query: '{QUERY_short}')…")
-    
-    api_key = "c4f8fe7bbdaea71cd2ec22279906c40f"
-    url     = "https://gnews.io/api/v4/search"
+
     params  = {
         "q":       QUERY_short,
         "in":      "title,description",
         "lang":    LANGUAGE,
         "country": "us",
-        "max":     PAGE_SIZE,
-        "token":   api_key,
     }
 
-    response = requests.get(url, params=params)
-    if response.status_code != 200:
-        print(f"GNews error: {response.status_code} – {response.text}")
-        return []
-
-    raw = response.json().get("articles", [])
-    print(f"→ GNews: {len(raw)} articles fetched'.")
+    client = ApiClient(GNEWS, GNEWS_KEY)
+    raw = client.fetch_new(params, known_urls=stored_urls())
+    print(f"→ GNews: {len(raw)} new articles fetched "
+          f"({client.ledger.remaining(client.key_id, GNEWS.daily_limit)} requests left today).")
 
-    all_articles = []
-    for a in raw:
-        source_name = a.get("source", {}).get("name", "N/A")
-        all_articles.append({
-            "source":            f"{source_name} [GNews]",
-            "url":               a.get("url", ""),
-            "title":             a.get("title", ""),
-            "published_at":      a.get("publishedAt", ""),
-            "content":           a.get("description", ""),
-            "platforms_mentioned": [],
-        })
+    all_articles = [GNEWS.to_article(a) for a in raw]
 
     return apply_query_filter(all_articles)
 
@@ -226,16 +202,15 @@ def fetch_investing_rss():
 
     articles = []
     for label, feed_url in feeds.items():
-        feed = feedparser.parse(feed_url)
+        feed = parse_feed(feed_url)
         for entry in feed.entries:
-            articles.append({
-                "source":             label,
-                "url":                entry.link,
-                "title":              entry.title,
-                "published_at":       entry.published if "published" in entry else "",
-                "content":            entry.get("summary", ""),
-                "platforms_mentioned": [],
-            })
+            articles.append(Article(
+                source       = label,
+                url          = entry.link,
+                title        = entry.title,
+                published_at = entry.published if "published" in entry else "",
+                content      = entry.get("summary", ""),
+            ))
 
     print(f"→ Investing.com RSS: {len(articles)} articles fetched.")
 
@@ -248,8 +223,8 @@ def fetch_investing_rss():
 
 # ========== CRUNCHBASE FETCH ==========
 import requests, json
-from bs4 import BeautifulSoup
 from dateutil import parser
+from html_extract import find_news_article, section_teasers
 
 def fetch_crunchbase_sections():
     """
@@ -279,44 +254,23 @@ def fetch_crunchbase_sections():
     articles = []
 
     for sec in sections:
-        section_resp = requests.get(sec["url"], headers=headers)
+        section_resp = http_get(sec["url"], headers=headers)
         section_resp.raise_for_status()
-        soup = BeautifulSoup(section_resp.text, "lxml")
 
         # each H2 with a link is one article teaser on the section page
-        for h2 in soup.find_all("h2"):
-            link_tag = h2.find("a", href=True)
-            if not link_tag:
-                continue
-
-            title = link_tag.get_text(strip=True)
-            href  = link_tag["href"]
+        # (only <h2>/<p> elements are materialised – see html_extract.py)
+        for title, href, teaser in section_teasers(section_resp.text):
             url   = href if href.startswith("http") else (BASE_URL + href)
 
             # now deep‑fetch the article page
-            art = requests.get(url, headers=headers)
+            art = http_get(url, headers=headers)
             art.raise_for_status()
-            art_soup = BeautifulSoup(art.text, "lxml")
 
-            # find the JSON‑LD with "@type": "NewsArticle"
+            # find the JSON‑LD with "@type": "NewsArticle" (parsing stops there)
             published_iso = ""
             content_snip = ""
-            for script in art_soup.find_all("script", type="application/ld+json"):
-                try:
-                    data = json.loads(script.string)
-                except Exception:
-                    continue
-
-                # handle list or single object
-                if isinstance(data, list):
-                    # find the NewsArticle entry
-                    for entry in data:
-                        if entry.get("@type") == "NewsArticle":
-                            data = entry
-                            break
-                if data.get("@type") != "NewsArticle":
-                    continue
-
+            data = find_news_article(art.text)
+            if data is not None:
                 # extract publish date
                 dp = data.get("datePublished") or data.get("uploadDate")
                 if dp:
@@ -325,15 +279,13 @@ def fetch_crunchbase_sections():
                         dt = parser.isoparse(dp)
                         published_iso = dt.date().isoformat() 
                     except Exception:
-                        ppublished_iso = dp.split("T")[0] if "T" in dp else dp
+                        published_iso = dp.split("T")[0] if "T" in dp else dp
                 # extract a snippet: articleBody is full text, description is summary
                 content_snip = data.get("description") or data.get("articleBody","")
-                break  # stop after first NewsArticle
 
             # if JSON-LD failed, you could fallback to section‑page teaser
             if not content_snip:
-                p = h2.find_next_sibling("p")
-                content_snip = p.get_text(strip=True) if p else ""
+                content_snip = teaser
 
             # apply your keyword filter only on Fintech section
             if sec["keywords"]:
@@ -341,14 +293,13 @@ def fetch_crunchbase_sections():
                 if not any(k in txt for k in sec["keywords"]):
                     continue
 
-            articles.append({
-                "source":    sec["label"],
-                "url":       url,
-                "title":     title,
-                "published_at": published_iso,
-                "content":     content_snip,
-                "platforms_mentioned": [],
-            })
+            articles.append(Article(
+                source       = sec["label"],
+                url          = url,
+                title        = title,
+                published_at = published_iso,
+                content      = content_snip,
+            ))
 
     print(f"→ Crunchbase News (all sections): {len(articles)} fetched.")
     # apply QUERY-based filtering if ENABLE_FILTERING is True
@@ -371,7 +322,7 @@ def fetch_cnbc_rss():
     articles = []
 
     for label, url in CNBC_RSS_FEEDS.items():
-        feed = feedparser.parse(url)
+        feed = parse_feed(url)
         if getattr(feed, "bozo", False):
             print(f"  ⚠️  Failed to parse {label}: {feed.bozo_exception}")
             continue
@@ -383,14 +334,13 @@ def fetch_cnbc_rss():
                 summary = entry.get("description", "")
             published = getattr(entry, "published", entry.get("pubDate", ""))
 
-            articles.append({
-                "source":       f"{label} [RSS]",
-                "url":          entry.get("link", ""),
-                "title":        entry.get("title", "").strip(),
-                "published_at": published,
-                "content":      summary.strip(),
-                "platforms_mentioned": [],
-            })
+            articles.append(Article(
+                source       = f"{label} [RSS]",
+                url          = entry.get("link", ""),
+                title        = entry.get("title", "").strip(),
+                published_at = published,
+                content      = summary.strip(),
+            ))
 
     print(f"→ CNBC RSS: {len(articles)} articles fetched.")
     return apply_query_filter(articles)
@@ -413,7 +363,7 @@ def fetch_yahoo_rss():
     articles = []
 
     for label, url in YAHOO_FINANCE_RSS_FEEDS.items():
-        feed = feedparser.parse(url)
+        feed = parse_feed(url)
         if getattr(feed, "bozo", False):
             print(f"  ⚠️  Failed to parse '{label}': {feed.bozo_exception}")
             continue
@@ -424,14 +374,13 @@ def fetch_yahoo_rss():
             # published date fallback
             published = getattr(entry, "published", "") or entry.get("pubDate", "")
 
-            articles.append({
-                "source":       f"{label} [RSS]",
-                "url":          entry.get("link", ""),
-                "title":        entry.get("title", "").strip(),
-                "published_at": published,
-                "content":      summary.strip(),
-                "platforms_mentioned": [],
-            })
+            articles.append(Article(
+                source       = f"{label} [RSS]",
+                url          = entry.get("link", ""),
+                title        = entry.get("title", "").strip(),
+                published_at = published,
+                content      = summary.strip(),
+            ))
 
     print(f"→ Yahoo Finance: {len(articles)} articles fetched.")
     return apply_query_filter(articles)
@@ -447,19 +396,17 @@ def fetch_sifted_rss():
     articles = []
 
     for label, feed_url in feeds.items():
-        resp = requests.get(feed_url, timeout=10, headers={"User-Agent": "MyBot/1.0"})
-        feed = feedparser.parse(resp.content)
+        feed = parse_feed(feed_url, headers={"User-Agent": "MyBot/1.0"}, timeout=10)
 
         for entry in feed.entries:
             content = getattr(entry, "summary", entry.get("description", ""))
-            articles.append({
-                "source":            f"Sifted — {label} [RSS]",
-                "url":               entry.link,
-                "title":             entry.title,
-                "published_at":      entry.get("published", ""),
-                "content":           content,
-                "platforms_mentioned": [],
-            })
+            articles.append(Article(
+                source       = f"Sifted — {label} [RSS]",
+                url          = entry.link,
+                title        = entry.title,
+                published_at = entry.get("published", ""),
+                content      = content,
+            ))
 
     print(f"→ Sifted RSS: {len(articles)} articles fetched.")
     return apply_query_filter(articles)
@@ -476,49 +423,109 @@ SAVE_DIR = BASE_DIR / "data"
 SAVE_DIR.mkdir(parents=True, exist_ok=True)
 # ────────────────────────────────────────────────────────────────────────────────
 
-def save_articles(articles):
+def today_filepath():
     today = datetime.now().strftime("%Y-%m-%d")
-    filepath = SAVE_DIR / f"news_{today}.json"
+    return SAVE_DIR / f"news_{today}.json"
 
-    with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(articles, f, indent=2)
-    print(f"✅ Saved {len(articles)} articles to {filepath}")
+def load_today_articles():
+    """Articles already saved by an earlier run today (adaptive polls append)."""
+    try:
+        return read_articles(today_filepath())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return []
+
+def stored_urls():
+    """URLs already saved today or yesterday – API pagination stops at these."""
+    if raw_archive.replaying():
+        return set()        # replay re-reads exactly the pages that were archived
+    urls = {a.url for a in load_today_articles()}
+    yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
+    try:
+        urls.update(a.url for a in read_articles(SAVE_DIR / f"news_{yesterday}.json"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    return urls
+
+def save_articles(articles):
+    filepath = today_filepath()
+    with file_lock(filepath):            # tag_platforms may be rewriting it
+        merged = load_today_articles() + articles
+        write_articles(filepath, merged, indent=2, ensure_ascii=True)
+    print(f"✅ Saved {len(articles)} new articles to {filepath} ({len(merged)} today)")
 
 
 # In[79]:
 
 
 # ========== RUN ==========
-newsapi_articles     = fetch_newsapi()
-rss_articles         = fetch_bloomberg_rss()
-gnews_articles       = fetch_gnews_financial_times()
-investing_articles   = fetch_investing_rss()
-sec_articles         = fetch_sec_press_releases()
-crunchbase_articles  = fetch_crunchbase_sections()
-cnbc_articles        = fetch_cnbc_rss()
-yahoo_articles       = fetch_yahoo_rss()
-sifted_articles      = fetch_sifted_rss()
-
-all_articles = (
-    rss_articles
-  + newsapi_articles
-  + gnews_articles
-  + investing_articles
-  + sec_articles
-  + crunchbase_articles
-  + cnbc_articles
-  + yahoo_articles
-  + sifted_articles
-)
-
-# Add keywords to each article
-for article in all_articles:
-    full_text = f"{article.get('title', '')} {article.get('content', '')}"
-    article["keywords"] = extract_keywords(full_text)
+# fetchers in the order their articles are written to the daily file;
+# keys are the poll units tracked by adaptive_poller.py
+FETCHERS = {
+    "bloomberg":  fetch_bloomberg_rss,
+    "newsapi":    fetch_newsapi,
+    "gnews":      fetch_gnews_financial_times,
+    "investing":  fetch_investing_rss,
+    "sec":        fetch_sec_press_releases,
+    "crunchbase": fetch_crunchbase_sections,
+    "cnbc":       fetch_cnbc_rss,
+    "yahoo":      fetch_yahoo_rss,
+    "sifted":     fetch_sifted_rss,
+}
 
-# Save to daily file with keywords included
-if all_articles:
-    save_articles(all_articles)
+if __name__ == "__main__":
+    # every HTTP body of this run is archived for offline replay (see raw_archive.py)
+    recorder = raw_archive.start("fetch_news")
+    try:
+        # --adaptive: only poll the sources whose learned interval has elapsed
+        poller = AdaptivePoller.load()
+        if "--adaptive" in sys.argv[1:]:
+            due = poller.due(FETCHERS)
+            print(f"Adaptive run – due: {', '.join(due) or 'nothing'}")
+        else:
+            due = list(FETCHERS)
+
+        # today + yesterday, so right after midnight yesterday's items are not "fresh" again
+        known_urls = {a.url for a in load_today_articles()} | stored_urls()
+        alerts     = AlertStream()
+
+        all_articles = []
+        for name in due:
+            with recorder.source(name):
+                fetched = FETCHERS[name]()
+            fetched_at = time.time()
+            fresh   = [a for a in fetched if a.url not in known_urls]
+            # entity tags + alerts right away, not after the nightly tagging (see alerts.py)
+            alerts.process(fresh, fetched_at)
+            known_urls.update(a.url for a in fresh)
+            poller.record(name, len(fresh), len(fetched))
+            all_articles += fresh
+
+        # Detect language once per article, then add keywords with the matching extractor
+        tag_languages(all_articles)
+        keyword_engine = None
+        if KEYWORD_ENGINE == "tfidf":
+            from keyword_engine import TfidfKeywords
+            keyword_engine = TfidfKeywords()
+            batch_keywords = keyword_engine.extract_many([a.text for a in all_articles],
+                                                         [a.lang for a in all_articles])
+            for article, keywords in zip(all_articles, batch_keywords):
+                article.keywords = tuple(keywords)
+        else:
+            for lang, group in group_by_language(all_articles).items():
+                for article in group:
+                    article.keywords = tuple(extract_keywords(article.text, lang))
+
+        # Save to daily file with keywords included
+        if all_articles:
+            save_articles(all_articles)
+        if keyword_engine is not None:
+            keyword_engine.save()
+        alerts.save()
+        print(alerts.summary())
+        poller.save()
+    finally:
+        # archive what was fetched even if the run fails
+        recorder.save()
 
 
 # In[ ]:
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+html_extract.py – Selective HTML extraction for the Crunchbase scraper.
+
+fetch_crunchbase_sections() used to build a full BeautifulSoup tree for every
+section page (only to walk its <h2> teasers) and another one for every
+article page (only to read its JSON-LD). Both jobs now run on lxml's
+incremental HTML parser with a tag filter, so Python only ever sees the
+elements it asks for:
+
+    section_teasers(html)    – (title, href, teaser) per <h2><a href> teaser;
+                               teaser is the text of the next sibling <p>
+    find_news_article(html)  – the first "@type": "NewsArticle" JSON-LD object;
+                               the page is fed in chunks and parsing stops as
+                               soon as it is found (normally inside <head>)
+
+Text is extracted like BeautifulSoup's get_text(strip=True). check_html_extract.py
+compares both extractors with the BeautifulSoup versions they replaced on the
+pages in scripts/fixtures/crunchbase/.
+
+    python scripts/html_extract.py --bench section.html article1.html …
+"""
+from __future__ import annotations
+
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from lxml import etree
+
+CHUNK_CHARS = 16_384            # article pages are fed to the parser in chunks this size
+LD_JSON     = "application/ld+json"
+
+
+def element_text(el) -> str:
+    """Concatenated, stripped text of *el* (BeautifulSoup get_text(strip=True))."""
+    return "".join(s.strip() for s in el.itertext())
+
+
+# ───────────────────────── section pages ─────────────────
+def section_teasers(html: str) -> list[tuple[str, str, str]]:
+    """(title, href, teaser text) for every <h2> that contains a link, in page order."""
+    parser = etree.HTMLPullParser(events=("end",), tag=("h2", "p"))
+    parser.feed(html)
+    parser.close()
+
+    teasers: list[list[str]] = []
+    waiting: dict = {}                     # parent element → teasers still without a <p>
+    for _, el in parser.read_events():
+        if el.tag == "h2":
+            link = next((a for a in el.iter("a") if a.get("href") is not None), None)
+            if link is None:
+                continue
+            teaser = [element_text(link), link.get("href"), ""]
+            teasers.append(teaser)
+            waiting.setdefault(el.getparent(), []).append(teaser)
+        else:                              # first <p> after an <h2> among its siblings
+            for teaser in waiting.pop(el.getparent(), ()):
+                teaser[2] = element_text(el)
+    return [tuple(t) for t in teasers]
+
+
+# ───────────────────────── article pages ─────────────────
+def _news_article(data) -> dict | None:
+    # JSON-LD may be a single object or a list of them
+    if isinstance(data, list):
+        data = next((e for e in data if isinstance(e, dict) and e.get("@type") == "NewsArticle"), None)
+    if isinstance(data, dict) and data.get("@type") == "NewsArticle":
+        return data
+    return None
+
+
+def find_news_article(html: str) -> dict | None:
+    """First NewsArticle JSON-LD object on the page, or None."""
+    parser = etree.HTMLPullParser(events=("end",), tag="script")
+    for start in range(0, len(html), CHUNK_CHARS):
+        parser.feed(html[start:start + CHUNK_CHARS])
+        for _, script in parser.read_events():
+            if script.get("type") != LD_JSON:
+                continue
+            try:
+                found = _news_article(json.loads(script.text))
+            except (TypeError, ValueError):
+                continue
+            if found is not None:
+                return found                # rest of the page is never parsed
+    return None
+
+
+# ───────────────────────── benchmark ─────────────────────
+def _soup_teasers(html: str) -> list[tuple[str, str, str]]:
+    from bs4 import BeautifulSoup
+
+    out = []
+    for h2 in BeautifulSoup(html, "lxml").find_all("h2"):
+        link = h2.find("a", href=True)
+        if link:
+            p = h2.find_next_sibling("p")
+            out.append((link.get_text(strip=True), link["href"], p.get_text(strip=True) if p else ""))
+    return out
+
+
+def _soup_news_article(html: str) -> dict | None:
+    from bs4 import BeautifulSoup
+
+    for script in BeautifulSoup(html, "lxml").find_all("script", type=LD_JSON):
+        try:
+            found = _news_article(json.loads(script.string))
+        except (TypeError, ValueError):
+            continue
+        if found is not None:
+            return found
+    return None
+
+
+def _measure(fn, html: str, repeat: int = 5) -> tuple[float, int, object]:
+    tracemalloc.start()
+    result = fn(html)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn(html)
+    return (time.perf_counter() - t0) / repeat, peak, result
+
+
+def bench(paths: list[str]) -> None:
+    """Per-page time and peak Python memory: full BeautifulSoup tree vs. selective lxml."""
+    print(f"{'page':<32}{'kind':<9}{'bs4 ms':>9}{'lxml ms':>9}{'bs4 KiB':>10}{'lxml KiB':>10}  same")
+    for path in paths:
+        html = Path(path).read_text("utf-8", errors="replace")
+        # a page with <h2> teasers is a section page, anything else an article page
+        kind, old, new = (("section", _soup_teasers, section_teasers) if section_teasers(html)
+                          else ("article", _soup_news_article, find_news_article))
+        t_old, m_old, r_old = _measure(old, html)
+        t_new, m_new, r_new = _measure(new, html)
+        print(f"{Path(path).name[:31]:<32}{kind:<9}{t_old * 1e3:9.2f}{t_new * 1e3:9.2f}"
+              f"{m_old / 1024:10.0f}{m_new / 1024:10.0f}  {'yes' if r_old == r_new else 'NO'}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args[:1] != ["--bench"] or len(args) < 2:
+        sys.exit("usage: python scripts/html_extract.py --bench PAGE.html [PAGE.html …]")
+    bench(args[1:])
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+json_codec.py – The JSON encoder/decoder every script goes through.
+
+Backends, picked at import time (override with NEWS_JSON_BACKEND):
+    orjson   – fastest encoder; used when installed
+    msgspec  – fast decoder/encoder; used when installed and orjson is not
+    stdlib   – the json module; always available
+
+Output mode (NEWS_JSON_MODE):
+    identical  (default) – bytes are exactly what json.dumps would produce.
+                           orjson is only used for the layout it reproduces
+                           byte-for-byte (indent=2, non-ASCII output) and
+                           only for values it writes the same way: a float
+                           in exponent notation, NaN / Infinity, a non-str
+                           key or an int beyond 64 bits sends the whole
+                           document to stdlib.
+    equivalent           – always use the fast backend; the JSON is
+                           semantically the same but whitespace / escaping
+                           may differ from stdlib.
+
+Decode errors are always raised as json.JSONDecodeError, so callers keep
+their existing `except json.JSONDecodeError`.
+"""
+from __future__ import annotations
+
+import json
+import os
+from typing import Any
+
+try:
+    import orjson
+except ImportError:          # optional speed-up
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:          # optional speed-up
+    msgspec = None
+
+
+def _pick_backend() -> str:
+    wanted = os.environ.get("NEWS_JSON_BACKEND", "").lower()
+    available = {"orjson": orjson is not None, "msgspec": msgspec is not None, "stdlib": True}
+    if wanted:
+        if not available.get(wanted):
+            raise RuntimeError(f"NEWS_JSON_BACKEND={wanted!r} is not installed")
+        return wanted
+    return next(name for name in ("orjson", "msgspec", "stdlib") if available[name])
+
+
+BACKEND = _pick_backend()
+MODE    = os.environ.get("NEWS_JSON_MODE", "identical").lower()
+
+
+# ───────────────────────── decode ────────────────────────
+def loads(data: bytes | str) -> Any:
+    """Parse JSON from bytes or str."""
+    if BACKEND == "orjson":
+        return orjson.loads(data)           # orjson.JSONDecodeError ⊂ json.JSONDecodeError
+    if BACKEND == "msgspec":
+        try:
+            return msgspec.json.decode(data)
+        except msgspec.DecodeError as exc:
+            raise json.JSONDecodeError(str(exc), "", 0) from None
+    return json.loads(data)
+
+
+def load_file(path: str | os.PathLike) -> Any:
+    with open(path, "rb") as f:
+        return loads(f.read())
+
+
+# ───────────────────────── encode ────────────────────────
+def _orjson_identical(obj: Any) -> bool:
+    """
+    Whether orjson writes every float in *obj* as json.dumps does: Python
+    switches to exponent notation below 1e-4 and from 1e16 (1e-05, 1e+16 –
+    orjson writes 0.00001, 1e16) and writes NaN / Infinity (orjson: null).
+    Non-str keys and oversized ints make orjson raise instead (see dumps).
+    """
+    todo = [obj]
+    while todo:
+        o = todo.pop()
+        if isinstance(o, dict):
+            todo.extend(o.values())
+        elif isinstance(o, (list, tuple)):
+            todo.extend(o)
+        elif isinstance(o, float) and not (o == 0 or 1e-4 <= abs(o) < 1e16):
+            return False
+    return True
+
+
+def dumps(obj: Any, indent: int | None = 2, ensure_ascii: bool = False) -> bytes:
+    """Serialise *obj* to UTF-8 JSON bytes (see module docstring for modes)."""
+    equivalent = MODE == "equivalent"
+
+    if BACKEND == "orjson" and equivalent:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    if BACKEND == "orjson" and indent == 2 and not ensure_ascii and _orjson_identical(obj):
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+        except TypeError:                   # non-str key / int beyond 64 bits: stdlib handles them
+            pass
+    if BACKEND == "msgspec" and equivalent:
+        raw = msgspec.json.encode(obj)
+        return msgspec.json.format(raw, indent=indent) if indent else raw
+    return json.dumps(obj, indent=indent, ensure_ascii=ensure_ascii).encode("utf-8")
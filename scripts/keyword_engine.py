@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+keyword_engine.py – Corpus-level TF-IDF keywords for a whole batch at once.
+
+fetch_news.py and fetch_finanzen_net_json.py run YAKE on every article on
+its own (the most CPU-hungry step of a fetch), analyze_news.py keeps every
+token longer than three characters. `TfidfKeywords` scores a batch instead:
+
+    • one tokenizer pass maps the batch to (article, term) pairs; NumPy
+      turns them into a sparse CSR term matrix (indptr / term ids / counts)
+    • terms are scored tf · idf, with document frequencies taken from a
+      rolling table of the last WINDOW_DAYS days plus the batch itself
+    • the top-k terms of every row are picked with one lexsort
+
+The table (day → article count + per-term document frequency) lives in
+data/.cache/keyword_df.json. A checkout without it (CI) seeds it from the
+day files still in data/, so the idf is never computed from one batch only.
+
+Stages pick an engine themselves: NEWS_KEYWORDS / FINANZEN_KEYWORDS =
+yake | tfidf for the fetchers, `analyze_news.py --keywords tfidf`.
+
+    python scripts/keyword_engine.py --bench data/news_*.json
+"""
+from __future__ import annotations
+
+import json
+import re
+import sys
+import time
+from collections import Counter
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Iterable, Sequence
+
+import numpy as np
+
+import json_codec
+from article import read_articles
+from durable_io import atomic_write_json
+
+# ───────────────────────── paths & tuning ────────────────
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DATA_DIR  = REPO_ROOT / "data"
+DF_FILE   = DATA_DIR / ".cache" / "keyword_df.json"
+
+DF_VERSION  = 1
+WINDOW_DAYS = 14                # days of document frequencies behind the idf
+TOP_K       = 10                # keywords per article (as YAKE top=10)
+
+# day files the table is seeded from: news_<day>.json, finanzen_<day>[_HHMM].json
+DAY_FILE_RX = re.compile(r"^(?:news|finanzen)_(\d{4}-\d{2}-\d{2})(?:_\d{4})?\.json$")
+
+# words: letters first, then letters / digits / inner hyphens, at least 3 chars
+TOKEN_RX = re.compile(r"[^\W\d_](?:[\w-]*\w)?")
+MIN_LEN  = 3
+
+STOPWORDS = {
+    "en": frozenset("""
+        about above after again against all also and any are because been before being below between
+        both but can could did does doing down during each few for from further had has have having
+        her here hers herself him himself his how into its itself just more most not now off once
+        only other our ours out over own same she should some such than that the their theirs them
+        then there these they this those through too under until very was were what when where which
+        while who whom why will with would you your yours said says new one two per via amp
+        """.split()),
+    "de": frozenset("""
+        aber alle allem allen aller alles als also am an ander andere anderem anderen anderer anderes
+        auch auf aus bei bin bis bist da damit dann das dass dem den denn der des dessen die dies
+        diese diesem diesen dieser dieses doch dort durch ein eine einem einen einer eines einige für
+        gegen hat hatte hier hin hinter ich ihr ihre ihrem ihren ihrer ihres im in ist jede jedem
+        jeden jeder jedes jetzt kann kein keine mit muss nach nicht noch nun nur ob oder ohne seit
+        sein seine sich sie sind so soll sollte sondern über um und uns unter vom von vor war waren
+        was weil welche wenn werden wie wieder will wir wird wurde zu zum zur zwar zwischen ueber fuer
+        """.split()),
+}
+
+
+def tokenize(text: str, lang: str | None = None) -> list[str]:
+    """Lower-cased words of *text* minus the stopwords of *lang*."""
+    stop = STOPWORDS.get(lang or "en", frozenset())
+    return [t for t in TOKEN_RX.findall(text.lower()) if len(t) >= MIN_LEN and t not in stop]
+
+
+# ───────────────────────── term matrix ───────────────────
+def term_matrix(docs: Sequence[list[str]]) -> tuple[list[str], np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Sparse document × term matrix of tokenized *docs* in CSR layout:
+    (vocabulary, indptr, term ids, counts, position of each term's first
+    occurrence in its document).
+    """
+    vocab: dict[str, int] = {}
+    ids   = np.fromiter((vocab.setdefault(t, len(vocab)) for doc in docs for t in doc), dtype=np.int64)
+    sizes = np.fromiter(map(len, docs), dtype=np.int64, count=len(docs))
+    rows  = np.repeat(np.arange(len(docs), dtype=np.int64), sizes)
+
+    # one key per (row, term): unique gives the CSR order, counts and first hits
+    keys, first, counts = np.unique(rows * max(len(vocab), 1) + ids, return_index=True, return_counts=True)
+    row_of = keys // max(len(vocab), 1)
+    starts = np.concatenate(([0], np.cumsum(sizes)))
+    indptr = np.searchsorted(row_of, np.arange(len(docs) + 1))
+    return list(vocab), indptr, keys % max(len(vocab), 1), counts, first - starts[row_of]
+
+
+def top_terms(indptr: np.ndarray, scores: np.ndarray, first: np.ndarray, k: int) -> list[np.ndarray]:
+    """Per CSR row, the positions (into the row's entries) of the k best scores."""
+    rows  = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    order = np.lexsort((first, -scores, rows))          # best score first, ties by position
+    rank  = np.arange(len(order)) - indptr[rows[order]]
+    keep  = order[rank < k]
+    bounds = np.searchsorted(rows[keep], np.arange(len(indptr)))
+    return [keep[bounds[i]:bounds[i + 1]] for i in range(len(indptr) - 1)]
+
+
+# ───────────────────────── engine ────────────────────────
+class TfidfKeywords:
+    """
+    Batch TF-IDF keyword extractor backed by a rolling document-frequency
+    table (see module docstring).
+
+        engine = TfidfKeywords()
+        keywords = engine.extract_many(texts, langs, day="2025-06-21")
+        engine.save()
+    """
+
+    def __init__(self, df_file: Path = DF_FILE, window_days: int = WINDOW_DAYS,
+                 top: int = TOP_K, data_dir: Path = DATA_DIR):
+        self.df_file = df_file
+        self.window  = window_days
+        self.top     = top
+        self.days: dict[str, dict] = {}
+        self._dirty  = False
+        try:
+            stored = json_codec.load_file(df_file)
+            if stored.get("version") == DF_VERSION:
+                self.days = stored["days"]
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+        if not self.days:
+            self.seed(data_dir)
+        self._totals()
+
+    def _totals(self) -> None:
+        self.docs = sum(d["docs"] for d in self.days.values())
+        self.df: Counter = Counter()
+        for d in self.days.values():
+            self.df.update(d["df"])
+
+    def seed(self, data_dir: Path) -> None:
+        """Count document frequencies from the day files in *data_dir*."""
+        for path in sorted(data_dir.glob("*.json")):
+            m = DAY_FILE_RX.match(path.name)
+            if not m:
+                continue
+            try:
+                articles = read_articles(path)
+            except (json.JSONDecodeError, TypeError):
+                continue
+            self._learn(m.group(1), [set(tokenize(a.text, a.lang)) for a in articles])
+        self._prune()
+
+    def _learn(self, day: str, term_sets: Iterable[set[str]]) -> None:
+        entry = self.days.setdefault(day, {"docs": 0, "df": {}})
+        df = Counter(entry["df"])
+        for terms in term_sets:
+            entry["docs"] += 1
+            df.update(terms)
+        entry["df"] = dict(df)
+        self._dirty = True
+
+    def _prune(self) -> None:
+        if not self.days:
+            return
+        cutoff = (date.fromisoformat(max(self.days)) - timedelta(days=self.window - 1)).isoformat()
+        for day in [d for d in self.days if d < cutoff]:
+            del self.days[day]
+            self._dirty = True
+
+    def extract_many(self, texts: Sequence[str], langs: Sequence[str | None] | None = None,
+                     day: str | None = None, learn: bool = True) -> list[list[str]]:
+        """
+        Top keywords for every text, best first. With *learn* the batch is
+        added to the table under *day* (today by default); otherwise it only
+        counts towards this call's idf (re-scoring an archive).
+        """
+        langs = langs or [None] * len(texts)
+        docs  = [tokenize(t or "", lang) for t, lang in zip(texts, langs)]
+        vocab, indptr, term_ids, counts, first = term_matrix(docs)
+
+        batch_df = np.bincount(term_ids, minlength=len(vocab))
+        if learn:
+            self._learn(day or date.today().isoformat(), (set(doc) for doc in docs))
+            self._prune()
+            self._totals()
+            n_docs, df = self.docs, np.fromiter((self.df[t] for t in vocab), dtype=np.float64, count=len(vocab))
+        else:
+            n_docs = self.docs + len(docs)
+            df = batch_df + np.fromiter((self.df[t] for t in vocab), dtype=np.float64, count=len(vocab))
+
+        idf    = np.log((1 + n_docs) / (1 + df)) + 1
+        lengths = np.fromiter(map(len, docs), dtype=np.float64, count=len(docs))
+        tf     = counts / np.repeat(lengths, np.diff(indptr))
+        scores = tf * idf[term_ids]
+
+        words = np.array(vocab, dtype=object)
+        return [words[term_ids[sel]].tolist() for sel in top_terms(indptr, scores, first, self.top)]
+
+    def save(self) -> None:
+        if self._dirty:
+            atomic_write_json(self.df_file, {"version": DF_VERSION, "days": self.days}, indent=None)
+            self._dirty = False
+
+
+# ───────────────────────── benchmark ─────────────────────
+def bench(paths: list[str]) -> None:
+    """Throughput of the batch TF-IDF engine vs. per-article YAKE."""
+    from language import PerLanguage, group_by_language, tag_languages, yake_extractor
+
+    articles = tag_languages(a for p in paths for a in read_articles(p))
+    if not articles:
+        sys.exit("no articles to benchmark")
+    texts, langs = [a.text for a in articles], [a.lang for a in articles]
+
+    extractors = PerLanguage(lambda lang: yake_extractor(lang, top=TOP_K))
+    t0 = time.perf_counter()
+    yake_kw = {}
+    for lang, group in group_by_language(articles).items():
+        for a in group:
+            yake_kw[id(a)] = [kw.lower() for kw, _ in extractors[lang].extract_keywords(a.text)]
+    t_yake = time.perf_counter() - t0
+
+    engine = TfidfKeywords(df_file=DF_FILE.with_name("keyword_df_bench.json"), data_dir=Path("/nonexistent"))
+    t0 = time.perf_counter()
+    tfidf_kw = engine.extract_many(texts, langs, learn=False)
+    t_tfidf = time.perf_counter() - t0
+
+    overlap = [len(set(yake_kw[id(a)]) & set(kw)) / max(len(yake_kw[id(a)]), 1)
+               for a, kw in zip(articles, tfidf_kw)]
+    n = len(articles)
+    print(f"{n} articles from {len(paths)} file(s)")
+    print(f"yake    {t_yake:7.2f}s  {n / t_yake:9.0f} articles/s")
+    print(f"tfidf   {t_tfidf:7.2f}s  {n / t_tfidf:9.0f} articles/s  ({t_yake / t_tfidf:.0f}× faster)")
+    print(f"mean overlap with YAKE's top {TOP_K}: {sum(overlap) / n:.0%}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args[:1] != ["--bench"] or len(args) < 2:
+        sys.exit("usage: python scripts/keyword_engine.py --bench FILE.json [FILE.json …]")
+    bench(args[1:])
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+language.py – Language identification and per-language model routing.
+
+Every fetcher used to pick a language on its own: fetch_news.py ran an
+English YAKE extractor on everything (including the German Investing.com
+feed), fetch_finanzen_net_json.py detected per title and built a fresh
+extractor per item, analyze_news.py scored everything with English TextBlob.
+
+Now language is detected once per article at ingest and cached on the record
+(`Article.lang`, written to JSON as "lang"). Records stored before that are
+detected when they are read (analyze_news.py); a `LanguageCache` keeps those
+results in data/.cache/language_cache.json, so each is detected once. Downstream stages group a batch
+by language and fetch one model instance per language from a `PerLanguage`
+registry, so each extractor / sentiment model is built once per process.
+
+    tag_languages(articles)                         # fills a.lang where missing
+    for lang, group in group_by_language(articles).items():
+        extractor = keyword_extractors[lang]        # built on first use
+
+    keyword_extractors = PerLanguage(yake_extractor)   # languages YAKE has no stopwords for → DEFAULT_LANG
+
+    python scripts/language.py --bench data/news_2025-06-21.json data/finanzen_*.json
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import sys
+import time
+from functools import lru_cache
+from pathlib import Path
+from collections import Counter, defaultdict
+from importlib import metadata
+from typing import Callable, Generic, Iterable, TypeVar
+
+from langdetect import DetectorFactory, detect
+from langdetect.lang_detect_exception import LangDetectException
+
+import json_codec
+from article import Article, read_articles
+from durable_io import atomic_write_json
+
+DetectorFactory.seed = 0        # langdetect is randomised – keep results stable
+
+DEFAULT_LANG = "en"
+
+REPO_ROOT  = Path(__file__).resolve().parent.parent
+CACHE_FILE = REPO_ROOT / "data" / ".cache" / "language_cache.json"
+
+T = TypeVar("T")
+
+
+# ───────────────────────── detection ─────────────────────
+def detect_language(text: str) -> str:
+    """ISO 639-1 code of *text* (DEFAULT_LANG when undecidable)."""
+    if not text or not text.strip():
+        return DEFAULT_LANG
+    try:
+        return detect(text).split("-")[0]      # zh-cn → zh
+    except LangDetectException:
+        return DEFAULT_LANG
+
+
+def tag_languages(articles: Iterable[Article],
+                  text: Callable[[Article], str] = lambda a: a.text) -> list[Article]:
+    """Set `lang` on every article that has none yet; return the articles."""
+    articles = list(articles)
+    for a in articles:
+        if a.lang is None:
+            a.lang = detect_language(text(a))
+    return articles
+
+
+class LanguageCache:
+    """
+    Languages detected for records stored without one, by text hash. Dropped
+    when the langdetect version changes.
+
+        languages = LanguageCache()
+        languages.tag(batch)            # like tag_languages, detecting cache misses only
+        languages.save()
+    """
+
+    def __init__(self, cache_file: Path = CACHE_FILE):
+        self.cache_file = cache_file
+        self.detector   = f"langdetect={_version('langdetect')}"
+        try:
+            stored = json_codec.load_file(cache_file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            stored = {}
+        self._cache: dict[str, str] = stored.get("lang", {}) if stored.get("detector") == self.detector else {}
+        self._dirty = False
+
+    def tag(self, articles: Iterable[Article]) -> list[Article]:
+        """Set `lang` on every article that has none yet; return the articles."""
+        articles = list(articles)
+        for a in articles:
+            if a.lang is None:
+                key = hashlib.sha1(a.text.encode("utf-8")).hexdigest()[:20]
+                lang = self._cache.get(key)
+                if lang is None:
+                    lang = self._cache[key] = detect_language(a.text)
+                    self._dirty = True
+                a.lang = lang
+        return articles
+
+    def save(self) -> None:
+        if self._dirty:
+            atomic_write_json(self.cache_file, {"detector": self.detector, "lang": self._cache}, indent=None)
+            self._dirty = False
+
+
+def _version(dist: str) -> str:
+    try:
+        return metadata.version(dist)
+    except metadata.PackageNotFoundError:
+        return "-"
+
+
+def group_by_language(articles: Iterable[Article]) -> dict[str, list[Article]]:
+    groups: dict[str, list[Article]] = defaultdict(list)
+    for a in articles:
+        groups[a.lang or DEFAULT_LANG].append(a)
+    return dict(groups)
+
+
+# ───────────────────────── routing ───────────────────────
+class PerLanguage(Generic[T]):
+    """
+    Lazily built model instance per language. If *factory* rejects a
+    language (unsupported model), the DEFAULT_LANG instance is used instead.
+    """
+
+    def __init__(self, factory: Callable[[str], T]):
+        self.factory = factory
+        self._models: dict[str, T] = {}
+
+    def __getitem__(self, lang: str | None) -> T:
+        lang = lang or DEFAULT_LANG
+        model = self._models.get(lang)
+        if model is None:
+            try:
+                model = self.factory(lang)
+            except Exception:
+                if lang == DEFAULT_LANG:
+                    raise
+                model = self[DEFAULT_LANG]
+            self._models[lang] = model
+        return model
+
+
+@lru_cache(maxsize=None)
+def yake_languages() -> frozenset[str]:
+    """Languages YAKE ships a stopword list for (its StopwordsList/ moved between releases)."""
+    import yake
+    root = Path(yake.__file__).parent
+    return frozenset(p.stem.removeprefix("stopwords_") for p in root.rglob("StopwordsList/stopwords_*.txt")
+                     if p.stem != "stopwords_noLang")
+
+
+def yake_extractor(lang: str, n: int = 1, top: int = 10):
+    """
+    YAKE keyword extractor for *lang*. Raises ValueError for a language YAKE
+    has no stopwords for – YAKE itself would quietly use its language-agnostic
+    list – so a PerLanguage registry falls back to DEFAULT_LANG.
+    """
+    import yake
+    if lang not in yake_languages():
+        raise ValueError(f"YAKE has no stopword list for {lang!r}")
+    return yake.KeywordExtractor(lan=lang, n=n, top=top)
+
+
+# ───────────────────────── benchmark ─────────────────────
+def bench(paths: list[str]) -> None:
+    """Detection + keyword throughput on mixed-language archives."""
+    import yake
+
+    articles = [a for p in paths for a in read_articles(p)]
+    for a in articles:
+        a.lang = None
+    if not articles:
+        sys.exit("no articles to benchmark")
+
+    t0 = time.perf_counter()
+    tag_languages(articles)
+    t_detect = time.perf_counter() - t0
+    langs = Counter(a.lang for a in articles)
+
+    # old way: one extractor per article
+    sample = articles[:300]
+    t0 = time.perf_counter()
+    for a in sample:
+        yake.KeywordExtractor(lan=a.lang, n=1, top=10).extract_keywords(a.text)
+    t_per_item = time.perf_counter() - t0
+
+    # routed: grouped by language, one extractor each
+    extractors = PerLanguage(yake_extractor)
+    t0 = time.perf_counter()
+    for lang, group in group_by_language(sample).items():
+        ex = extractors[lang]
+        for a in group:
+            ex.extract_keywords(a.text)
+    t_routed = time.perf_counter() - t0
+
+    n = len(articles)
+    print(f"{n} articles, languages: {', '.join(f'{l}={c}' for l, c in langs.most_common())}")
+    print(f"detect      {t_detect:7.2f}s  {n / t_detect:8.0f} articles/s")
+    print(f"yake/item   {t_per_item:7.2f}s  {len(sample) / t_per_item:8.0f} articles/s  (new extractor per article)")
+    print(f"yake/lang   {t_routed:7.2f}s  {len(sample) / t_routed:8.0f} articles/s  (one extractor per language)")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args[:1] != ["--bench"] or len(args) < 2:
+        sys.exit("usage: python scripts/language.py --bench FILE.json [FILE.json …]")
+    bench(args[1:])
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+mention_index.py – Pre-aggregated entity mention time series.
+
+Answers "how often was X mentioned, when, and where" without rescanning the
+quarterly archives. For every quarterly news_YYYY_Qn.json the index keeps a
+segment with
+    • days      – day → number of articles (days without mentions included)
+    • docs      – the articles that mention ≥ 1 entity, in archive order
+                  (publish time, title, url, day, platforms_mentioned, source)
+    • postings  – per entity, columnar arrays sorted by day:
+                  day ordinal / source / article count / article ids
+so (entity, day, source) → count is stored, not recomputed.
+
+Segments are stamped with the archive's content (durable_io.content_stamp) and only rebuilt for
+files that changed (tag_platforms refreshes the index after every pass).
+merge_news folds the articles it splices into a quarter file straight into
+that file's segment (fold()), so the daily merge does not force a rescan of
+the current quarter. The index lives in data/.cache/mention_index.json.
+
+    from mention_index import load_index
+    idx = load_index()
+    idx.counts("Bondora", "2025-01-01", "2025-12-31", bucket="week")
+    idx.top("2025-06-01", "2025-06-30", k=5)
+
+    python scripts/mention_index.py Bondora --from 2025-01-01 --by week
+    python scripts/mention_index.py --top 10 --from 2025-06-01
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import re
+from bisect import bisect_left, bisect_right
+from collections import Counter, defaultdict
+from datetime import date, datetime
+from pathlib import Path
+
+import json_codec
+from archive_reader import ArchiveReader
+from archive_order import sort_key
+from durable_io import atomic_write_json, content_stamp, file_lock
+
+# ───────────────────────── paths ─────────────────────────
+REPO_ROOT  = Path(__file__).resolve().parent.parent
+DATA_DIR   = REPO_ROOT / "data"
+INDEX_FILE = DATA_DIR / ".cache" / "mention_index.json"
+
+INDEX_VERSION = 2
+
+# recognise YYYY-MM-DD inside published_at
+DATE_RX = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+def quarterly_files(data_dir: Path = DATA_DIR) -> list[Path]:
+    """Quarterly aggregate files, e.g. news_2025_Q2.json."""
+    return sorted(data_dir.glob("news_*_Q*.json"))
+
+
+# ───────────────────────── helpers ───────────────────────
+def extract_day(ts: str) -> str | None:
+    """
+    Return YYYY-MM-DD from a timestamp string.
+    Accepts variants like '2025-04-28 16:55:44' or '2025-04-28'.
+    """
+    if not ts:
+        return None
+    m = DATE_RX.search(ts)
+    if m:
+        return m.group(0)
+    # fall back to dateutil parsing (isoformat, etc.)
+    try:
+        return str(datetime.fromisoformat(ts).date())
+    except Exception:
+        return None
+
+
+def article_day(art) -> str | None:
+    # RFC 2822 dates ("Sat, 21 Jun 2025 …") have no YYYY-MM-DD → parsed day
+    return extract_day(art.published_at) or art.day
+
+
+def _ordinal(day: str) -> int:
+    return date.fromisoformat(day).toordinal()
+
+
+def _bucket(ordinal: int, bucket: str) -> str:
+    d = date.fromordinal(ordinal)
+    if bucket == "day":
+        return d.isoformat()
+    if bucket == "week":
+        year, week, _ = d.isocalendar()
+        return f"{year}-W{week:02d}"
+    if bucket == "month":
+        return f"{d.year}-{d.month:02d}"
+    raise ValueError(f"unknown bucket {bucket!r} (day, week, month)")
+
+
+# ───────────────────────── segments ──────────────────────
+def _doc(art, day: str) -> list:
+    return [sort_key(art), art.title, art.url, day, list(art.platforms_mentioned), art.source]
+
+
+def _segment(stamp: dict, days: Counter, docs: list[list]) -> dict:
+    """A segment from the day totals and the mention docs (source by name), in archive order."""
+    sources: list[str]                 = []
+    src_ids: dict[str, int]            = {}
+    cells:   dict[str, dict[tuple, list[int]]] = defaultdict(lambda: defaultdict(list))
+    for doc_id, (*fields, source) in enumerate(docs):
+        src = src_ids.setdefault(source, len(sources))
+        if src == len(sources):
+            sources.append(source)
+        docs[doc_id] = [*fields, src]
+        day, plats = fields[3], fields[4]
+        for entity in set(plats):
+            cells[entity][(_ordinal(day), src)].append(doc_id)
+
+    postings = {}
+    for entity, by_cell in cells.items():
+        keys = sorted(by_cell)
+        postings[entity] = {
+            "day":  [d for d, _ in keys],
+            "src":  [s for _, s in keys],
+            "n":    [len(by_cell[k]) for k in keys],
+            "docs": [by_cell[k] for k in keys],
+        }
+    return {"stamp": stamp, "days": dict(sorted(days.items())),
+            "sources": sources, "docs": docs, "postings": postings}
+
+
+def build_segment(path: Path) -> dict:
+    """Scan one archive into a segment (see module docstring)."""
+    days: Counter    = Counter()
+    docs: list[list] = []
+    with ArchiveReader(path) as archive:
+        for art in archive:
+            day = article_day(art)
+            if not day:
+                continue
+            days[day] += 1
+            if art.platforms_mentioned:
+                docs.append(_doc(art, day))
+    return _segment(content_stamp(path), days, docs)
+
+
+def fold_segment(seg: dict, path: Path, fresh: list) -> dict:
+    """
+    *seg* plus the articles *fresh* (newest first) that archive_order.splice
+    just merged into *path* – the segment build_segment would now return.
+    """
+    days = Counter(seg["days"])
+    docs = [[*doc[:-1], seg["sources"][doc[-1]]] for doc in seg["docs"]]
+    new  = []
+    for art in fresh:
+        day = article_day(art)
+        if not day:
+            continue
+        days[day] += 1
+        if art.platforms_mentioned:
+            new.append(_doc(art, day))
+
+    merged, i = [], 0                   # same order as the splice: on equal times the archive first
+    for doc in docs:
+        while i < len(new) and new[i][0] > doc[0]:
+            merged.append(new[i])
+            i += 1
+        merged.append(doc)
+    merged += new[i:]
+    return _segment(content_stamp(path), days, merged)
+
+
+# ───────────────────────── index ─────────────────────────
+class MentionIndex:
+    def __init__(self, segments: dict[str, dict]):
+        self.segments = segments
+        self.sources: list[str]      = []
+        self.docs:    list[list]     = []
+        self.day_totals: Counter     = Counter()
+        self._post: dict[str, dict[str, list]] = {}
+        self._merge()
+
+    def _merge(self) -> None:
+        """Concatenate segments (file order) into one global view."""
+        src_ids: dict[str, int] = {}
+        rows: dict[str, list[tuple]] = defaultdict(list)
+        for name in sorted(self.segments):
+            seg = self.segments[name]
+            self.day_totals.update(seg["days"])
+            src_map = [src_ids.setdefault(s, len(src_ids)) for s in seg["sources"]]
+            base    = len(self.docs)
+            self.docs.extend(seg["docs"])
+            for entity, p in seg["postings"].items():
+                for d, s, n, ids in zip(p["day"], p["src"], p["n"], p["docs"]):
+                    rows[entity].append((d, src_map[s], n, [base + i for i in ids]))
+        self.sources = list(src_ids)
+
+        for entity, r in rows.items():
+            r.sort(key=lambda row: (row[0], row[1]))
+            self._post[entity] = {
+                "day":  [row[0] for row in r],
+                "src":  [row[1] for row in r],
+                "n":    [row[2] for row in r],
+                "docs": [row[3] for row in r],
+            }
+
+    # ── queries ───────────────────────────────────────────
+    def entities(self) -> list[str]:
+        return sorted(self._post)
+
+    def days(self) -> list[str]:
+        return sorted(self.day_totals)
+
+    def _cells(self, entity: str, first: str | None, last: str | None, source: str | None):
+        """Yield (day ordinal, count, doc ids) for *entity* within [first, last]."""
+        p = self._post.get(entity)
+        if p is None:
+            return
+        lo = bisect_left(p["day"], _ordinal(first)) if first else 0
+        hi = bisect_right(p["day"], _ordinal(last)) if last else len(p["day"])
+        want = None if source is None else self.sources.index(source) if source in self.sources else -1
+        for i in range(lo, hi):
+            if want is None or p["src"][i] == want:
+                yield p["day"][i], p["n"][i], p["docs"][i]
+
+    def counts(self, entity: str, first: str | None = None, last: str | None = None,
+               bucket: str = "day", source: str | None = None) -> dict[str, int]:
+        """Mentions of *entity* per day / week / month in [first, last] (inclusive)."""
+        out: Counter = Counter()
+        for d, n, _ in self._cells(entity, first, last, source):
+            out[_bucket(d, bucket)] += n
+        return dict(sorted(out.items()))
+
+    def articles(self, entity: str, first: str | None = None, last: str | None = None,
+                 source: str | None = None) -> list[dict]:
+        """Articles mentioning *entity* in [first, last], oldest day first."""
+        ids = sorted(i for _, _, docs in self._cells(entity, first, last, source) for i in docs)
+        return [self.doc(i) for i in ids]
+
+    def top(self, first: str | None = None, last: str | None = None, k: int = 10,
+            source: str | None = None) -> list[tuple[str, int]]:
+        """The *k* most mentioned entities in [first, last]."""
+        totals = Counter()
+        for entity in self._post:
+            n = sum(n for _, n, _ in self._cells(entity, first, last, source))
+            if n:
+                totals[entity] = n
+        return totals.most_common(k)
+
+    def doc(self, i: int) -> dict:
+        _, title, url, day, plats, _ = self.docs[i]
+        return {"title": title, "url": url, "day": day, "platforms_mentioned": plats}
+
+    def hits_by_day(self) -> dict[str, list[dict]]:
+        """day → articles with ≥ 1 mention, in archive order."""
+        out: dict[str, list[dict]] = defaultdict(list)
+        for i in range(len(self.docs)):
+            out[self.docs[i][3]].append(self.doc(i))
+        return out
+
+
+def _load_segments(index_file: Path) -> dict[str, dict]:
+    try:
+        stored = json_codec.load_file(index_file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        stored = {}
+    return stored.get("segments", {}) if stored.get("version") == INDEX_VERSION else {}
+
+
+def _save_segments(index_file: Path, segments: dict[str, dict]) -> None:
+    try:
+        atomic_write_json(index_file, {"version": INDEX_VERSION, "segments": segments}, indent=None)
+    except OSError:
+        pass  # read-only checkout – keep the in-memory index
+
+
+def load_index(files: list[Path] | None = None, index_file: Path = INDEX_FILE) -> MentionIndex:
+    """Load the index, rebuilding only the segments whose archive changed."""
+    files = quarterly_files() if files is None else files
+    with file_lock(index_file):
+        old = _load_segments(index_file)
+        segments, changed = {}, set(old) - {p.name for p in files}
+        for path in files:
+            seg = old.get(path.name)
+            if seg is None or seg["stamp"] != content_stamp(path):
+                seg = build_segment(path)
+                changed.add(path.name)
+            segments[path.name] = seg
+        if changed:
+            _save_segments(index_file, segments)
+    return MentionIndex(segments)
+
+
+def fold(path: Path, fresh: list, stamp_before: dict, index_file: Path = INDEX_FILE) -> bool:
+    """
+    Fold the articles just spliced into the archive *path* into its segment,
+    if the segment matched the archive as it was before (*stamp_before*).
+    Returns False when it did not – load_index() then rescans the file.
+    """
+    with file_lock(index_file):
+        segments = _load_segments(index_file)
+        seg = segments.get(path.name)
+        if seg is None or seg["stamp"] != stamp_before:
+            return False
+        segments[path.name] = fold_segment(seg, path, fresh)
+        _save_segments(index_file, segments)
+    return True
+
+
+# ───────────────────────── CLI ───────────────────────────
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Query the entity mention index.")
+    ap.add_argument("entity", nargs="?", help="entity name as in platforms_mentioned")
+    ap.add_argument("--from", dest="first", help="first day (YYYY-MM-DD)")
+    ap.add_argument("--to", dest="last", help="last day (YYYY-MM-DD)")
+    ap.add_argument("--by", default="day", choices=("day", "week", "month"))
+    ap.add_argument("--source", help="restrict to one source label")
+    ap.add_argument("--top", type=int, metavar="K", help="list the K most mentioned entities")
+    args = ap.parse_args()
+
+    idx = load_index()
+    if args.top or not args.entity:
+        for entity, n in idx.top(args.first, args.last, args.top or 10, args.source):
+            print(f"{n:>6}  {entity}")
+        return
+    series = idx.counts(args.entity, args.first, args.last, args.by, args.source)
+    if not series:
+        print(f"⚠️  No mentions of {args.entity!r} in that window.")
+    for bucket, n in series.items():
+        print(f"{bucket:<12}{n:>6}")
+
+
+if __name__ == "__main__":
+    main()
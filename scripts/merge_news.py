@@ -2,19 +2,54 @@
 """
 merge_news.py
 
-- Finds today’s batch files: data/news_<YYYY-MM-DD>*.json
+- Finds the batch files of yesterday and today: data/news_<YYYY-MM-DD>*.json
+  (the adaptive poller keeps appending to a day's file after the morning
+  merge, so yesterday's is merged again; the dedupe index drops what was
+  merged already). Other days can be named on the command line
+  (`merge_news.py 2025-06-01 2025-06-02`, e.g. after a backfill).
 - If none are found: prints a message and exits(0).
 - Otherwise:
     • Loads (or creates) data/all_news.json → appends batch items → dedupes → writes it.
-    • Then computes the current quarter (YYYY_Qn), loads that file (or starts empty) → appends the same batch items → dedupes → writes it.
+    • Then, per quarter (YYYY_Qn) of the batch files' days, loads that file (or starts empty) → appends those items → dedupes → writes it.
+- All writes are atomic (see durable_io.py). Each finished step is recorded in a
+  stage journal, so re-running after an interruption only redoes the unfinished step.
+- An existing archive that cannot be decoded aborts the merge instead of being
+  overwritten with only today's items.
+- Dedupe checks keys against a persistent Bloom-filtered index per archive
+  (see dedupe_index.py) instead of rebuilding a set of every stored key; the
+  index is rebuilt from the archive only when the archive changed elsewhere.
+- Archives stay sorted newest first (see archive_order.py): the batch is
+  spliced into a known-sorted archive while it is streamed from disk; an
+  archive of unknown order is external-merge-sorted within a memory budget.
+- The articles new to all_news.json update the rolling trend counts, and
+  data/trending/<day>.json is rewritten (see trends.py).
+- They are also appended to the similar-article index (see similar.py),
+  which is rebuilt from the archive only when it is stale, and the articles
+  spliced into a quarter file are folded into its mention index segment
+  (see mention_index.py).
+- Each archive is rewritten under its advisory lock (durable_io.file_lock),
+  so tag_platforms / analyze_news running at the same time wait for it.
 """
 
+import argparse
 import glob
 import json
 import os
 import sys
-from datetime import date, datetime
-from dateutil import tz
+from datetime import date, timedelta
+from itertools import islice
+from pathlib import Path
+from typing import Iterator
+
+import archive_order
+import json_codec
+import mention_index
+from archive_order import get_quarter_str, sort_key   # quarter naming is shared with retention.py
+from article import Article
+from dedupe_index import DedupeIndex
+from durable_io import StageJournal, atomic_write_json, content_stamp, file_lock, fingerprint
+from similar import SimilarIndex
+from trends import TrendStore
 
 
 def get_today_local_date_str() -> str:
@@ -29,8 +64,7 @@ def load_json(path: str):
     Safe JSON loader. If the file does not exist or is malformed, returns None.
     """
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return json_codec.load_file(path)
     except FileNotFoundError:
         return None
     except json.JSONDecodeError as e:
@@ -40,161 +74,222 @@ def load_json(path: str):
 
 def save_json(path: str, data):
     """
-    Writes `data` to `path` as pretty-printed JSON (indent=2, ensure_ascii=False).
+    Atomically writes `data` to `path` as pretty-printed JSON (indent=2, ensure_ascii=False).
     """
-    dirname = os.path.dirname(path)
-    if dirname and not os.path.exists(dirname):
-        os.makedirs(dirname, exist_ok=True)
+    atomic_write_json(path, data, indent=2, ensure_ascii=False)
 
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
 
-
-def dedupe_news_items(news_list: list) -> list:
+def load_archive(path: str) -> list[Article]:
     """
-    Deduplicate a list of dicts by 'link', or by 'id', or by the entire object if neither key exists.
-    Returns a new list in which each unique key appears only once, preserving first-seen order.
+    Load an archive list (all_news.json or a quarter file) as Article records.
+    A missing file yields []; an existing but undecodable file aborts the run,
+    so a corrupted archive is never silently replaced by today's batch alone.
     """
-    seen_keys = set()
-    unique_items = []
+    existing = load_json(path)
+    if existing is None:
+        if os.path.exists(path):
+            sys.exit(f"Error: '{path}' exists but could not be decoded; refusing to overwrite it.")
+        return []
+    if not isinstance(existing, list):
+        print(f"Warning: '{path}' is not a list; overwriting it.", file=sys.stderr)
+        return []
+    return to_articles(existing)
 
-    for item in news_list:
-        if isinstance(item, dict):
-            key = item.get("link") or item.get("id") or json.dumps(item, sort_keys=True)
-        else:
-            key = repr(item)
 
-        if key in seen_keys:
-            continue
+def to_articles(items: list) -> list[Article]:
+    """Convert raw JSON objects to Article records, dropping non-objects."""
+    return [Article.from_dict(item) for item in items if isinstance(item, dict)]
 
-        seen_keys.add(key)
-        unique_items.append(item)
 
-    return unique_items
+def dedupe_key(item: Article) -> str:
+    """The item's url (or 'link'), else its 'id', else the entire record."""
+    return item.url or (item.extra or {}).get("id") or json.dumps(item.to_dict(), sort_keys=True)
 
 
-def get_quarter_str(dt: datetime) -> str:
+def dedupe_news_items(news_list: list[Article], index: DedupeIndex) -> list[Article]:
     """
-    Given a datetime (or date) object, return a string like '2025_Q2'.
-    Q1: Jan–Mar, Q2: Apr–Jun, Q3: Jul–Sep, Q4: Oct–Dec.
+    Deduplicate articles against `index` (and each other) by `dedupe_key`.
+    Returns the items whose key was not indexed yet, preserving first-seen
+    order, and adds their keys to the index.
     """
-    quarter_num = (dt.month - 1) // 3 + 1
-    return f"{dt.year}_Q{quarter_num}"
+    is_new = index.add_many(dedupe_key(item) for item in news_list)
+    return [item for item, new in zip(news_list, is_new) if new]
 
 
-def main():
-    # 1) Determine today's date in local time
-    today_str = get_today_local_date_str()
+def dedupe_stream(items: Iterator[Article], index: DedupeIndex, chunk: int = 10_000) -> Iterator[Article]:
+    """`dedupe_news_items` over a stream, `chunk` articles at a time."""
+    while batch := list(islice(items, chunk)):
+        yield from dedupe_news_items(batch, index)
 
-    # 2) Find all files matching data/news_<YYYY-MM-DD>*.json
-    pattern = f"data/news_{today_str}*.json"
-    batch_files = sorted(glob.glob(pattern))
 
-    # 3) If no daily file is found, skip (exit 0)
-    if not batch_files:
-        print(f"No daily batch JSON found for {today_str} → skipping merge.")
-        sys.exit(0)
-
-    # 4) Load existing data/all_news.json (or start with an empty list)
-    all_news_path = "data/all_news.json"
-    existing_all = load_json(all_news_path)
-    if existing_all is None:
-        all_news = []
-    elif isinstance(existing_all, list):
-        all_news = existing_all
-    else:
-        print(f"Warning: '{all_news_path}' is not a list; overwriting it.", file=sys.stderr)
-        all_news = []
-
-    # 5) Load each batch file, extend all_news, and also collect “today’s batch items”
-    total_loaded = 0
-    today_batch_items = []
-    for batch_file in batch_files:
-        data = load_json(batch_file)
-        if data is None or not isinstance(data, list):
-            print(f"Warning: skipping '{batch_file}' (could not load or not a list)", file=sys.stderr)
-            continue
-
-        all_news.extend(data)
-        total_loaded += len(data)
-        today_batch_items.extend(data)
-        print(f"Loaded {len(data)} items from '{batch_file}'.")
-
-    # 6) Deduplicate the combined all_news list
-    before_dedupe_all = len(all_news)
-    all_news = dedupe_news_items(all_news)
-    after_dedupe_all = len(all_news)
-
-    # 7) (Optional) Sort all_news by published date if that field exists
-    def _get_timestamp(item):
-        if not isinstance(item, dict):
-            return 0
-        if "published_parsed" in item and item["published_parsed"]:
-            try:
-                dt = datetime(*item["published_parsed"][:6], tzinfo=tz.tzutc())
-                return dt.timestamp()
-            except Exception:
-                pass
-        if "published" in item and isinstance(item["published"], str):
-            try:
-                dt = datetime.fromisoformat(item["published"])
-                return dt.timestamp()
-            except Exception:
-                pass
-        return 0
+def stream_archive(path: str) -> Iterator[Article]:
+    """
+    The archive's articles, decoded one at a time. Files that are not a JSON
+    array go through load_archive() (abort if undecodable, [] if not a list).
+    """
+    if not os.path.exists(path):
+        return iter(())
+    if not archive_order.is_array(path):
+        return iter(load_archive(path))
+    return archive_order.iter_archive(path)
 
-    try:
-        all_news.sort(key=_get_timestamp, reverse=True)
-    except Exception:
-        pass
 
-    # 8) Write back to data/all_news.json
-    save_json(all_news_path, all_news)
+def merge_archive(path: str, batch: list[Article]) -> tuple[int, int, list[Article], bool]:
+    """
+    Merge `batch` into the newest-first archive at `path`, dropping items it
+    already holds. Returns the article count before and after, the articles
+    that were added, and whether they were spliced into the archive as it was
+    (False: it was rewritten from scratch – re-sorted / re-deduped).
+    """
+    with DedupeIndex(path) as index:
+        count = archive_order.sorted_count(path)
+        if index.current and count is not None:
+            # deduped and sorted already – splice the new items in
+            fresh  = sorted(dedupe_news_items(batch, index), key=sort_key, reverse=True)
+            merged = archive_order.splice(path, fresh, count)
+            spliced = True
+        else:
+            spliced = False
+            rebuild = not index.current
+            if rebuild:
+                print(f"Rebuilding dedupe index for '{path}'.")
+                index.reset()
+
+            count = 0
+            def counted(items):
+                nonlocal count
+                for item in items:
+                    count += 1
+                    yield item
+
+            existing = counted(stream_archive(path))
+            if rebuild:
+                existing = dedupe_stream(existing, index)
+            with archive_order.spill_dir() as spill:
+                try:
+                    runs, _ = archive_order.sorted_runs(existing, spill)
+                except json.JSONDecodeError:
+                    sys.exit(f"Error: '{path}' exists but could not be decoded; refusing to overwrite it.")
+                fresh  = sorted(dedupe_news_items(batch, index), key=sort_key, reverse=True)
+                merged = archive_order.write_stream(path, archive_order.merge_runs(runs + [fresh]))
+
+        # stamp the order state and the dedupe index with the file just written
+        archive_order.mark_sorted(path, merged)
+        index.save()
+    return count, merged, fresh, spliced
+
+
+def merge_into_all_news(all_news_path: str, today_batch_items: list[Article], n_files: int, total_loaded: int):
+    """
+    Merges the batch into data/all_news.json (deduped, newest first).
+    Returns the articles that were new to it.
+    """
+    existing, after_dedupe_all, fresh, _ = merge_archive(all_news_path, today_batch_items)
+    before_dedupe_all = existing + len(today_batch_items)
 
-    # 9) Print a summary of all_news merge
+    # Print a summary of all_news merge
     print(
-        f"Merged {len(batch_files)} batch file(s) (≈{total_loaded} items), "
+        f"Merged {n_files} batch file(s) (≈{total_loaded} items), "
         f"deduped from {before_dedupe_all} → {after_dedupe_all} items. "
         f"Wrote to '{all_news_path}'."
     )
+    return fresh
 
-    # === NEW: QUARTERLY FILE MERGE ===
-
-    # 10) Compute which quarter this date belongs to, e.g. "2025_Q2"
-    today_dt = datetime.fromisoformat(today_str)
-    quarter_filename = f"data/news_{get_quarter_str(today_dt)}.json"
-
-    # 11) Load the existing quarter file, or start with an empty list
-    existing_quarter = load_json(quarter_filename)
-    if existing_quarter is None:
-        quarter_list = []
-    elif isinstance(existing_quarter, list):
-        quarter_list = existing_quarter
-    else:
-        print(f"Warning: '{quarter_filename}' is not a list; overwriting it.", file=sys.stderr)
-        quarter_list = []
-
-    # 12) Append today’s batch items, then dedupe
-    before_dedupe_q = len(quarter_list)
-    quarter_list.extend(today_batch_items)
-    quarter_list = dedupe_news_items(quarter_list)
-    after_dedupe_q = len(quarter_list)
-
-    # 13) (Optional) Sort the quarter list by published date (same logic)
-    try:
-        quarter_list.sort(key=_get_timestamp, reverse=True)
-    except Exception:
-        pass
 
-    # 14) Write back to data/news_<YYYY>_Qn.json
-    save_json(quarter_filename, quarter_list)
+def merge_into_quarter(quarter_filename: str, today_batch_items: list[Article]):
+    """
+    Merges the batch into the quarter file (deduped, newest first) and folds
+    the new articles into the mention index.
+    """
+    stamp = content_stamp(quarter_filename)
+    before_dedupe_q, after_dedupe_q, fresh, spliced = merge_archive(quarter_filename, today_batch_items)
+    if spliced and fresh:
+        mention_index.fold(Path(quarter_filename), fresh, stamp)
 
-    # 15) Print a summary of the quarterly merge
+    # Print a summary of the quarterly merge
     print(
         f"Quarter file '{quarter_filename}': "
         f"added {len(today_batch_items)} new → deduped from {before_dedupe_q} → {after_dedupe_q} items."
     )
 
 
+def main():
+    ap = argparse.ArgumentParser(description="Merge daily news files into all_news.json and the quarter files.")
+    ap.add_argument("days", nargs="*", metavar="YYYY-MM-DD",
+                    help="days whose news_<day>*.json files to merge (default: yesterday and today)")
+    args = ap.parse_args()
+
+    # 1) Determine today's date in local time
+    today_str = get_today_local_date_str()
+    days = args.days or [(date.today() - timedelta(days=1)).isoformat(), today_str]
+
+    # 2) Find all files matching data/news_<YYYY-MM-DD>*.json for those days
+    batch_files = {day: sorted(glob.glob(f"data/news_{day}*.json")) for day in days}
+    all_files   = [f for files in batch_files.values() for f in files]
+
+    # 3) If no daily file is found, skip (exit 0)
+    if not all_files:
+        print(f"No daily batch JSON found for {', '.join(days)} → skipping merge.")
+        sys.exit(0)
+
+    # 4) Open the stage journal – same batch files ⇒ resume an interrupted merge
+    journal = StageJournal("merge_news", f"{','.join(days)}:{fingerprint(all_files)}")
+    if journal.resumed:
+        print("Resuming interrupted merge – skipping steps already completed.")
+
+    # 5) Load each batch file and collect the batch items, per quarter of the file's day
+    total_loaded = 0
+    today_batch_items = []
+    quarter_items: dict[str, list[Article]] = {}
+    for day, files in batch_files.items():
+        quarter = quarter_items.setdefault(get_quarter_str(date.fromisoformat(day)), [])
+        for batch_file in files:
+            data = load_json(batch_file)
+            if data is None or not isinstance(data, list):
+                print(f"Warning: skipping '{batch_file}' (could not load or not a list)", file=sys.stderr)
+                continue
+
+            total_loaded += len(data)
+            items = to_articles(data)
+            today_batch_items.extend(items)
+            quarter.extend(items)
+            print(f"Loaded {len(data)} items from '{batch_file}'.")
+
+    # 6) Merge into data/all_news.json
+    all_news_path = "data/all_news.json"
+    if journal.is_done("all_news"):
+        print(f"'{all_news_path}' already merged in the interrupted run – skipping.")
+    else:
+        with file_lock(all_news_path):
+            # trend counts are loaded (or rebuilt from the archive) before it changes
+            trends  = TrendStore.load(archive=all_news_path)
+            similar = SimilarIndex(all_news_path)     # stamp checked against the archive before it changes
+            fresh   = merge_into_all_news(all_news_path, today_batch_items, len(all_files), total_loaded)
+            counted = trends.update(fresh, default_day=today_str)
+            trends.save()
+            path = trends.write_trending(today_str)
+            print(f"Trend counts updated with {counted} new article(s); wrote '{os.path.relpath(path)}'.")
+            if similar.current:
+                similar.add(fresh)
+            else:
+                print("Rebuilding similar-article index.")
+                similar.rebuild()
+            similar.save()
+        journal.mark_done("all_news")
+
+    # === NEW: QUARTERLY FILE MERGE ===
+
+    # 7) Merge into data/news_<YYYY>_Qn.json, one quarter (e.g. "2025_Q2") at a time
+    for quarter, items in quarter_items.items():
+        quarter_filename = f"data/news_{quarter}.json"
+        if items and not journal.is_done(f"quarter:{quarter}"):
+            with file_lock(quarter_filename):
+                merge_into_quarter(quarter_filename, items)
+            journal.mark_done(f"quarter:{quarter}")
+
+    # 8) Everything written – drop the journal
+    journal.complete()
+
+
 if __name__ == "__main__":
     main()
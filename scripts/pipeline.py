@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+pipeline.py – One job for the whole daily cycle instead of separate cron slots.
+
+The stages read and rewrite the same files in data/, so they run as a
+dependency graph rather than at fixed times:
+
+    combine ─┐
+    fetch ───┴─ merge ─┬─ tag ─── digest
+                       └─ analyze
+
+    • a stage starts as soon as the stages it depends on have finished;
+      independent ones (combine ∥ fetch, tag ∥ analyze) run in parallel,
+      each as its own process
+    • a stage whose code (its script and the scripts/ modules it imports),
+      input and output files hash the same as after its last successful run
+      is skipped (fingerprints in data/.cache/pipeline.json); fetch always
+      runs, it reads the network
+    • a failed stage stops everything downstream of it; the others go on
+    • the stages lock the files they rewrite (durable_io.file_lock), and the
+      pipeline holds a lock of its own, so a second run – or a stage started
+      by hand – waits instead of interleaving with it
+
+    python scripts/pipeline.py                  # the full cycle
+    python scripts/pipeline.py digest           # digest and what it depends on
+    python scripts/pipeline.py --dry-run        # what would run / be skipped
+    python scripts/pipeline.py --force analyze
+    python scripts/pipeline.py --skip fetch     # offline: reuse today's news file
+"""
+from __future__ import annotations
+
+import argparse
+import ast
+import glob
+import json
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Callable
+
+import json_codec
+from durable_io import atomic_write_json, file_lock, fingerprint
+
+# ───────────────────────── paths ─────────────────────────
+REPO_ROOT  = Path(__file__).resolve().parent.parent
+SCRIPTS    = REPO_ROOT / "scripts"
+DATA_DIR   = REPO_ROOT / "data"
+STATE_FILE = DATA_DIR / ".cache" / "pipeline.json"
+
+
+def _files(*patterns: str) -> Callable[[], list[Path]]:
+    """Files matching *patterns* (relative to the repo; {today} / {yesterday} filled in at run time)."""
+    def resolve() -> list[Path]:
+        today = date.today()
+        fill  = {"today": today.isoformat(), "yesterday": (today - timedelta(days=1)).isoformat()}
+        return sorted({Path(p) for pattern in patterns
+                       for p in glob.glob(str(REPO_ROOT / pattern.format(**fill)))})
+    return resolve
+
+
+def _code(script: Path) -> list[Path]:
+    """*script* and every scripts/ module it imports, directly or through another one."""
+    seen: set[Path] = set()
+    todo = [script]
+    while todo:
+        path = todo.pop()
+        if path in seen or not path.exists():
+            continue
+        seen.add(path)
+        for node in ast.walk(ast.parse(path.read_bytes(), filename=str(path))):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and not node.level and node.module:
+                names = [node.module]
+            else:
+                continue
+            todo.extend(SCRIPTS / f"{name.split('.')[0]}.py" for name in names)
+    return sorted(seen)
+
+
+# ───────────────────────── stages ────────────────────────
+@dataclass
+class Stage:
+    name:    str
+    command: list[str]
+    after:   tuple[str, ...] = ()
+    inputs:  Callable[[], list[Path]] = _files()
+    outputs: Callable[[], list[Path]] = _files()
+    always:  bool = False               # never skipped (reads the network)
+
+    def fingerprint(self) -> str:
+        return fingerprint([*_code(REPO_ROOT / self.command[1]), *self.inputs(), *self.outputs()])
+
+
+MASTER_CSV = "data/Master_Entities_Table - Originator_Platforms_Funds_and_Competitors.csv"
+
+STAGES = [
+    Stage("combine", [sys.executable, "scripts/combine_finanzen_daily.py"],
+          inputs=_files("data/finanzen_{yesterday}_*.json"),
+          outputs=_files("data/finanzen_{yesterday}.json")),
+    Stage("fetch", [sys.executable, "scripts/fetch_news.py"], always=True),
+    Stage("merge", [sys.executable, "scripts/merge_news.py"], after=("combine", "fetch"),
+          inputs=_files("data/news_{yesterday}*.json", "data/news_{today}*.json"),
+          outputs=_files("data/all_news.json", "data/news_*_Q*.json")),
+    Stage("tag", [sys.executable, "scripts/tag_platforms.py"], after=("merge",),
+          inputs=_files(MASTER_CSV, "data/news_[0-9]*.json")),      # not the digest file
+    Stage("digest", [sys.executable, "scripts/build_daily_company_digest.py"], after=("tag",),
+          inputs=_files(MASTER_CSV, "data/news_*_Q*.json"),
+          outputs=_files("data/news_filtered_for_companies_of_interest.json")),
+    Stage("analyze", [sys.executable, "scripts/analyze_news.py", "--append"], after=("merge",),
+          inputs=_files("data/all_news.json"),
+          outputs=_files("data/enriched_news.*")),
+]
+
+
+def plan(stages: list[Stage], targets: list[str]) -> list[Stage]:
+    """*targets* and everything upstream of them, in definition order."""
+    by_name = {s.name: s for s in stages}
+    unknown = [t for t in targets if t not in by_name]
+    if unknown:
+        raise ValueError(f"unknown stage(s): {', '.join(unknown)} (have {', '.join(by_name)})")
+    wanted: set[str] = set()
+    todo = list(targets or by_name)
+    while todo:
+        name = todo.pop()
+        if name not in wanted:
+            wanted.add(name)
+            todo.extend(by_name[name].after)
+    return [s for s in stages if s.name in wanted]
+
+
+# ───────────────────────── runner ────────────────────────
+class Pipeline:
+    """Runs a list of stages as a dependency graph (see module docstring)."""
+
+    def __init__(self, stages: list[Stage], state_file: Path = STATE_FILE,
+                 jobs: int = 2, force: set[str] = frozenset(), skip: set[str] = frozenset()):
+        self.stages = stages
+        self.names  = {s.name for s in stages}
+        self.path   = state_file
+        self.jobs   = jobs
+        self.force  = force
+        try:
+            self.state: dict[str, str] = json_codec.load_file(state_file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.state = {}
+        self.results: dict[str, str] = {s: "skipped" for s in skip}   # name → ran / skipped / failed / blocked
+
+    def is_fresh(self, stage: Stage) -> bool:
+        return (not stage.always and stage.name not in self.force
+                and self.state.get(stage.name) == stage.fingerprint())
+
+    def _run(self, stage: Stage) -> tuple[int, str, float]:
+        t0 = time.perf_counter()
+        proc = subprocess.run(stage.command, cwd=REPO_ROOT, stdout=subprocess.PIPE,
+                              stderr=subprocess.STDOUT, text=True)
+        return proc.returncode, proc.stdout, time.perf_counter() - t0
+
+    def _finish(self, stage: Stage, returncode: int, output: str, seconds: float) -> None:
+        print(f"── {stage.name} ({seconds:.1f}s) " + "─" * 40, flush=True)
+        if output.strip():
+            print(output.rstrip(), flush=True)
+        if returncode:
+            self.results[stage.name] = "failed"
+            print(f"✋  {stage.name} failed (exit {returncode})", flush=True)
+            return
+        self.results[stage.name] = "ran"
+        self.state[stage.name] = stage.fingerprint()     # as the stage left its files
+        atomic_write_json(self.path, self.state, indent=2)
+
+    def _deps(self, stage: Stage) -> str | None:
+        """Whether *stage* can start: "ready", "blocked" (a dependency failed) or None (wait)."""
+        results = [self.results.get(d) for d in stage.after if d in self.names]
+        if any(r in ("failed", "blocked") for r in results):
+            return "blocked"
+        return "ready" if all(r in ("ran", "skipped") for r in results) else None
+
+    def run(self, dry_run: bool = False) -> bool:
+        """Run every stage; returns False if any failed (or was blocked by a failure)."""
+        pending = [s for s in self.stages if s.name not in self.results]
+        running: dict = {}
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            while pending or running:
+                for stage in list(pending):
+                    deps = self._deps(stage)
+                    if deps is None:
+                        continue
+                    pending.remove(stage)
+                    if deps == "blocked":
+                        self.results[stage.name] = "blocked"
+                        print(f"·  {stage.name}: blocked by a failed dependency", flush=True)
+                    elif self.is_fresh(stage):
+                        self.results[stage.name] = "skipped"
+                        print(f"·  {stage.name}: inputs unchanged – skipped", flush=True)
+                    elif dry_run:
+                        self.results[stage.name] = "ran"
+                        print(f"▶  {stage.name}: would run", flush=True)
+                    else:
+                        print(f"▶  {stage.name}", flush=True)
+                        running[pool.submit(self._run, stage)] = stage
+                if running:
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        self._finish(running.pop(fut), *fut.result())
+        return all(r in ("ran", "skipped") for r in self.results.values())
+
+
+# ───────────────────────── CLI ───────────────────────────
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Run the daily pipeline stages as a dependency graph.")
+    ap.add_argument("targets", nargs="*", metavar="STAGE",
+                    help=f"stages to bring up to date, with their dependencies ({', '.join(s.name for s in STAGES)}; default all)")
+    ap.add_argument("--force", nargs="*", metavar="STAGE", help="re-run these stages (all if none given) even if unchanged")
+    ap.add_argument("--skip", nargs="+", default=[], metavar="STAGE",
+                    help="treat these stages as done without running them (e.g. fetch when offline)")
+    ap.add_argument("--jobs", type=int, default=2, help="stages run at the same time (default 2)")
+    ap.add_argument("--dry-run", action="store_true", help="only show what would run")
+    args = ap.parse_args()
+
+    try:
+        stages = plan(STAGES, args.targets)
+    except ValueError as exc:
+        ap.error(str(exc))
+    unknown = set(args.skip) - {s.name for s in STAGES}
+    if unknown:
+        ap.error(f"unknown stage(s) to skip: {', '.join(sorted(unknown))}")
+    force = set(s.name for s in stages) if args.force == [] else set(args.force or ())
+
+    with file_lock(DATA_DIR / "pipeline"):
+        ok = Pipeline(stages, jobs=args.jobs, force=force, skip=set(args.skip)).run(dry_run=args.dry_run)
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
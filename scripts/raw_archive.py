@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+raw_archive.py – Keep every raw HTTP body so past days can be re-parsed.
+
+Only parsed records used to survive a fetch, so a parser fix (say, in the
+Crunchbase JSON-LD extraction) could never be applied to earlier days. Every
+HTTP GET made by the fetchers now goes through `http_get()` / `parse_feed()`:
+
+    live    – the response body is stored gzip-compressed under its sha256
+              in data/raw/blobs/ (identical bodies are stored once) and
+              listed in a per-run manifest data/raw/manifests/<day>/<run>.json
+              (url, params without API keys, status, encoding, blob hash,
+              and which fetcher asked for it)
+    replay  – requests are answered from a manifest; nothing touches the
+              network
+
+    python scripts/raw_archive.py replay 2025-04-01 2025-06-30 --workers 8
+    python scripts/raw_archive.py replay 2025-06-21 2025-06-21 --out data
+    python scripts/raw_archive.py prune --keep-days 90
+
+Replay re-runs the fetchers' parsing, language + keyword extraction and
+entity tagging for every archived run in the range (one worker process per
+run) and writes the merged per-day results as news_<day>.json /
+finanzen_<day>.json to --out (default data/replay/).
+
+data/raw/ is not committed – the workflows carry it from run to run in the
+Actions cache – and `prune` bounds it: manifests older than --keep-days are
+removed, then every blob no remaining manifest refers to.
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import shutil
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from urllib.parse import urlencode
+
+import feedparser
+import requests
+from requests.structures import CaseInsensitiveDict
+
+import fast_feed
+import json_codec
+from durable_io import atomic_open, atomic_write_json
+
+# ───────────────────────── paths ─────────────────────────
+REPO_ROOT    = Path(__file__).resolve().parent.parent
+DATA_DIR     = REPO_ROOT / "data"
+RAW_DIR      = DATA_DIR / "raw"
+BLOB_DIR     = RAW_DIR / "blobs"
+MANIFEST_DIR = RAW_DIR / "manifests"
+REPLAY_DIR   = DATA_DIR / "replay"
+
+KEEP_DAYS    = 90               # default retention of `prune`
+
+# query parameters that carry credentials – never written to a manifest
+SECRET_PARAMS = {"apikey", "api_key", "token", "key"}
+
+FEED_HEADERS = {"User-Agent": feedparser.USER_AGENT}
+
+
+# ───────────────────────── blob store ────────────────────
+def put_blob(body: bytes, blob_dir: Path = BLOB_DIR) -> str:
+    """Store *body* under its sha256 (once) and return the hash."""
+    digest = hashlib.sha256(body).hexdigest()
+    path   = blob_dir / digest[:2] / f"{digest}.gz"
+    if not path.exists():
+        with atomic_open(path, "wb") as f:
+            f.write(gzip.compress(body, compresslevel=6, mtime=0))
+    return digest
+
+
+def get_blob(digest: str, blob_dir: Path = BLOB_DIR) -> bytes:
+    with open(blob_dir / digest[:2] / f"{digest}.gz", "rb") as f:
+        return gzip.decompress(f.read())
+
+
+def _public_params(params: dict | None) -> dict[str, str]:
+    return {k: str(v) for k, v in (params or {}).items() if k.lower() not in SECRET_PARAMS}
+
+
+def request_key(url: str, params: dict | None) -> str:
+    return f"{url}?{urlencode(sorted(_public_params(params).items()))}"
+
+
+# ───────────────────────── live capture ──────────────────
+class Recorder:
+    """Fetches over the network and archives every response of one run."""
+
+    replaying = False
+
+    def __init__(self, script: str, manifest_dir: Path = MANIFEST_DIR, blob_dir: Path = BLOB_DIR):
+        self.script       = script
+        self.started      = datetime.now(timezone.utc)
+        self.manifest_dir = manifest_dir
+        self.blob_dir     = blob_dir
+        self.entries: list[dict] = []
+        self.fetchers: list[str] = []
+        self._lock  = threading.Lock()
+        self._local = threading.local()
+
+    @contextmanager
+    def source(self, fetcher: str):
+        """Attribute the requests made inside the block to *fetcher*."""
+        with self._lock:
+            if fetcher not in self.fetchers:
+                self.fetchers.append(fetcher)
+        prev, self._local.fetcher = getattr(self._local, "fetcher", ""), fetcher
+        try:
+            yield
+        finally:
+            self._local.fetcher = prev
+
+    def get(self, url: str, params: dict | None = None, session=None, **kwargs) -> requests.Response:
+        resp = (session or requests).get(url, params=params, **kwargs)
+        entry = {
+            "fetcher":      getattr(self._local, "fetcher", ""),
+            "url":          url,
+            "params":       _public_params(params),
+            "status":       resp.status_code,
+            "content_type": resp.headers.get("Content-Type", ""),
+            "encoding":     resp.encoding,
+            "sha256":       put_blob(resp.content, self.blob_dir),
+            "fetched_at":   int(time.time()),
+        }
+        with self._lock:
+            self.entries.append(entry)
+        return resp
+
+    @property
+    def manifest_path(self) -> Path:
+        day = self.started.date().isoformat()
+        return self.manifest_dir / day / f"{self.started:%H%M%S}_{self.script}.json"
+
+    def save(self) -> None:
+        if not self.entries:
+            return
+        atomic_write_json(self.manifest_path, {
+            "script":   self.script,
+            "started":  self.started.isoformat(timespec="seconds"),
+            "fetchers": self.fetchers,
+            "entries":  self.entries,
+        }, indent=2, ensure_ascii=False)
+
+
+# ───────────────────────── replay ────────────────────────
+class Replayer:
+    """Answers requests from one manifest; never touches the network."""
+
+    replaying = True
+
+    def __init__(self, manifest: dict, blob_dir: Path = BLOB_DIR):
+        self.blob_dir = blob_dir
+        self._queues: dict[str, deque] = defaultdict(deque)
+        for e in manifest["entries"]:
+            self._queues[request_key(e["url"], e["params"])].append(e)
+
+    @contextmanager
+    def source(self, fetcher: str):
+        yield
+
+    def get(self, url: str, params: dict | None = None, session=None, **kwargs) -> requests.Response:
+        resp = requests.Response()
+        resp.url = url
+        queue = self._queues.get(request_key(url, params))
+        if not queue:
+            resp.status_code = 599                  # not archived – fetchers treat it as an HTTP error
+            resp.reason      = "Not in raw archive"
+            resp._content    = b""
+            return resp
+        e = queue.popleft() if len(queue) > 1 else queue[0]
+        resp.status_code = e["status"]
+        resp.headers     = CaseInsensitiveDict({"Content-Type": e["content_type"]})
+        resp.encoding    = e["encoding"]
+        resp._content    = get_blob(e["sha256"], self.blob_dir)
+        return resp
+
+
+RECORDER: Recorder | Replayer | None = None
+
+
+def start(script: str) -> Recorder:
+    """Begin archiving this process's requests; call `.save()` at the end."""
+    global RECORDER
+    RECORDER = Recorder(script)
+    return RECORDER
+
+
+@contextmanager
+def replay(manifest: dict):
+    global RECORDER
+    prev, RECORDER = RECORDER, Replayer(manifest)
+    try:
+        yield RECORDER
+    finally:
+        RECORDER = prev
+
+
+def replaying() -> bool:
+    return RECORDER is not None and RECORDER.replaying
+
+
+def http_get(url: str, params: dict | None = None, session=None, **kwargs) -> requests.Response:
+    """requests.get, archived (or answered from the archive during replay)."""
+    if RECORDER is None:
+        return (session or requests).get(url, params=params, **kwargs)
+    return RECORDER.get(url, params=params, session=session, **kwargs)
+
+
+def parse_feed(url: str, headers: dict | None = None, timeout: int = 20):
+    """
+    feedparser.parse(url) with the download going through http_get(). Plain
+    RSS 2.0 feeds take the streaming fast path (see fast_feed.py).
+    """
+    try:
+        resp = http_get(url, headers=headers or FEED_HEADERS, timeout=timeout)
+    except requests.RequestException as exc:
+        return feedparser.FeedParserDict(bozo=1, bozo_exception=exc, entries=[], feed={})
+    feed = fast_feed.parse(resp.content, resp.headers.get("Content-Type", ""))
+    if feed is not None:
+        return feed
+    return feedparser.parse(resp.content, response_headers={
+        "content-location": url,
+        "content-type":     resp.headers.get("Content-Type", ""),
+    })
+
+
+# ───────────────────────── replay pipeline ───────────────
+def manifests_between(first: date, last: date, manifest_dir: Path = MANIFEST_DIR) -> list[Path]:
+    out = []
+    for day_dir in sorted(manifest_dir.glob("????-??-??")):
+        if first.isoformat() <= day_dir.name <= last.isoformat():
+            out += sorted(day_dir.glob("*.json"))
+    return out
+
+
+def replay_run(path: Path) -> tuple[str, str, list[dict], list[str]]:
+    """Re-process one archived run → (day, output prefix, article dicts, errors)."""
+    from article import Article
+    from entities import load_resolver
+    from language import group_by_language, tag_languages
+
+    manifest = json_codec.load_file(path)
+    day      = path.parent.name
+    errors: list[str] = []
+    articles: list[Article] = []
+
+    with replay(manifest):
+        if manifest["script"] == "fetch_news":
+            import fetch_news
+            known: set[str] = set()
+            for name in manifest["fetchers"]:
+                try:
+                    fetched = fetch_news.FETCHERS[name]()
+                except Exception as exc:            # one broken parser must not sink the run
+                    errors.append(f"{path.name}:{name}: {exc}")
+                    continue
+                # same rule as the live run: drop urls an earlier fetcher already returned
+                fresh = [a for a in fetched if a.url not in known]
+                known.update(a.url for a in fresh)
+                articles += fresh
+            tag_languages(articles)
+            for lang, group in group_by_language(articles).items():
+                for art in group:
+                    art.keywords = tuple(fetch_news.extract_keywords(art.text, lang))
+            prefix = "news"
+        elif manifest["script"] == "fetch_finanzen_net_json":
+            import fetch_finanzen_net_json as fin
+            articles = fin.feed_to_articles(parse_feed(fin.FEED_URL).entries)
+            prefix = "finanzen"
+        else:
+            return day, "", [], [f"{path.name}: unknown script {manifest['script']!r}"]
+
+    resolver = load_resolver()
+    for art in articles:
+        art.platforms_mentioned = tuple(resolver.mentions(art.text))
+    return day, prefix, [a.to_dict() for a in articles], errors
+
+
+def replay_range(first: date, last: date, out_dir: Path = REPLAY_DIR, workers: int | None = None) -> None:
+    from article import Article, write_articles
+
+    runs = manifests_between(first, last)
+    if not runs:
+        sys.exit(f"⚠️  No archived runs between {first} and {last} in {MANIFEST_DIR}.")
+
+    per_file: dict[str, list[Article]] = defaultdict(list)
+    known:    dict[str, set[str]]      = defaultdict(set)
+    errors: list[str] = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # results arrive in run order; like the live runs, a later run of the
+        # same day only adds urls that earlier runs did not capture
+        for day, prefix, items, errs in pool.map(replay_run, runs):
+            errors += errs
+            if not prefix:
+                continue
+            name  = f"{prefix}_{day}.json"
+            fresh = [Article.from_dict(d) for d in items if d["url"] not in known[name]]
+            known[name].update(a.url for a in fresh)
+            per_file[name] += fresh
+
+    for name, arts in sorted(per_file.items()):
+        write_articles(out_dir / name, arts, indent=2, ensure_ascii=True)
+        print(f"✅  {name}: {len(arts)} articles")
+    for err in errors:
+        print(f"   ⚠️  {err}", file=sys.stderr)
+    print(f"\n✔️  Replayed {len(runs)} run(s) offline → {out_dir}")
+
+
+# ───────────────────────── retention ─────────────────────
+def prune(keep_days: int = KEEP_DAYS, manifest_dir: Path = MANIFEST_DIR,
+          blob_dir: Path = BLOB_DIR) -> tuple[int, int]:
+    """Drop runs older than *keep_days* and the blobs only they used → (runs, blobs) removed."""
+    cutoff = (date.today() - timedelta(days=keep_days)).isoformat()
+    runs = 0
+    for day_dir in sorted(manifest_dir.glob("????-??-??")):
+        if day_dir.name < cutoff:
+            runs += len(list(day_dir.glob("*.json")))
+            shutil.rmtree(day_dir)
+
+    referenced = {e["sha256"] for path in manifest_dir.glob("????-??-??/*.json")
+                  for e in json_codec.load_file(path)["entries"]}
+    blobs = 0
+    for path in blob_dir.glob("??/*.gz"):
+        if path.name[:-len(".gz")] not in referenced:
+            path.unlink()
+            blobs += 1
+    return runs, blobs
+
+
+def main() -> None:
+    ap  = argparse.ArgumentParser(description="Raw HTTP archive tools")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    rp  = sub.add_parser("replay", help="re-parse archived runs offline")
+    rp.add_argument("first", type=date.fromisoformat)
+    rp.add_argument("last", type=date.fromisoformat)
+    rp.add_argument("--out", type=Path, default=REPLAY_DIR, help="output directory (default: data/replay)")
+    rp.add_argument("--workers", type=int, default=None, help="worker processes (default: one per core)")
+    pp  = sub.add_parser("prune", help="drop old runs and unreferenced blobs")
+    pp.add_argument("--keep-days", type=int, default=KEEP_DAYS, help=f"days of runs to keep (default: {KEEP_DAYS})")
+    args = ap.parse_args()
+
+    if args.cmd == "replay":
+        replay_range(args.first, args.last, args.out, args.workers)
+    elif args.cmd == "prune":
+        runs, blobs = prune(args.keep_days)
+        print(f"🧹  Removed {runs} run(s) older than {args.keep_days} days and {blobs} unreferenced blob(s)")
+
+
+if __name__ == "__main__":
+    main()
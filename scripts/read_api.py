@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+"""
+read_api.py – Local read-only HTTP API over the pipeline outputs.
+
+Consumers used to download and parse a whole output file to answer one
+question. This server keeps the files warm instead and answers small
+queries over HTTP:
+
+    GET /digest                          days in the company digest
+    GET /digest/<day>                    one day of news_filtered_for_companies_of_interest.json
+    GET /articles?entity=&source=&from=&to=&limit=
+                                         all_news.json articles (newest first)
+    GET /enriched?url=&entity=&category=&from=&to=&limit=
+                                         rows of enriched_news.jsonl (.csv while there is none)
+    GET /health
+
+    • every source file is parsed / memory-mapped once (all_news.json via
+      archive_reader.py) and reloaded when its size or mtime changes – or,
+      for the enrichment output, when the .jsonl appears next to the .csv
+    • responses are kept in an in-memory LRU (CACHE_ENTRIES bodies of at
+      most CACHE_MAX_BODY bytes); each one's ETag is derived from the query
+      and the stamps of the files it was built from, so a rewritten output
+      invalidates it, and If-None-Match is answered 304 without a lookup
+    • larger results (long date ranges, no limit) are streamed as a chunked
+      JSON array instead of being built in memory
+
+Replaced files are picked up on the next request: merge_news / analyze_news
+rename the new version into place, so a reader never sees a partial file.
+Bad parameters are answered 400, unknown paths / days 404 and anything else
+500 (the traceback goes to stderr).
+
+    python scripts/read_api.py --port 8766
+    curl 'http://127.0.0.1:8766/articles?entity=Bondora&from=2025-06-01&limit=20'
+    python scripts/read_api.py --bench 5000 --clients 8
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import hashlib
+import http.client
+import os
+import re
+import statistics
+import sys
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+import json_codec
+from archive_reader import ArchiveReader
+from article import Article
+
+# ───────────────────────── paths & tuning ────────────────
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DATA_DIR  = REPO_ROOT / "data"
+
+CACHE_ENTRIES  = 1024           # responses kept in the LRU
+CACHE_MAX_BODY = 256 << 10      # larger responses are streamed, not cached
+STREAM_CHUNK   = 64 << 10       # bytes per chunk of a streamed response
+
+DAY_RX = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _stamp(path: Path) -> tuple[int, int]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return (-1, 0)
+    return (st.st_size, st.st_mtime_ns)
+
+
+# ───────────────────────── warm sources ──────────────────
+class Source:
+    """
+    One output file, loaded by *load* and reloaded when its stamp changes.
+    *path* may be a callable, re-resolved on every get().
+    """
+
+    def __init__(self, path: Path | Callable[[], Path], load: Callable[[Path], Any], empty: Any = None):
+        self._path = path if callable(path) else lambda: path
+        self._load = load
+        self.empty = empty
+        self.stamp = None
+        self.value = empty
+        self._lock = threading.Lock()
+
+    @property
+    def path(self) -> Path:
+        return self._path()
+
+    def get(self) -> Any:
+        path  = self.path
+        stamp = (path.name, *_stamp(path))
+        if stamp != self.stamp:
+            with self._lock:
+                if stamp != self.stamp:
+                    # a reader still streaming from the old value keeps it alive
+                    self.value = self._load(path) if stamp[1] >= 0 else self.empty
+                    self.stamp = stamp
+        return self.value
+
+
+def _load_enriched(path: Path) -> tuple[list[dict], dict[str, dict]]:
+    """(rows, url → row) of the enrichment output."""
+    if path.suffix == ".jsonl":
+        with path.open("rb") as f:
+            rows = [json_codec.loads(line) for line in f if line.strip()]
+    else:
+        list_cols = ("platforms_mentioned", "competitors_mentioned", "funds_mentioned",
+                     "companies_mentioned", "keywords")
+        with path.open(encoding="utf-8", newline="") as f:
+            rows = [{k: ([s for s in v.split(", ") if s] if k in list_cols else v) for k, v in row.items()}
+                    for row in csv.DictReader(f)]
+    return rows, {r["url"]: r for r in rows if r.get("url")}
+
+
+def _enriched_path(data_dir: Path) -> Path:
+    """enriched_news.jsonl, or the .csv while only that one exists."""
+    jsonl = data_dir / "enriched_news.jsonl"
+    if not jsonl.exists() and (data_dir / "enriched_news.csv").exists():
+        return data_dir / "enriched_news.csv"
+    return jsonl
+
+
+class Outputs:
+    """The pipeline outputs the API serves, kept warm."""
+
+    def __init__(self, data_dir: Path = DATA_DIR):
+        self.digest   = Source(data_dir / "news_filtered_for_companies_of_interest.json", json_codec.load_file, {})
+        self.archive  = Source(data_dir / "all_news.json", ArchiveReader)
+        self.enriched = Source(lambda: _enriched_path(data_dir), _load_enriched, ([], {}))
+        self._resolver = None
+
+    def entities_of(self, art: Article) -> Iterable[str]:
+        if art.platforms_mentioned:
+            return art.platforms_mentioned
+        if self._resolver is None:
+            from entities import load_resolver
+            self._resolver = load_resolver()
+        return self._resolver.mentions(art.text)
+
+
+# ───────────────────────── queries ───────────────────────
+def _day_param(q: dict, name: str) -> str | None:
+    value = q.get(name)
+    if value is not None and not DAY_RX.match(value):
+        raise BadRequest(f"{name} must be YYYY-MM-DD")
+    return value
+
+
+def _limit(q: dict) -> int | None:
+    try:
+        limit = int(q["limit"]) if "limit" in q else None
+    except ValueError:
+        raise BadRequest("limit must be an integer") from None
+    if limit is not None and limit < 0:
+        raise BadRequest("limit must not be negative")
+    return limit
+
+
+def articles(out: Outputs, q: dict) -> Iterator[dict]:
+    reader: ArchiveReader | None = out.archive.get()
+    if reader is None:
+        return iter(())
+    first, last = _day_param(q, "from"), _day_param(q, "to")
+    entity, source = q.get("entity"), q.get("source")
+    if first or last:
+        days = [d for d in reversed(reader.days()) if (first or "") <= d <= (last or "9999")]
+        found: Iterable[Article] = (a for d in days for a in reader.day(d))
+    else:
+        found = reader
+    if source:
+        found = (a for a in found if a.source == source)
+    if entity:
+        found = (a for a in found if entity in out.entities_of(a))
+    return islice((a.to_dict() for a in found), _limit(q))
+
+
+def enriched(out: Outputs, q: dict) -> Iterator[dict]:
+    first, last = _day_param(q, "from"), _day_param(q, "to")
+    url, entity, category = q.get("url"), q.get("entity"), q.get("category")
+    rows, by_url = out.enriched.get()
+    if url:
+        rows = [by_url[url]] if url in by_url else []
+    if first or last:
+        rows = (r for r in rows if r.get("date") and (first or "") <= r["date"] <= (last or "9999"))
+    if category:
+        rows = (r for r in rows if r.get("category") == category)
+    if entity:
+        rows = (r for r in rows if entity in r.get("platforms_mentioned", ())
+                or entity in r.get("companies_mentioned", ()) or entity in r.get("competitors_mentioned", ())
+                or entity in r.get("funds_mentioned", ()))
+    return islice(rows, _limit(q))
+
+
+class Route:
+    """A GET endpoint: *handler*(outputs, query, *path args) → a JSON value or an iterator of rows."""
+
+    def __init__(self, pattern: str, handler: Callable, sources: Callable[[Outputs], list[Source]]):
+        self.rx      = re.compile(pattern)
+        self.handler = handler
+        self.sources = sources
+
+
+def _digest_day(out: Outputs, q: dict, day: str) -> Any:
+    entry = out.digest.get().get(day)
+    if entry is None:
+        raise LookupError(f"no digest for {day}")
+    return {"day": day, **entry}
+
+
+ROUTES = [
+    Route(r"^/health$", lambda out, q: {"ok": True}, lambda out: []),
+    Route(r"^/digest$", lambda out, q: sorted(out.digest.get()), lambda out: [out.digest]),
+    Route(r"^/digest/(\d{4}-\d{2}-\d{2})$", _digest_day, lambda out: [out.digest]),
+    Route(r"^/articles$", articles, lambda out: [out.archive]),
+    Route(r"^/enriched$", enriched, lambda out: [out.enriched]),
+]
+
+
+# ───────────────────────── response cache ────────────────
+class LruCache:
+    """Thread-safe LRU of key → (etag, body)."""
+
+    def __init__(self, entries: int = CACHE_ENTRIES):
+        self.entries = entries
+        self._items: OrderedDict[str, tuple[str, bytes]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key: str, etag: str) -> bytes | None:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None or item[0] != etag:     # the source files changed since
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def put(self, key: str, etag: str, body: bytes) -> None:
+        with self._lock:
+            self._items[key] = (etag, body)
+            self._items.move_to_end(key)
+            while len(self._items) > self.entries:
+                self._items.popitem(last=False)
+
+
+def _json_rows(rows: Iterator[Any]) -> Iterator[bytes]:
+    """A JSON array, one element at a time."""
+    yield b"["
+    for i, row in enumerate(rows):
+        yield (b",\n" if i else b"\n") + json_codec.dumps(row, indent=None, ensure_ascii=False)
+    yield b"\n]\n"
+
+
+# ───────────────────────── server ────────────────────────
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"            # keep-alive + chunked responses
+    disable_nagle_algorithm = True           # headers and body go out as separate writes
+    outputs: Outputs
+    cache:   LruCache
+
+    def do_GET(self) -> None:
+        self._streaming = False
+        try:
+            self._get()
+        except Exception:
+            traceback.print_exc(file=sys.stderr)
+            if self._streaming:             # the 200 is out – cut the response short
+                self.close_connection = True
+            else:
+                self._error(500, "internal server error")
+
+    def _get(self) -> None:
+        url = urlsplit(self.path)
+        q = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        for route in ROUTES:
+            m = route.rx.match(url.path)
+            if m:
+                break
+        else:
+            return self._error(404, f"no endpoint {url.path}")
+
+        sources = route.sources(self.outputs)
+        for s in sources:
+            s.get()                                  # reload first, so the ETag matches the data
+        key  = f"{url.path}?{sorted(q.items())}"
+        etag = '"' + hashlib.sha1(f"{key}|{[s.stamp for s in sources]}".encode()).hexdigest()[:20] + '"'
+        if etag in (self.headers.get("If-None-Match") or ""):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body = self.cache.get(key, etag)
+        if body is not None:
+            return self._send(body, etag, cache="hit")
+        try:
+            result = route.handler(self.outputs, q, *m.groups())
+            chunks = _json_rows(result) if isinstance(result, Iterator) else iter([json_codec.dumps(result, indent=None, ensure_ascii=False)])
+            self._respond(key, etag, chunks)
+        except BadRequest as exc:
+            self._error(400, str(exc))
+        except LookupError as exc:
+            self._error(404, str(exc))
+
+    def _respond(self, key: str, etag: str, chunks: Iterator[bytes]) -> None:
+        """Buffer up to CACHE_MAX_BODY (then cache); past that, stream the rest chunked."""
+        buf, size = [], 0
+        for chunk in chunks:
+            buf.append(chunk)
+            size += len(chunk)
+            if size > CACHE_MAX_BODY:
+                break
+        else:
+            body = b"".join(buf)
+            self.cache.put(key, etag, body)
+            return self._send(body, etag, cache="miss")
+
+        self._streaming = True
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("ETag", etag)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        pending, size = buf, size
+        for chunk in chunks:
+            pending.append(chunk)
+            size += len(chunk)
+            if size >= STREAM_CHUNK:
+                self._chunk(b"".join(pending))
+                pending, size = [], 0
+        if pending:
+            self._chunk(b"".join(pending))
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+    def _send(self, body: bytes, etag: str, cache: str, status: int = 200) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("X-Cache", cache)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status: int, message: str) -> None:
+        self._send(json_codec.dumps({"error": message}, indent=None), "", cache="none", status=status)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def make_server(port: int, data_dir: Path = DATA_DIR, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    handler = type("BoundHandler", (Handler,), {"outputs": Outputs(data_dir), "cache": LruCache()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+# ───────────────────────── benchmark ─────────────────────
+def _pct(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def bench(requests: int, clients: int, data_dir: Path = DATA_DIR) -> None:
+    """Requests/s and latency percentiles of a mixed query load from local keep-alive clients."""
+    server = make_server(0, data_dir)
+    port = server.server_address[1]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    out = server.RequestHandlerClass.outputs
+
+    reader = out.archive.get()
+    days = sorted(out.digest.get())[-30:] or ["2025-01-01"]
+    arch_days = reader.days()[-30:] if reader is not None else []
+    sources = sorted({a.source for d in arch_days[-3:] for a in reader.day(d)}) if reader is not None else []
+    urls = list(out.enriched.get()[1])[-200:]
+    entities = sorted({e for d in days for a in out.digest.get()[d].get("articles", []) for e in a["platforms_mentioned"]})
+    paths = ([f"/digest/{d}" for d in days] + ["/digest"]
+             + [f"/articles?{urlencode({'from': d, 'to': d, 'limit': 50})}" for d in arch_days]
+             + [f"/articles?{urlencode({'source': s, 'limit': 20})}" for s in sources[:20]]
+             + [f"/articles?{urlencode({'entity': e, 'limit': 20})}" for e in entities[:20]]
+             + [f"/enriched?{urlencode({'url': u})}" for u in urls[:100]]
+             + [f"/enriched?{urlencode({'entity': e, 'limit': 20})}" for e in entities[:20]])
+    print(f"{len(paths)} distinct queries, {requests} requests, {clients} client(s)")
+
+    def client(n: int, seed: int, lat: list[float], revalidate: bool) -> None:
+        conn = http.client.HTTPConnection("127.0.0.1", port)
+        etags: dict[str, str] = {}
+        for i in range(n):
+            path = paths[(seed + i * 7919) % len(paths)]
+            headers = {"If-None-Match": etags[path]} if revalidate and path in etags else {}
+            t0 = time.perf_counter()
+            conn.request("GET", path, headers=headers)
+            resp = conn.getresponse()
+            resp.read()
+            lat.append(time.perf_counter() - t0)
+            if resp.status not in (200, 304, 404):
+                raise RuntimeError(f"{path}: HTTP {resp.status}")
+            if resp.getheader("ETag"):
+                etags[path] = resp.getheader("ETag")
+        conn.close()
+
+    for label, revalidate in (("cold + warm LRU", False), ("If-None-Match", True)):
+        lat: list[list[float]] = [[] for _ in range(clients)]
+        threads = [threading.Thread(target=client, args=(requests // clients, c * 31, lat[c], revalidate))
+                   for c in range(clients)]
+        t0 = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - t0
+        all_lat = [x for part in lat for x in part]
+        print(f"{label:<16} {len(all_lat) / elapsed:8.0f} req/s   p50 {statistics.median(all_lat) * 1e3:6.2f} ms   "
+              f"p99 {_pct(all_lat, .99) * 1e3:6.2f} ms")
+    cache = server.RequestHandlerClass.cache
+    print(f"LRU hit rate {cache.hits / max(cache.hits + cache.misses, 1):.0%}")
+    server.shutdown()
+
+
+# ───────────────────────── CLI ───────────────────────────
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Serve the pipeline outputs over a local read-only HTTP API.")
+    ap.add_argument("--port", type=int, default=8766)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--bench", type=int, metavar="N", help="run N requests against a local server and exit")
+    ap.add_argument("--clients", type=int, default=4, help="concurrent benchmark clients (default 4)")
+    args = ap.parse_args()
+
+    if args.bench:
+        bench(args.bench, args.clients)
+        return
+    server = make_server(args.port, host=args.host)
+    print(f"Serving {DATA_DIR} on http://{args.host}:{args.port}/ – Ctrl-C to stop.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+retention.py – Retention and compaction for data/.
+
+Every fetch leaves pretty-printed JSON in data/ that is committed on each run
+and globbed + parsed by later stages. This keeps that working set small
+without deleting anything the quarterly archives do not already hold:
+
+    fold     – hourly finanzen_<day>_HHMM.json shards of days at least
+               --fold-after days old are folded into finanzen_<day>.json
+               (same dedupe as combine_finanzen_daily.py), even for days the
+               daily combine missed
+    compact  – news_<day>.json / finanzen_<day>.json older than --keep-days
+               move into data/archive/daily_<YYYY>_Qn.jsonl.gz: gzip'ed JSON
+               lines, one {"file", "items"} line per day file, sorted by
+               name. Segments are written with a zero gzip mtime, so an
+               unchanged segment is byte-identical and never shows up in git.
+    trim     – optional (--all-news-days): all_news.json keeps only the last
+               N days (undated articles stay). The quarter files keep
+               everything; the dedupe index keeps the trimmed keys, so they
+               are not merged back in.
+
+data/archive/index.json is the per-entity index of the segments (segment →
+day file → article count, and entity → day file → mentions), updated in the
+same run as the segments. `mentions()` answers "which compacted days mention
+X" without opening a segment; `restore()` writes a compacted day back.
+
+Re-running after an interruption is safe: a day file that is already in its
+segment is merged with it (deduped), not duplicated.
+
+    python scripts/retention.py --dry-run
+    python scripts/retention.py --keep-days 5 --all-news-days 90
+    python scripts/retention.py --restore 2025-06-17
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import re
+import sys
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from pathlib import Path
+
+import archive_order
+import json_codec
+from archive_order import get_quarter_str
+from article import Article
+from combine_finanzen_daily import combine_day, unique_key
+from dedupe_index import DedupeIndex
+from durable_io import atomic_open, atomic_write_json
+
+# ───────────────────────── paths & policy ────────────────
+REPO_ROOT   = Path(__file__).resolve().parent.parent
+DATA_DIR    = REPO_ROOT / "data"
+ARCHIVE_DIR = DATA_DIR / "archive"
+INDEX_FILE  = ARCHIVE_DIR / "index.json"
+
+INDEX_VERSION = 1
+
+KEEP_DAYS  = 5          # day files younger than this stay in data/ (the old cleanup's window)
+FOLD_AFTER = 1          # hourly shards are folded once their day is over
+
+DAY_FILE_RX = re.compile(r"^(?:news|finanzen)_(\d{4}-\d{2}-\d{2})\.json$")
+SHARD_RX    = re.compile(r"^finanzen_(\d{4}-\d{2}-\d{2})_\d{4}\.json$")
+
+
+def segment_name(day: str) -> str:
+    """Segment holding the day files of *day*'s quarter, e.g. daily_2025_Q2.jsonl.gz."""
+    return f"daily_{get_quarter_str(date.fromisoformat(day))}.jsonl.gz"
+
+
+# ───────────────────────── segments ──────────────────────
+def read_segment(path: Path) -> dict[str, list]:
+    """day file name → its items, for one segment (empty if missing)."""
+    if not path.exists():
+        return {}
+    with gzip.open(path, "rb") as f:
+        return {rec["file"]: rec["items"] for rec in map(json_codec.loads, f)}
+
+
+def write_segment(path: Path, files: dict[str, list]) -> None:
+    with atomic_open(path, "wb") as out, gzip.GzipFile(filename="", mode="wb", fileobj=out, mtime=0) as gz:
+        for name in sorted(files):
+            gz.write(json_codec.dumps({"file": name, "items": files[name]}, indent=None, ensure_ascii=False))
+            gz.write(b"\n")
+
+
+def _merged(old: list, new: list) -> list:
+    # a day file compacted before (interrupted run, late backfill) – keep both, deduped
+    seen = {unique_key(Article.from_dict(d)) for d in old if isinstance(d, dict)}
+    out = list(old)
+    for d in new:
+        key = unique_key(Article.from_dict(d)) if isinstance(d, dict) else None
+        if key is None or key not in seen:
+            seen.add(key)
+            out.append(d)
+    return out
+
+
+def _segment_entry(files: dict[str, list]) -> dict:
+    entities: dict[str, Counter] = defaultdict(Counter)
+    for name, items in files.items():
+        for d in items:
+            if isinstance(d, dict):
+                for entity in set(d.get("platforms_mentioned") or ()):
+                    entities[entity][name] += 1
+    return {
+        "files":    {name: len(files[name]) for name in sorted(files)},
+        "entities": {e: dict(sorted(c.items())) for e, c in sorted(entities.items())},
+    }
+
+
+# ───────────────────────── entity index ──────────────────
+def load_index(index_file: Path = INDEX_FILE) -> dict:
+    try:
+        stored = json_codec.load_file(index_file)
+    except FileNotFoundError:
+        stored = {}
+    return stored if stored.get("version") == INDEX_VERSION else {"version": INDEX_VERSION, "segments": {}}
+
+
+def mentions(entity: str, index_file: Path = INDEX_FILE) -> dict[str, int]:
+    """Compacted day file → number of its articles mentioning *entity*."""
+    out: dict[str, int] = {}
+    for seg in load_index(index_file)["segments"].values():
+        out.update(seg["entities"].get(entity, {}))
+    return dict(sorted(out.items()))
+
+
+def restore(day: str, data_dir: Path = DATA_DIR, archive_dir: Path = ARCHIVE_DIR) -> list[Path]:
+    """Write the compacted day files of *day* back to *data_dir*; returns the files written."""
+    written = []
+    for name, items in read_segment(archive_dir / segment_name(day)).items():
+        if DAY_FILE_RX.match(name).group(1) == day:
+            atomic_write_json(data_dir / name, items, indent=2, ensure_ascii=False)
+            written.append(data_dir / name)
+    return written
+
+
+# ───────────────────────── report ────────────────────────
+@dataclass
+class Report:
+    folded:    list[str] = field(default_factory=list)
+    compacted: list[str] = field(default_factory=list)
+    trimmed:   int = 0
+    freed:     int = 0           # bytes removed from data/ (net of what was written)
+
+    def print(self, before: tuple[int, int], after: tuple[int, int], dry_run: bool) -> None:
+        if dry_run:
+            for name in self.folded:
+                print(f"would fold     {name}")
+            for name in self.compacted:
+                print(f"would compact  {name}")
+            if self.trimmed:
+                print(f"would trim     {self.trimmed} article(s) from all_news.json")
+            return
+        print(f"Folded {len(self.folded)} hourly shard(s), compacted {len(self.compacted)} day file(s)"
+              + (f", trimmed {self.trimmed} article(s) from all_news.json." if self.trimmed else "."))
+        print(f"Reclaimed {self.freed / 1e6:.2f} MB. "
+              f"Working set: {before[0]} files / {before[1] / 1e6:.2f} MB → "
+              f"{after[0]} files / {after[1] / 1e6:.2f} MB.")
+
+
+def working_set(data_dir: Path) -> tuple[int, int]:
+    """Number and total size of the top-level data/*.json files later stages glob."""
+    files = list(data_dir.glob("*.json"))
+    return len(files), sum(f.stat().st_size for f in files)
+
+
+def _size(path: Path) -> int:
+    return path.stat().st_size if path.exists() else 0
+
+
+# ───────────────────────── policies ──────────────────────
+def fold_shards(data_dir: Path, today: date, fold_after: int, report: Report, dry_run: bool) -> None:
+    cutoff = (today - timedelta(days=fold_after)).isoformat()
+    days = sorted({m.group(1) for p in data_dir.glob("finanzen_*_*.json")
+                   if (m := SHARD_RX.match(p.name)) and m.group(1) <= cutoff})
+    for day in days:
+        daily  = data_dir / f"finanzen_{day}.json"
+        shards = sorted(p for p in data_dir.glob(f"finanzen_{day}_*.json") if SHARD_RX.match(p.name))
+        before = _size(daily) + sum(_size(p) for p in shards)
+        if dry_run:
+            report.folded += [p.name for p in shards]
+            continue
+        parts, _ = combine_day(data_dir, day)
+        report.folded += [p.name for p in parts]
+        report.freed  += before - _size(daily) - sum(_size(p) for p in shards)
+
+
+def compact_days(data_dir: Path, archive_dir: Path, today: date, keep_days: int,
+                 report: Report, dry_run: bool) -> None:
+    cutoff = (today - timedelta(days=keep_days)).isoformat()
+    by_segment: dict[str, list[Path]] = defaultdict(list)
+    for p in sorted(data_dir.glob("*_*.json")):
+        m = DAY_FILE_RX.match(p.name)
+        if m and m.group(1) < cutoff:
+            by_segment[segment_name(m.group(1))].append(p)
+    if not by_segment:
+        return
+
+    index = load_index(archive_dir / "index.json")
+    for seg_name, day_files in sorted(by_segment.items()):
+        seg_path = archive_dir / seg_name
+        freed = _size(seg_path) + sum(_size(p) for p in day_files)
+        report.compacted += [p.name for p in day_files]
+        if dry_run:
+            continue
+
+        files = read_segment(seg_path)
+        for p in day_files:
+            items = json_codec.load_file(p)
+            if not isinstance(items, list):
+                sys.exit(f"Error: '{p}' is not a JSON list; refusing to compact it.")
+            files[p.name] = _merged(files[p.name], items) if p.name in files else items
+        write_segment(seg_path, files)
+        index["segments"][seg_name] = _segment_entry(files)
+        atomic_write_json(archive_dir / "index.json", index, indent=2, ensure_ascii=False)
+
+        # only once segment + index are on disk
+        for p in day_files:
+            p.unlink()
+        report.freed += freed - _size(seg_path)
+
+
+def trim_all_news(path: Path, today: date, days: int, report: Report, dry_run: bool) -> None:
+    if not path.exists() or not archive_order.is_array(path):
+        return
+    cutoff = (today - timedelta(days=days)).toordinal()
+
+    def recent(item: Article) -> bool:
+        ts = archive_order.sort_key(item)
+        return not ts or date.fromtimestamp(ts).toordinal() >= cutoff
+
+    total = kept = 0
+    for item in archive_order.iter_archive(path):
+        total += 1
+        kept  += recent(item)
+    if kept == total:
+        return
+    report.trimmed += total - kept
+    if dry_run:
+        return
+
+    before   = _size(path)
+    count    = archive_order.sorted_count(path)
+    with DedupeIndex(path) as index:
+        was_current = index.current
+        archive_order.write_stream(path, (a for a in archive_order.iter_archive(path) if recent(a)))
+        if count is not None:                       # filtering keeps the order
+            archive_order.mark_sorted(path, kept)
+        if was_current:                             # trimmed keys stay known
+            index.save()
+    report.freed += before - _size(path)
+
+
+def run(data_dir: Path = DATA_DIR, archive_dir: Path = ARCHIVE_DIR, today: date | None = None,
+        keep_days: int = KEEP_DAYS, fold_after: int = FOLD_AFTER, all_news_days: int | None = None,
+        dry_run: bool = False) -> Report:
+    """Apply the retention policies to *data_dir* and print what was reclaimed."""
+    today  = today or date.today()
+    report = Report()
+    before = working_set(data_dir)
+    fold_shards(data_dir, today, fold_after, report, dry_run)
+    compact_days(data_dir, archive_dir, today, keep_days, report, dry_run)
+    if all_news_days is not None:
+        trim_all_news(data_dir / "all_news.json", today, all_news_days, report, dry_run)
+    report.print(before, working_set(data_dir), dry_run)
+    return report
+
+
+# ───────────────────────── CLI ───────────────────────────
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Fold, compact and trim the JSON files in data/.")
+    ap.add_argument("--keep-days", type=int, default=KEEP_DAYS,
+                    help=f"day files older than this are compacted (default {KEEP_DAYS})")
+    ap.add_argument("--fold-after", type=int, default=FOLD_AFTER,
+                    help=f"fold hourly shards of days at least this old (default {FOLD_AFTER})")
+    ap.add_argument("--all-news-days", type=int, metavar="N",
+                    help="keep only the last N days in all_news.json (default: keep all)")
+    ap.add_argument("--dry-run", action="store_true", help="report what would change, change nothing")
+    ap.add_argument("--restore", metavar="DAY", help="write the compacted files of DAY back to data/")
+    ap.add_argument("--mentions", metavar="ENTITY", help="compacted day files mentioning ENTITY")
+    args = ap.parse_args()
+
+    if args.restore:
+        written = restore(args.restore)
+        if not written:
+            sys.exit(f"No compacted files for {args.restore}.")
+        for p in written:
+            print(f"Restored {p.name}")
+        return
+    if args.mentions:
+        for name, n in mentions(args.mentions).items():
+            print(f"{n:>6}  {name}")
+        return
+    run(keep_days=args.keep_days, fold_after=args.fold_after,
+        all_news_days=args.all_news_days, dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+sentiment.py – Cached, multi-core TextBlob sentiment.
+
+analyze_news.py used to build a TextBlob for every article on every nightly
+run, although most texts never change and many recur verbatim (finanzen.net
+keyword lists, syndicated wire copy). `SentimentService`
+    • keys each text by sha1(lang + text) and keeps its polarity in
+      data/.cache/sentiment_cache.json; the label is derived from the
+      current thresholds on lookup, so changing them needs no rescoring
+    • drops the whole cache when the model fingerprint (TextBlob /
+      textblob-de version) changes
+    • scores cache misses in chunks across a process pool
+
+    python scripts/sentiment.py --bench data/all_news.json
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from importlib import metadata
+from pathlib import Path
+
+import textblob
+from textblob import TextBlob
+try:
+    from textblob_de import TextBlobDE      # optional German sentiment model
+except ImportError:
+    TextBlobDE = None
+
+import json_codec
+from durable_io import atomic_write_json
+from language import PerLanguage
+
+# ───────────────────────── paths & tuning ────────────────
+REPO_ROOT  = Path(__file__).resolve().parent.parent
+CACHE_FILE = REPO_ROOT / "data" / ".cache" / "sentiment_cache.json"
+
+POSITIVE_THRESHOLD =  0.1
+NEGATIVE_THRESHOLD = -0.1
+
+PARALLEL_MIN = 500      # fewer misses than this are scored in-process
+CHUNK_SIZE   = 250
+
+
+def _version(dist: str) -> str:
+    try:
+        return metadata.version(dist)
+    except metadata.PackageNotFoundError:
+        return "-"
+
+
+# changes whenever a cached polarity could differ
+MODEL_FINGERPRINT = (f"textblob={getattr(textblob, '__version__', _version('textblob'))};"
+                     f"textblob-de={_version('textblob-de') if TextBlobDE else '-'}")
+
+
+# ───────────────────────── scoring ───────────────────────
+def _sentiment_model(lang):
+    if lang == "en":
+        return TextBlob
+    if lang == "de" and TextBlobDE is not None:
+        return TextBlobDE
+    raise LookupError(lang)        # → PerLanguage falls back to English
+
+# one sentiment model per language (see language.py)
+sentiment_models = PerLanguage(_sentiment_model)
+
+
+def polarity(text: str, lang: str | None = "en") -> float:
+    return sentiment_models[lang](text).sentiment.polarity
+
+
+def label_for(polarity: float) -> str:
+    if polarity > POSITIVE_THRESHOLD:
+        return 'positive'
+    elif polarity < NEGATIVE_THRESHOLD:
+        return 'negative'
+    return 'neutral'
+
+
+def _score_chunk(chunk: list[tuple[str, str | None]]) -> list[float]:
+    return [polarity(text, lang) for text, lang in chunk]
+
+
+def text_key(text: str, lang: str | None) -> str:
+    return hashlib.sha1(f"{lang or 'en'}\0{text}".encode("utf-8")).hexdigest()[:20]
+
+
+# ───────────────────────── service ───────────────────────
+class SentimentService:
+    def __init__(self, cache_file: Path = CACHE_FILE, workers: int | None = None):
+        self.cache_file = cache_file
+        self.workers    = workers or os.cpu_count() or 1
+        self.hits = self.misses = 0
+        try:
+            stored = json_codec.load_file(cache_file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            stored = {}
+        self._cache: dict[str, float] = (
+            stored.get("polarity", {}) if stored.get("model") == MODEL_FINGERPRINT else {}
+        )
+        self._dirty = False
+
+    def score_many(self, items: list[tuple[str, str | None]]) -> list[tuple[str, float]]:
+        """(text, lang) pairs → (label, polarity), in order."""
+        keys = [text_key(text, lang) for text, lang in items]
+
+        todo: dict[str, tuple[str, str | None]] = {}
+        for key, item in zip(keys, items):
+            if key not in self._cache and key not in todo:
+                todo[key] = item
+        self.misses += len(todo)                 # repeats within the batch are scored once
+        self.hits   += len(keys) - len(todo)
+
+        if todo:
+            pending = list(todo.items())
+            if len(pending) < PARALLEL_MIN or self.workers <= 1:
+                scores = _score_chunk([item for _, item in pending])
+            else:
+                chunks = [[item for _, item in pending[i:i + CHUNK_SIZE]]
+                          for i in range(0, len(pending), CHUNK_SIZE)]
+                with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                    scores = [s for part in pool.map(_score_chunk, chunks) for s in part]
+            for (key, _), score in zip(pending, scores):
+                self._cache[key] = score
+            self._dirty = True
+
+        return [(label_for(self._cache[k]), self._cache[k]) for k in keys]
+
+    def score(self, text: str, lang: str | None = "en") -> tuple[str, float]:
+        return self.score_many([(text, lang)])[0]
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def save(self) -> None:
+        if self._dirty:
+            atomic_write_json(self.cache_file, {"model": MODEL_FINGERPRINT, "polarity": self._cache},
+                              indent=None)
+            self._dirty = False
+
+
+# ───────────────────────── benchmark ─────────────────────
+def bench(path: str) -> None:
+    """Cold vs. warm throughput and hit rate on one archive (cache kept separate)."""
+    from archive_reader import ArchiveReader
+    from language import tag_languages
+
+    with ArchiveReader(path) as archive:
+        articles = tag_languages(archive)
+    items = [(a.content, a.lang) for a in articles]
+    tmp   = CACHE_FILE.with_name("sentiment_bench.json")
+    tmp.unlink(missing_ok=True)
+
+    for run in ("cold", "warm"):
+        svc = SentimentService(tmp)
+        t0  = time.perf_counter()
+        svc.score_many(items)
+        dt  = time.perf_counter() - t0
+        svc.save()
+        print(f"{run:<5} {len(items)} articles in {dt:6.2f}s  {len(items) / dt:9.0f} articles/s  "
+              f"hit rate {svc.hit_rate:.1%}  ({len(svc._cache)} distinct texts)")
+    tmp.unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args[:1] != ["--bench"] or len(args) != 2:
+        sys.exit("usage: python scripts/sentiment.py --bench data/all_news.json")
+    bench(args[1])
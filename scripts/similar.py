@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+similar.py – "Related coverage" lookup over the archive without a scan.
+
+Every article of all_news.json is encoded as a fixed-size hashed
+bag-of-words vector: title + content tokens (keyword_engine.tokenize; the
+title counts twice) are hashed into DIM signed buckets, log-scaled,
+L2-normalised and quantised to int8. The vectors are appended to a flat
+file that queries memory-map, so the index never has to fit in RAM:
+
+    data/.cache/similar/<archive>.vec    – int8 rows × DIM
+    data/.cache/similar/<archive>.meta   – one JSON line per row:
+                                           [url, title, day, source]
+    data/.cache/similar/<archive>.off    – int64 byte offset of each line
+    data/.cache/similar/<archive>.json   – row count + the archive's stamp
+
+A query is encoded the same way and scored against the rows in blocks of
+QUERY_BLOCK with one matrix-vector product each (cosine similarity); the
+top k of every block are merged. merge_news.py appends the new articles of
+every batch; if the archive changed behind the index's back (or on a fresh
+checkout) it is rebuilt from the archive. Everything runs locally on CPU.
+
+    python scripts/similar.py "Bondora raises funding" -k 5
+    python scripts/similar.py --url https://… -k 10
+    python scripts/similar.py --bench 100000 1000000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import zlib
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Sequence
+
+import numpy as np
+
+import archive_order
+import json_codec
+from article import Article
+from durable_io import atomic_write_json, content_stamp
+from keyword_engine import tokenize
+
+# ───────────────────────── paths & tuning ────────────────
+REPO_ROOT = Path(__file__).resolve().parent.parent
+INDEX_DIR = REPO_ROOT / "data" / ".cache" / "similar"
+
+INDEX_VERSION = 1
+DIM           = 256             # hashed buckets per vector (int8 → DIM bytes per article)
+TITLE_WEIGHT  = 2               # title tokens are counted this many times
+QUERY_BLOCK   = 1 << 16         # rows per matrix-vector product
+ENCODE_BATCH  = 10_000          # articles encoded per append on rebuild
+
+_buckets: dict[str, int] = {}   # token → signed bucket (+/- (bucket + 1)), memoised
+
+
+def _bucket(token: str) -> int:
+    b = _buckets.get(token)
+    if b is None:
+        h = zlib.crc32(token.encode("utf-8"))
+        b = _buckets[token] = (h % DIM + 1) * (1 if h & 0x8000_0000 else -1)
+    return b
+
+
+def encode(texts: Sequence[tuple[str, str]], langs: Sequence[str | None] | None = None) -> np.ndarray:
+    """int8 vectors (len(texts) × DIM) of (title, content) pairs."""
+    langs = langs or [None] * len(texts)
+    rows, cols = [], []
+    for i, ((title, content), lang) in enumerate(zip(texts, langs)):
+        tokens = tokenize(title or "", lang) * TITLE_WEIGHT + tokenize(content or "", lang)
+        cols.extend(_bucket(t) for t in tokens)
+        rows.extend([i] * len(tokens))
+    cols = np.asarray(cols, dtype=np.int64)
+    m = np.zeros((len(texts), DIM), dtype=np.float32)
+    np.add.at(m, (np.asarray(rows, dtype=np.int64), np.abs(cols) - 1), np.sign(cols).astype(np.float32))
+
+    m = np.sign(m) * np.log1p(np.abs(m))
+    norms = np.linalg.norm(m, axis=1, keepdims=True)
+    m /= np.where(norms > 0, norms, 1)
+    return np.round(m * 127).astype(np.int8)
+
+
+def encode_articles(articles: Sequence[Article]) -> np.ndarray:
+    return encode([(a.title, a.content) for a in articles], [a.lang for a in articles])
+
+
+# ───────────────────────── index ─────────────────────────
+class SimilarIndex:
+    """Append-only hashed-vector index for one archive file (see module docstring)."""
+
+    def __init__(self, archive: str | os.PathLike, index_dir: Path = INDEX_DIR):
+        self.archive = Path(archive)
+        index_dir.mkdir(parents=True, exist_ok=True)
+        base = index_dir / self.archive.stem
+        self.vec_path, self.meta_path, self.off_path, self.head_path = (
+            base.with_suffix(s) for s in (".vec", ".meta", ".off", ".json"))
+        try:
+            head = json_codec.load_file(self.head_path)
+            if head.get("version") != INDEX_VERSION or head.get("dim") != DIM:
+                raise ValueError("layout changed")
+            self.count, stamp = head["count"], head["stamp"]
+        except (FileNotFoundError, ValueError, KeyError, json.JSONDecodeError):
+            self.count, stamp = 0, None
+        self.current = stamp is not None and stamp == content_stamp(self.archive)
+        self._truncate()
+
+    def _truncate(self) -> None:
+        """Drop rows appended after the last save (an interrupted run)."""
+        offsets = self._offsets()
+        meta_end = int(offsets[self.count]) if self.count < len(offsets) else None
+        for path, size in ((self.vec_path, self.count * DIM), (self.off_path, self.count * 8),
+                           (self.meta_path, meta_end)):
+            if path.exists() and size is not None and path.stat().st_size > size:
+                os.truncate(path, size)
+            elif not path.exists():
+                path.touch()
+
+    def _offsets(self) -> np.ndarray:
+        if not self.off_path.exists() or not self.off_path.stat().st_size:
+            return np.zeros(0, dtype=np.int64)
+        return np.fromfile(self.off_path, dtype=np.int64)
+
+    def reset(self) -> None:
+        self.count = 0
+        for path in (self.vec_path, self.meta_path, self.off_path):
+            path.write_bytes(b"")
+        self.current = True
+
+    def add(self, articles: Sequence[Article]) -> None:
+        """Append *articles* (call save() to make them count)."""
+        if not articles:
+            return
+        vectors = encode_articles(articles)
+        lines   = [json_codec.dumps([a.url, a.title, a.day, a.source], indent=None, ensure_ascii=False) + b"\n"
+                   for a in articles]
+        start   = self.meta_path.stat().st_size
+        offsets = start + np.cumsum([0] + [len(l) for l in lines[:-1]], dtype=np.int64)
+        with self.vec_path.open("ab") as v, self.meta_path.open("ab") as m, self.off_path.open("ab") as o:
+            v.write(vectors.tobytes())
+            m.write(b"".join(lines))
+            o.write(offsets.tobytes())
+        self.count += len(articles)
+
+    def rebuild(self) -> None:
+        """Re-encode the whole archive."""
+        self.reset()
+        if not self.archive.exists() or not archive_order.is_array(self.archive):
+            return
+        articles = archive_order.iter_archive(self.archive)
+        while batch := list(islice(articles, ENCODE_BATCH)):
+            self.add(batch)
+
+    def save(self) -> None:
+        """Flush the rows and stamp them with the archive as it is now on disk."""
+        for path in (self.vec_path, self.meta_path, self.off_path):
+            with path.open("rb+") as f:
+                os.fsync(f.fileno())
+        atomic_write_json(self.head_path, {"version": INDEX_VERSION, "dim": DIM, "count": self.count,
+                                           "stamp": content_stamp(self.archive)}, indent=None)
+        self.current = True
+
+    # ── queries ───────────────────────────────────────────
+    def vectors(self) -> np.ndarray:
+        if not self.count:
+            return np.zeros((0, DIM), dtype=np.int8)
+        return np.memmap(self.vec_path, dtype=np.int8, mode="r", shape=(self.count, DIM))
+
+    def meta(self, rows: Iterable[int]) -> list[dict]:
+        offsets = np.memmap(self.off_path, dtype=np.int64, mode="r", shape=(self.count,))
+        out = []
+        with self.meta_path.open("rb") as f:
+            for r in rows:
+                f.seek(int(offsets[r]))
+                url, title, day, source = json_codec.loads(f.readline())
+                out.append({"url": url, "title": title, "day": day, "source": source})
+        return out
+
+    def search(self, query: np.ndarray, k: int = 10) -> list[tuple[int, float]]:
+        """(row, cosine) of the *k* rows most similar to the int8 vector *query*."""
+        vectors = self.vectors()
+        q = query.astype(np.float32) / (127 * 127)
+        best_rows, best_scores = [], []
+        for start in range(0, len(vectors), QUERY_BLOCK):
+            scores = vectors[start:start + QUERY_BLOCK].astype(np.float32) @ q
+            top = np.argpartition(-scores, min(k, len(scores) - 1))[:k]
+            best_rows.append(top + start)
+            best_scores.append(scores[top])
+        if not best_rows:
+            return []
+        rows, scores = np.concatenate(best_rows), np.concatenate(best_scores)
+        order = np.argsort(-scores, kind="stable")[:k]
+        return [(int(rows[i]), float(scores[i])) for i in order]
+
+    def similar(self, title: str, content: str = "", k: int = 10) -> list[dict]:
+        """Articles most similar to (*title*, *content*), best first."""
+        return self._hits(self.search(encode([(title, content)])[0], k))
+
+    def related(self, url: str, k: int = 10) -> list[dict] | None:
+        """Articles most similar to the indexed article *url* (None if it is not indexed)."""
+        row = self.find_url(url)
+        if row is None:
+            return None
+        hits = [(r, s) for r, s in self.search(self.vectors()[row], k + 1) if r != row]
+        return self._hits(hits[:k])
+
+    def _hits(self, hits: list[tuple[int, float]]) -> list[dict]:
+        return [dict(m, score=round(s, 4)) for m, (_, s) in zip(self.meta(r for r, _ in hits), hits)]
+
+    def find_url(self, url: str) -> int | None:
+        """Row of the indexed article with *url* (a linear scan of the metadata)."""
+        with self.meta_path.open("rb") as f:
+            for row, line in enumerate(islice(f, self.count)):
+                if json_codec.loads(line)[0] == url:
+                    return row
+        return None
+
+
+# ───────────────────────── benchmark ─────────────────────
+def bench(sizes: list[int]) -> None:
+    """Encoding throughput, index size and query latency at each size in *sizes*."""
+    from article import read_articles
+
+    pool = [a for p in sorted((REPO_ROOT / "data").glob("news_*.json")) for a in read_articles(p)]
+    if not pool:
+        sys.exit("no data/news_*.json articles to sample from")
+    t0 = time.perf_counter()
+    pool_vectors = encode_articles(pool)
+    t_encode = time.perf_counter() - t0
+    print(f"encode   {len(pool) / t_encode:9.0f} articles/s  ({len(pool)} real articles)")
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            archive = Path(tmp) / f"bench{n}.json"
+            archive.write_text("[]")
+            index = SimilarIndex(archive, Path(tmp) / "index")
+            # rows are encoded real articles, sampled with replacement
+            with index.vec_path.open("wb") as f:
+                for start in range(0, n, 100_000):
+                    f.write(pool_vectors[rng.integers(0, len(pool), min(100_000, n - start))].tobytes())
+            index.count = n
+            queries = pool_vectors[rng.integers(0, len(pool), 50)]
+            index.search(queries[0])                                # warm the page cache
+            t0 = time.perf_counter()
+            for q in queries:
+                index.search(q, 10)
+            t_query = (time.perf_counter() - t0) / len(queries)
+            print(f"{n:>9,} articles  index {index.vec_path.stat().st_size / (1 << 20):8.1f} MB  "
+                  f"query {t_query * 1e3:7.1f} ms (top 10)")
+
+
+# ───────────────────────── CLI ───────────────────────────
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Find archive articles similar to a text or an article.")
+    ap.add_argument("text", nargs="?", help="title / text to match")
+    ap.add_argument("--url", help="match the indexed article with this url instead")
+    ap.add_argument("-k", type=int, default=10, help="results (default 10)")
+    ap.add_argument("--archive", default=str(REPO_ROOT / "data" / "all_news.json"))
+    ap.add_argument("--bench", type=int, nargs="+", metavar="N", help="benchmark at N articles")
+    args = ap.parse_args()
+
+    if args.bench:
+        bench(args.bench)
+        return
+    if not args.text and not args.url:
+        ap.error("give a text or --url")
+
+    index = SimilarIndex(args.archive)
+    if not index.current:
+        print(f"Indexing '{args.archive}' …", file=sys.stderr)
+        index.rebuild()
+        index.save()
+    hits = index.related(args.url, args.k) if args.url else index.similar(args.text, k=args.k)
+    if hits is None:
+        sys.exit(f"{args.url} is not in the index.")
+    for hit in hits:
+        print(f"{hit['score']:.3f}  {hit['day'] or '':<10}  {(hit['source'] or '')[:20]:<20}  {hit['title']}")
+
+
+if __name__ == "__main__":
+    main()
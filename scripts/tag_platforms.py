@@ -14,11 +14,33 @@ Folder layout
 │  └─ …
 └─ scripts/
    └─ tag_platforms.py
+
+Files are rewritten atomically. Each tagged file is recorded in a stage
+journal keyed by the entity table + the input file names, together with
+the content hash it was left with, so an interrupted pass resumes with the
+first untagged file instead of starting over (a file changed since it was
+tagged is tagged again). Afterwards
+the mention index (mention_index.py) is refreshed for the archives that changed.
+
+Files are tagged in parallel by a process pool (one worker per core by
+default, `--jobs N` to override). Small daily files are one task each;
+large quarterly files are split into chunks of CHUNK_ITEMS articles. A file
+with invalid items is left untouched and reported at the end, while the
+other files are still tagged.
 """
 
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
 from pathlib import Path
-import json, re, sys
-import pandas as pd
+import argparse, hashlib, os, sys
+
+import dedupe_index
+import json_codec
+from archive_order import mark_sorted, sorted_count
+from article import Article, write_articles
+from durable_io import StageJournal, content_stamp, file_lock, fingerprint
+from entities import MASTER_CSV, load_resolver
+from mention_index import load_index
 
 # ────────────────────────────────────────────────────────────────
 # PATHS
@@ -26,91 +48,180 @@ import pandas as pd
 REPO_ROOT = Path(__file__).resolve().parent.parent
 DATA_DIR  = REPO_ROOT / "data"
 
-MASTER_CSV = DATA_DIR / "Master_Entities_Table - Originator_Platforms_Funds_and_Competitors.csv"
-
 # collect only genuine daily news files
 NEWS_GLOB = [
     p for p in DATA_DIR.glob("news_*.json")
     if "filtered_for_companies_of_interest" not in p.name        # ▼ skip digest
 ]
 
+CHUNK_ITEMS = 2_000     # files with more articles are split across workers
+
 # ────────────────────────────────────────────────────────────────
-# 1. Build alias → canonical-name map
+# 1. Shared entity matcher (see entities.py – cached, CSV-driven)
+#    Built once in the parent; workers load the pickled trie.
 # ────────────────────────────────────────────────────────────────
-df = pd.read_csv(MASTER_CSV)
+resolver = None
 
-canon_col  = next(c for c in df.columns if not c.lower().startswith("alias"))
-alias_cols = [c for c in df.columns if c.lower().startswith("alias")]
 
-alias_to_name = {
-    str(row[col]).strip().lower(): str(row[canon_col]).strip()
-    for _, row in df.iterrows()
-    for col in alias_cols
-    if str(row[col]).strip()
-}
-
-alias_regex = {
-    a: re.compile(rf"\b{re.escape(a)}\b", re.I)      # whole-word, case-insensitive
-    for a in alias_to_name
-}
+def _init_worker() -> None:
+    global resolver
+    resolver = load_resolver()
 
 # ────────────────────────────────────────────────────────────────
-# 2. Helper – validate / normalise one raw item
+# 2. Helper – validate / normalise one raw item into an Article
 # ────────────────────────────────────────────────────────────────
-def ensure_article_dict(item, file_name: str, idx: int) -> dict:
-    """Return a dict with at least one non-empty field (title or content)."""
+def ensure_article(item, file_name: str, idx: int) -> Article:
+    """Return an Article with at least one non-empty field (title or content)."""
     if not isinstance(item, dict):
         raise ValueError(f"{file_name}[{idx}] expected object, got {type(item).__name__}")
 
-    title   = (item.get("title")   or item.get("headline") or "").strip()
-    content = (item.get("content") or item.get("text")     or "").strip()
+    art = Article.from_dict(item)      # handles headline/text fallbacks
 
-    if not title and not content:
+    if not art.title and not art.content:
         raise ValueError(f"{file_name}[{idx}] missing both title AND content")
 
-    if not title:
-        title = (content[:120] + "…") if len(content) > 120 else content
-    if not content:
-        content = ""
-
-    item["title"], item["content"] = title, content
-    return item
+    if not art.title:
+        art.title = (art.content[:120] + "…") if len(art.content) > 120 else art.content
+    return art
 
 # ────────────────────────────────────────────────────────────────
-# 3. Tag every raw news file
+# 3. Worker tasks
 # ────────────────────────────────────────────────────────────────
-files_processed = 0
-articles_tagged = 0
+def tag_items(raw_items: list, file_name: str, offset: int = 0) -> tuple[list[Article], list[str]]:
+    """Tag a slice of one file → (articles, validation errors)."""
+    articles, errors = [], []
+    for idx, raw in enumerate(raw_items, start=offset):
+        try:
+            art = ensure_article(raw, file_name, idx)
+        except ValueError as err:
+            errors.append(str(err))
+            continue
+        art.platforms_mentioned = tuple(resolver.mentions(art.text))
+        articles.append(art)
+    return articles, errors
+
+
+def rewrite(news_file: Path, articles: list[Article]) -> None:
+    """
+    Write the tagged articles back. An archive known to be sorted stays marked
+    so, and a current dedupe index stays current (tagging changes no url).
+    """
+    was_sorted  = sorted_count(news_file) is not None
+    was_deduped = dedupe_index.is_current(news_file)
+    write_articles(news_file, articles, indent=2, ensure_ascii=False)
+    if was_sorted:
+        mark_sorted(news_file, len(articles))
+    if was_deduped:
+        dedupe_index.restamp(news_file)
+
+
+def tag_file(news_file: Path) -> tuple[str, int, list[str]]:
+    """Load → tag → rewrite one file → (name, articles tagged, errors)."""
+    with file_lock(news_file):          # merge_news / fetch_news may be rewriting it
+        articles, errors = tag_items(json_codec.load_file(news_file), news_file.name)
+        if errors:
+            return news_file.name, 0, errors
+        rewrite(news_file, articles)
+    return news_file.name, len(articles), []
 
-try:
+# ────────────────────────────────────────────────────────────────
+# 4. Tag every raw news file
+# ────────────────────────────────────────────────────────────────
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                    help="worker processes (default: one per core, 1 = serial)")
+    args = ap.parse_args()
+
+    files_processed = 0
+    files_skipped   = 0
+    articles_tagged = 0
+    errors: dict[str, list[str]] = {}
+
+    # not keyed on the files' bytes: tagging rewrites them, so the key would
+    # change with the first file done and an interrupted run could never resume
+    names = sorted(p.name for p in NEWS_GLOB)
+    journal = StageJournal("tag_platforms", fingerprint([MASTER_CSV]) + ":" + hashlib.sha1("\0".join(names).encode()).hexdigest()[:16])
+
+    def unit(news_file: Path) -> str:
+        return f"{news_file.name}@{content_stamp(news_file)['sha1']}"
+
+    pending = []
     for news_file in sorted(NEWS_GLOB):
-        with news_file.open(encoding="utf-8") as f:
-            raw_items = json.load(f)
-
-        articles = []
-        for idx, raw in enumerate(raw_items):
-            art = ensure_article_dict(raw, news_file.name, idx)
-
-            haystack = f"{art['title']} {art['content']}".lower()
-            matches  = {
-                alias_to_name[a]
-                for a, rgx in alias_regex.items()
-                if rgx.search(haystack)
-            }
-            art["platforms_mentioned"] = sorted(matches)
-            articles.append(art)
-
-        with news_file.open("w", encoding="utf-8") as f:
-            json.dump(articles, f, ensure_ascii=False, indent=2)
-
+        if journal.is_done(unit(news_file)):
+            files_skipped += 1
+        else:
+            pending.append(news_file)
+
+    def finished(name: str, n_tagged: int, errs: list[str]) -> None:
+        nonlocal files_processed, articles_tagged
+        if errs:
+            errors[name] = errs
+            print(f"✋  {name}: {len(errs)} invalid item(s) – file left untouched")
+            return
+        journal.mark_done(unit(DATA_DIR / name))      # as the rewrite left it
         files_processed += 1
-        articles_tagged += len(articles)
-        print(f"✅  {news_file.name}: {len(articles)} articles tagged")
-
-except ValueError as err:
-    sys.exit(f"✋  Data validation failed – {err}")
-
-if not files_processed:
-    print("⚠️  No raw news_*.json files found in data/.", file=sys.stderr)
-else:
-    print(f"\n✔️  Completed: {files_processed} file(s), {articles_tagged} articles total.")
+        articles_tagged += n_tagged
+        print(f"✅  {name}: {n_tagged} articles tagged")
+
+    _init_worker()                       # builds / refreshes the trie cache once
+    if args.jobs <= 1 or not pending:
+        for news_file in pending:
+            finished(*tag_file(news_file))
+    else:
+        # large files are read here and rewritten once all their chunks are back,
+        # so the parent holds their locks until then
+        with ProcessPoolExecutor(max_workers=args.jobs, initializer=_init_worker) as pool, ExitStack() as locks:
+            small, large = [], []
+            for news_file in pending:
+                held = ExitStack()
+                held.enter_context(file_lock(news_file))
+                raw_items = json_codec.load_file(news_file)
+                if len(raw_items) > CHUNK_ITEMS:
+                    chunks = [pool.submit(tag_items, raw_items[i:i + CHUNK_ITEMS], news_file.name, i)
+                              for i in range(0, len(raw_items), CHUNK_ITEMS)]
+                    large.append((news_file, chunks))
+                    locks.enter_context(held)
+                else:
+                    held.close()            # the worker locks it itself (tag_file)
+                    small.append(pool.submit(tag_file, news_file))
+                del raw_items
+
+            for fut in small:
+                finished(*fut.result())
+            for news_file, chunks in large:
+                articles, errs = [], []
+                for fut in chunks:
+                    part, part_errs = fut.result()
+                    articles.extend(part)
+                    errs.extend(part_errs)
+                if not errs:
+                    rewrite(news_file, articles)
+                finished(news_file.name, len(articles), errs)
+
+    if errors:
+        for name, errs in errors.items():
+            for err in errs[:5]:
+                print(f"   {err}", file=sys.stderr)
+            if len(errs) > 5:
+                print(f"   … {len(errs) - 5} more in {name}", file=sys.stderr)
+        sys.exit(f"✋  Data validation failed in {len(errors)} file(s); "
+                 f"{files_processed} other file(s) tagged.")
+
+    journal.complete()
+
+    # fold the re-tagged quarterly archives into the mention index (mention_index.py)
+    if files_processed:
+        index = load_index()
+        print(f"📇  Mention index: {len(index.entities())} entities over {len(index.days())} day(s).")
+
+    if files_skipped:
+        print(f"↩️  Resumed: {files_skipped} file(s) already tagged by the interrupted run.")
+    if not files_processed and not files_skipped:
+        print("⚠️  No raw news_*.json files found in data/.", file=sys.stderr)
+    else:
+        print(f"\n✔️  Completed: {files_processed} file(s), {articles_tagged} articles total.")
+
+
+if __name__ == "__main__":
+    main()
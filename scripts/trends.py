@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+trends.py – Trending keywords and entity bursts over a rolling window.
+
+"What is spiking today compared with the past weeks" used to mean re-reading
+every news_*.json and recounting keywords / platforms_mentioned by hand.
+`TrendStore` keeps the counts incrementally:
+
+    • per kind (keywords, entities) a terms × WINDOW_DAYS ring buffer of
+      daily document counts, plus the number of articles per day; a day's
+      column is cleared when the ring wraps onto it
+    • merge_news.py adds every batch's new articles, so an update costs
+      O(batch) – entities come from platforms_mentioned or, for articles
+      not tagged yet, from the shared entity matcher (entities.py)
+
+Bursts are scored for all terms at once against the other days in the
+window (baseline rate p0 = their share of articles, smoothed):
+
+    z      – binomial z-score of today's count vs. N · p0
+    burst  – Kleinberg-style: log-likelihood gain of a burst state with rate
+             BURST_RATIO · p0 over the base state, minus a transition cost
+
+and written ranked to data/trending/<day>.json. The state lives in
+data/.cache/trends.npz; a checkout without it is rebuilt from all_news.json
+(a sorted archive is only read back to the start of the window).
+
+    python scripts/trends.py                     # today's trending file
+    python scripts/trends.py --day 2025-06-21 --by burst --top 10
+"""
+from __future__ import annotations
+
+import argparse
+import os
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+
+import archive_order
+from article import Article
+from durable_io import atomic_open, atomic_write_json
+
+# ───────────────────────── paths & tuning ────────────────
+REPO_ROOT    = Path(__file__).resolve().parent.parent
+DATA_DIR     = REPO_ROOT / "data"
+STATE_FILE   = DATA_DIR / ".cache" / "trends.npz"
+TRENDING_DIR = DATA_DIR / "trending"
+ARCHIVE      = DATA_DIR / "all_news.json"
+
+STATE_VERSION = 1
+WINDOW_DAYS   = 28              # today + the baseline days
+MIN_COUNT     = 3               # articles a term needs today to be listed
+FUTURE_SLACK  = 1               # days past today an article may be dated (time zones)
+TOP_K         = 25              # terms per kind in trending/<day>.json
+BURST_RATIO   = 2.0             # Kleinberg: burst state rate = ratio · base rate
+BURST_COST    = 1.0             # Kleinberg: γ, weight of the state-transition cost
+
+KINDS = ("keywords", "entities")
+
+
+def _latest_ordinal(day: str | None = None) -> int:
+    """Newest day ordinal an article may be counted on (*day* or today, plus FUTURE_SLACK)."""
+    latest = max(date.fromisoformat(day), date.today()) if day else date.today()
+    return (latest + timedelta(days=FUTURE_SLACK)).toordinal()
+
+
+class RingCounts:
+    """Document counts per term for the WINDOW_DAYS columns of the ring."""
+
+    def __init__(self, window: int, terms: list[str] | None = None, counts: np.ndarray | None = None):
+        self.terms  = list(terms or [])
+        self.index  = {t: i for i, t in enumerate(self.terms)}
+        self.counts = counts if counts is not None else np.zeros((1024, window), dtype=np.int32)
+
+    def rows(self, terms: Iterable[str]) -> list[int]:
+        out = []
+        for t in terms:
+            i = self.index.get(t)
+            if i is None:
+                i = self.index[t] = len(self.terms)
+                self.terms.append(t)
+                if i == len(self.counts):               # grow by doubling
+                    grown = np.zeros((max(2 * i, 1024), self.counts.shape[1]), dtype=np.int32)
+                    grown[:i] = self.counts
+                    self.counts = grown
+            out.append(i)
+        return out
+
+    def add(self, col: int, rows: list[int]) -> None:
+        self.counts[rows, col] += 1                     # rows are distinct within an article
+
+    @property
+    def active(self) -> np.ndarray:
+        return self.counts[:len(self.terms)]
+
+
+class TrendStore:
+    """Rolling per-day term counts and burst scores (see module docstring)."""
+
+    def __init__(self, window: int = WINDOW_DAYS, path: Path = STATE_FILE):
+        self.path    = path
+        self.window  = window
+        self.col_day = np.zeros(window, dtype=np.int64)   # day ordinal held by each column
+        self.docs    = np.zeros(window, dtype=np.int64)   # articles per column
+        self.rings   = {kind: RingCounts(window) for kind in KINDS}
+        self._resolver = None
+
+    # ── persistence ───────────────────────────────────────
+    @classmethod
+    def load(cls, path: Path = STATE_FILE, archive: str | os.PathLike = ARCHIVE) -> TrendStore:
+        """The saved state, or one rebuilt from *archive* if there is none."""
+        try:
+            with np.load(path) as z:
+                # a head in the future is a state poisoned by a mis-dated article: recount
+                if (int(z["version"]) == STATE_VERSION and len(z["col_day"]) == WINDOW_DAYS
+                        and int(z["col_day"].max()) <= _latest_ordinal()):
+                    store = cls(path=path)
+                    store.col_day, store.docs = z["col_day"], z["docs"]
+                    for kind in KINDS:
+                        store.rings[kind] = RingCounts(WINDOW_DAYS, z[f"terms_{kind}"].tolist(), z[f"counts_{kind}"])
+                    return store
+        except (FileNotFoundError, KeyError, ValueError, OSError):
+            pass
+        store = cls(path=path)
+        store.rebuild(archive)
+        return store
+
+    def save(self) -> None:
+        arrays = {"version": np.array(STATE_VERSION), "col_day": self.col_day, "docs": self.docs}
+        for kind, ring in self.rings.items():
+            arrays[f"terms_{kind}"]  = np.array(ring.terms, dtype=str)
+            arrays[f"counts_{kind}"] = ring.active
+        with atomic_open(self.path, "wb") as f:
+            np.savez_compressed(f, **arrays)
+
+    def rebuild(self, archive: str | os.PathLike) -> None:
+        """Count the window's articles of *archive* (sorted: stop at the window start)."""
+        if not os.path.exists(archive) or not archive_order.is_array(archive):
+            return
+        newest_first = archive_order.sorted_count(archive) is not None
+        start = None
+        seen: set[str] = set()                          # archives merged before dedupe hold repeats
+        for art in archive_order.iter_archive(archive):
+            if art.url:
+                if art.url in seen:
+                    continue
+                seen.add(art.url)
+            if art.day is None:
+                if newest_first:
+                    break                               # undated articles sort last
+                continue
+            day = date.fromisoformat(art.day).toordinal()
+            if day > _latest_ordinal():
+                continue                                # mis-dated (future) article
+            start = start or day - self.window + 1
+            if newest_first and day < start:
+                break
+            self.update([art])
+
+    # ── updates ───────────────────────────────────────────
+    @property
+    def head(self) -> int:
+        return int(self.col_day.max())
+
+    def _column(self, day: int) -> int | None:
+        if day <= self.head - self.window:
+            return None                                 # older than the window
+        col = day % self.window
+        if self.col_day[col] != day:                    # ring wrapped onto this column
+            self.col_day[col] = day
+            self.docs[col] = 0
+            for ring in self.rings.values():
+                ring.counts[:, col] = 0
+        return col
+
+    def _entities(self, art: Article) -> Iterable[str]:
+        if art.platforms_mentioned:
+            return art.platforms_mentioned
+        if self._resolver is None:
+            from entities import load_resolver
+            self._resolver = load_resolver()
+        return self._resolver.mentions(art.text)
+
+    def update(self, articles: Iterable[Article], default_day: str | None = None) -> int:
+        """
+        Count *articles* on their publish day (else *default_day*). Articles
+        dated after *default_day* (or today) are skipped: one of them would
+        move the ring's head into the future and push every real day out of
+        the window. Returns how many were counted.
+        """
+        latest  = _latest_ordinal(default_day)
+        counted = 0
+        for art in articles:
+            day = art.day or default_day
+            ordinal = date.fromisoformat(day).toordinal() if day else None
+            col = self._column(ordinal) if ordinal and ordinal <= latest else None
+            if col is None:
+                continue
+            self.docs[col] += 1
+            kw = self.rings["keywords"]
+            kw.add(col, kw.rows({k.lower() for k in art.keywords or ()}))
+            ent = self.rings["entities"]
+            ent.add(col, ent.rows(set(self._entities(art))))
+            counted += 1
+        return counted
+
+    # ── scoring ───────────────────────────────────────────
+    def scores(self, kind: str, day: str) -> dict[str, np.ndarray] | None:
+        """Today's count, baseline expectation, z and burst score for every term of *kind*."""
+        ordinal = date.fromisoformat(day).toordinal()
+        col = ordinal % self.window
+        if self.col_day[col] != ordinal or not self.docs[col]:
+            return None
+        hist = (self.col_day > ordinal - self.window) & (self.col_day < ordinal)
+        counts = self.rings[kind].active
+        x, n   = counts[:, col].astype(np.float64), float(self.docs[col])
+        h, nh  = counts[:, hist].sum(axis=1), float(self.docs[hist].sum())
+
+        p0 = (h + 0.5) / (nh + 1.0)                     # smoothed base rate
+        expected = n * p0
+        z = (x - expected) / np.sqrt(expected * (1 - p0) + 1.0)
+
+        p1 = np.minimum(BURST_RATIO * p0, 0.999)
+        burst = (x * np.log(p1 / p0) + (n - x) * np.log((1 - p1) / (1 - p0))
+                 - BURST_COST * np.log(hist.sum() + 1))
+        return {"count": x, "expected": expected, "z": z, "burst": burst}
+
+    def trending(self, day: str, top: int = TOP_K, by: str = "z") -> dict:
+        """Ranked trending terms of *day* per kind."""
+        ordinal = date.fromisoformat(day).toordinal()
+        col = ordinal % self.window
+        out = {"day": day, "articles": int(self.docs[col]) if self.col_day[col] == ordinal else 0,
+               "window_days": self.window, "ranked_by": by}
+        for kind in KINDS:
+            s = self.scores(kind, day)
+            rows = []
+            if s is not None:
+                eligible = np.flatnonzero((s["count"] >= MIN_COUNT) & (s[by] > 0))
+                terms = self.rings[kind].terms
+                for i in eligible[np.argsort(-s[by][eligible], kind="stable")][:top]:
+                    rows.append({"term": terms[i], "count": int(s["count"][i]),
+                                 "expected": round(float(s["expected"][i]), 2),
+                                 "z": round(float(s["z"][i]), 2), "burst": round(float(s["burst"][i]), 2)})
+            out[kind] = rows
+        return out
+
+    def write_trending(self, day: str, out_dir: Path = TRENDING_DIR, **kwargs) -> Path:
+        path = out_dir / f"{day}.json"
+        atomic_write_json(path, self.trending(day, **kwargs), indent=2, ensure_ascii=False)
+        return path
+
+
+# ───────────────────────── CLI ───────────────────────────
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Write the ranked trending terms of one day.")
+    ap.add_argument("--day", default=date.today().isoformat(), help="YYYY-MM-DD (default today)")
+    ap.add_argument("--by", choices=("z", "burst"), default="z", help="score to rank by")
+    ap.add_argument("--top", type=int, default=TOP_K, help=f"terms per kind (default {TOP_K})")
+    ap.add_argument("--rebuild", action="store_true", help="recount the window from all_news.json")
+    args = ap.parse_args()
+
+    if args.rebuild and STATE_FILE.exists():
+        os.remove(STATE_FILE)
+    store = TrendStore.load()
+    store.save()
+    path = store.write_trending(args.day, top=args.top, by=args.by)
+    print(f"Wrote {path.relative_to(REPO_ROOT)}.")
+
+
+if __name__ == "__main__":
+    main()